@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StockMovement
+from .models import ArchivedMovementFile, CycleCountSession, StockEventOutbox, StockMovement, StockSnapshot
 
 
 @admin.register(StockMovement)
@@ -18,3 +18,37 @@ class StockMovementAdmin(admin.ModelAdmin):
     raw_id_fields = ("product", "performed_by")
     readonly_fields = ("created_at",)
     ordering = ("-created_at",)
+
+
+@admin.register(StockEventOutbox)
+class StockEventOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "event_type", "product", "created_at", "published_at", "attempts")
+    list_filter = ("event_type", "published_at")
+    raw_id_fields = ("product", "movement")
+    readonly_fields = ("created_at",)
+    ordering = ("-id",)
+
+
+@admin.register(CycleCountSession)
+class CycleCountSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "label", "performed_by", "created_at", "skus_counted", "skus_adjusted", "units_variance", "value_variance")
+    raw_id_fields = ("performed_by",)
+    readonly_fields = ("created_at",)
+    ordering = ("-created_at",)
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("id", "product", "taken_at", "quantity")
+    list_filter = ("taken_at",)
+    search_fields = ("product__name", "product__sku")
+    raw_id_fields = ("product",)
+    ordering = ("-taken_at",)
+
+
+@admin.register(ArchivedMovementFile)
+class ArchivedMovementFileAdmin(admin.ModelAdmin):
+    list_display = ("id", "month", "path", "rows", "first_id", "last_id", "created_at")
+    list_filter = ("month",)
+    readonly_fields = ("month", "path", "rows", "first_id", "last_id", "sha256", "created_at")
+    ordering = ("-month", "-id")
@@ -0,0 +1,134 @@
+"""
+Motor de alertas de stock bajo con detección de cruce de umbral.
+
+Solo genera una alerta cuando un producto cruza minimum_stock (baja a o por
+debajo del mínimo, o se recupera por encima). Las alertas se agrupan en un
+resumen por ventana de tiempo (WINDOW_SECONDS; 0 = entrega inmediata) que
+se entrega a los sinks configurados. Las observaciones de un producto que
+sigue por debajo del mínimo se cuentan como suprimidas.
+
+El último estado conocido de cada producto se guarda en memoria del proceso;
+si no se conoce, se deduce del propio movimiento (stock antes de la entrada o
+salida) y, en su defecto, se asume que el producto estaba por encima del
+mínimo.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+LOW = "LOW"
+RECOVERED = "RECOVERED"
+
+DEFAULT_SINKS = [{"BACKEND": "apps.inventory.alerts.sinks.LoggingAlertSink"}]
+
+
+class LowStockAlert:
+    def __init__(self, *, kind: str, sku: str, stock: int, minimum: int) -> None:
+        self.kind = kind
+        self.sku = sku
+        self.stock = stock
+        self.minimum = minimum
+        self.created_at = timezone.now()
+
+    def message(self) -> str:
+        label = "ALERTA DE STOCK BAJO" if self.kind == LOW else "STOCK RECUPERADO"
+        return f"{label} | SKU={self.sku} | stock={self.stock} | mínimo={self.minimum}"
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "sku": self.sku,
+            "stock": self.stock,
+            "minimum": self.minimum,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+def _stock_before(product, movement) -> Optional[int]:
+    quantity = getattr(movement, "quantity", None)
+    if quantity is None:
+        return None
+    movement_type = getattr(movement, "movement_type", None)
+    if movement_type == "ENTRY":
+        return product.stock_quantity - quantity
+    if movement_type == "EXIT":
+        return product.stock_quantity + quantity
+    return None
+
+
+class LowStockAlertEngine:
+    def __init__(self, sinks, *, window_seconds: float = 0, clock=time.monotonic) -> None:
+        self._sinks = list(sinks)
+        self._window = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._is_low: Dict[object, bool] = {}
+        self._pending: List[LowStockAlert] = []
+        self._window_started: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self.counters = {"emitted": 0, "suppressed": 0, "digests": 0}
+
+    @classmethod
+    def from_settings(cls) -> "LowStockAlertEngine":
+        conf = getattr(settings, "INVENTORY_LOW_STOCK_ALERTS", {})
+        sinks = [
+            import_string(sink["BACKEND"])(**sink.get("OPTIONS", {}))
+            for sink in conf.get("SINKS", DEFAULT_SINKS)
+        ]
+        return cls(sinks, window_seconds=conf.get("WINDOW_SECONDS", 0))
+
+    def observe(self, product, movement) -> None:
+        key = getattr(product, "pk", None) or product.sku
+        is_low = product.stock_quantity <= product.minimum_stock
+        with self._lock:
+            was_low = self._is_low.get(key)
+            if was_low is None:
+                before = _stock_before(product, movement)
+                was_low = before is not None and before <= product.minimum_stock
+            self._is_low[key] = is_low
+            if is_low == was_low:
+                if is_low:
+                    self.counters["suppressed"] += 1
+                return
+            self._pending.append(
+                LowStockAlert(
+                    kind=LOW if is_low else RECOVERED,
+                    sku=product.sku,
+                    stock=product.stock_quantity,
+                    minimum=product.minimum_stock,
+                )
+            )
+            if self._window_started is None:
+                self._window_started = self._clock()
+            due = self._clock() - self._window_started >= self._window
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self._window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Entrega el resumen pendiente (si lo hay) a todos los sinks."""
+        with self._lock:
+            alerts, self._pending = self._pending, []
+            self._window_started = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not alerts:
+                return
+            self.counters["emitted"] += len(alerts)
+            self.counters["digests"] += 1
+        for sink in self._sinks:
+            try:
+                sink.send(alerts)
+            except Exception:
+                logger.exception("Error entregando alertas de stock con %s", type(sink).__name__)
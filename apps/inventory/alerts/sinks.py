@@ -0,0 +1,52 @@
+"""
+Destinos de entrega de los resúmenes de alertas de stock bajo.
+
+Cada sink recibe una lista de LowStockAlert (un resumen por ventana de tiempo).
+"""
+import json
+import logging
+import urllib.request
+from typing import List, Sequence
+
+from django.core.mail import send_mail
+
+
+class LoggingAlertSink:
+    def __init__(self, logger_name: str = "apps.inventory.observers.stock_alert_observer") -> None:
+        self._logger = logging.getLogger(logger_name)
+
+    def send(self, alerts: Sequence) -> None:
+        self._logger.warning(" || ".join(alert.message() for alert in alerts))
+
+
+class EmailAlertSink:
+    """Envía el resumen con el EMAIL_BACKEND configurado (smtp, filebased, locmem...)."""
+
+    def __init__(self, recipients: List[str], from_email: str = None, subject: str = "Alertas de stock") -> None:
+        self._recipients = list(recipients)
+        self._from_email = from_email
+        self._subject = subject
+
+    def send(self, alerts: Sequence) -> None:
+        send_mail(
+            f"{self._subject} ({len(alerts)})",
+            "\n".join(alert.message() for alert in alerts),
+            self._from_email,
+            self._recipients,
+        )
+
+
+class WebhookAlertSink:
+    """POST JSON {"alerts": [...]} a una URL."""
+
+    def __init__(self, url: str, timeout: float = 5.0) -> None:
+        self._url = url
+        self._timeout = timeout
+
+    def send(self, alerts: Sequence) -> None:
+        body = json.dumps({"alerts": [alert.as_dict() for alert in alerts]}).encode()
+        request = urllib.request.Request(
+            self._url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self._timeout):
+            pass
@@ -5,3 +5,7 @@ class InventoryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.inventory"
 
+    def ready(self):
+        from apps.inventory.observers import registry
+
+        registry.configure()
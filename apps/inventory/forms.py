@@ -1,16 +1,22 @@
+import uuid
+
 from django import forms
 from django.conf import settings
 from django.core.exceptions import ValidationError
 
+from apps.inventory.services.sharded_counter import ShardedStockCounter
 from apps.products.models import Product
 from .models import StockMovement
 
 
 def get_stock_movement_form(data=None):
     """Devuelve el formulario adecuado según USE_MOCK_DATA (mock no usa ORM)."""
+    # Cada formulario renderizado lleva su propia clave de idempotencia: si el
+    # navegador o el escáner reenvían el POST, se reconoce como reintento.
+    initial = {"idempotency_key": uuid.uuid4().hex}
     if getattr(settings, "USE_MOCK_DATA", False):
-        return StockMovementFormMock(data)
-    return StockMovementForm(data)
+        return StockMovementFormMock(data, initial=initial)
+    return StockMovementForm(data, initial=initial)
 
 
 class StockMovementFormMock(forms.Form):
@@ -39,6 +45,11 @@ class StockMovementFormMock(forms.Form):
         label="Motivo (opcional)",
         widget=forms.TextInput(attrs={"class": "form-control"}),
     )
+    # Sin max_length: la vista normaliza la clave (sha256 si pasa de 64).
+    idempotency_key = forms.CharField(
+        required=False,
+        widget=forms.HiddenInput,
+    )
 
     def __init__(self, data=None, **kwargs):
         super().__init__(data, **kwargs)
@@ -88,6 +99,11 @@ class StockMovementForm(forms.Form):
         label="Motivo (opcional)",
         widget=forms.TextInput(attrs={"class": "form-control"}),
     )
+    # Sin max_length: la vista normaliza la clave (sha256 si pasa de 64).
+    idempotency_key = forms.CharField(
+        required=False,
+        widget=forms.HiddenInput,
+    )
 
     def clean(self):
         cleaned_data = super().clean()
@@ -96,9 +112,11 @@ class StockMovementForm(forms.Form):
         quantity = cleaned_data.get("quantity")
 
         if product and movement_type == StockMovement.EXIT and quantity is not None:
-            if quantity > product.stock_quantity:
-                raise ValidationError(
-                    f"La salida excede el stock disponible. Stock actual: {product.stock_quantity}."
-                )
+            stock = product.stock_quantity
+            if product.stock_shards:
+                # Particionado: stock_quantity es el último total consolidado; vale la suma viva.
+                stock = ShardedStockCounter().totals([product.pk]).get(product.pk, 0)
+            if quantity > stock:
+                raise ValidationError(f"La salida excede el stock disponible. Stock actual: {stock}.")
 
         return cleaned_data
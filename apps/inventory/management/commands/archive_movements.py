@@ -0,0 +1,41 @@
+"""
+Archiva en frío los movimientos de los meses completos anteriores al horizonte.
+
+Uso (programar mensualmente):
+    python manage.py archive_movements                     # INVENTORY_ARCHIVE_RETENTION_DAYS
+    python manage.py archive_movements --retention-days 180 --dry-run
+
+Ver apps.inventory.services.movement_archive. Las claves de idempotencia de
+los movimientos archivados dejan de reconocerse.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.inventory.services.movement_archive import archive_before
+
+
+class Command(BaseCommand):
+    help = "Mueve los movimientos antiguos a ficheros mensuales comprimidos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retention-days", type=int, default=None)
+        parser.add_argument("--dry-run", action="store_true", help="Solo muestra qué meses se archivarían.")
+
+    def handle(self, *args, **options):
+        retention = options["retention_days"]
+        if retention is None:
+            retention = settings.INVENTORY_ARCHIVE_RETENTION_DAYS
+        horizon = timezone.localdate() - timedelta(days=retention)
+        start = time.perf_counter()
+        files = archive_before(horizon, dry_run=options["dry_run"])
+        prefix = "[dry-run] " if options["dry_run"] else ""
+        for archived in files:
+            self.stdout.write(f"{prefix}{archived.month:%Y-%m}: {archived.rows} movimientos {archived.path}")
+        self.stdout.write(
+            f"{prefix}meses={len(files)} movimientos={sum(f.rows for f in files)} "
+            f"| horizonte {horizon} | {time.perf_counter() - start:.2f}s"
+        )
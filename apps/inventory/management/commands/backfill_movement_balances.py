@@ -0,0 +1,29 @@
+"""
+Calcula signed_delta y balance_after de los movimientos existentes.
+
+Uso:
+    python manage.py backfill_movement_balances --chunk-size 5000
+    python manage.py backfill_movement_balances --product 12 --product 15
+
+Ver apps.inventory.services.movement_balances para el criterio de cálculo.
+Conviene ejecutarlo con poco tráfico: los movimientos nuevos ya se registran
+con su saldo.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services.movement_balances import backfill_movement_balances
+
+
+class Command(BaseCommand):
+    help = "Rellena el saldo tras cada movimiento en bloques (streaming por producto)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--product", type=int, action="append", dest="products", help="Limitar a estos productos.")
+
+    def handle(self, *args, **options):
+        report = backfill_movement_balances(chunk_size=options["chunk_size"], product_ids=options["products"])
+        self.stdout.write(
+            f"productos={report.products} movimientos={report.movements} "
+            f"sin_saldo={report.without_balance}"
+        )
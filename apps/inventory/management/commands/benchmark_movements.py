@@ -0,0 +1,79 @@
+"""
+Compara el registro de movimientos línea a línea (register_movement) contra
+el registro por lotes (register_movements).
+
+Uso:
+    python manage.py benchmark_movements --lines 1000 --products 50 --rounds 3
+
+Crea productos temporales con prefijo BENCH- y los elimina al terminar.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.models import StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InventoryService
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+SKU_PREFIX = "BENCH-"
+
+
+class Command(BaseCommand):
+    help = "Benchmark: movimientos línea a línea vs. lote con bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=1000)
+        parser.add_argument("--products", type=int, default=50)
+        parser.add_argument("--rounds", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        Product.objects.filter(sku__startswith=SKU_PREFIX).delete()
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"Bench {i}",
+                    sku=f"{SKU_PREFIX}{i:05d}",
+                    unit_price=Decimal("1.00"),
+                    stock_quantity=1_000_000,
+                )
+                for i in range(options["products"])
+            ]
+        )
+        product_ids = list(Product.objects.filter(sku__startswith=SKU_PREFIX).values_list("pk", flat=True))
+        service = InventoryService(DjangoProductRepository(), StockSubject())
+
+        try:
+            for round_no in range(1, options["rounds"] + 1):
+                batch = [
+                    {
+                        "product_id": rng.choice(product_ids),
+                        "movement_type": rng.choice([StockMovement.ENTRY, StockMovement.EXIT]),
+                        "quantity": rng.randint(1, 10),
+                        "reason": "benchmark",
+                    }
+                    for _ in range(options["lines"])
+                ]
+
+                start = time.perf_counter()
+                for line in batch:
+                    service.register_movement(user=None, **line)
+                loop_elapsed = time.perf_counter() - start
+
+                start = time.perf_counter()
+                service.register_movements(batch)
+                batch_elapsed = time.perf_counter() - start
+
+                self.stdout.write(
+                    f"ronda {round_no}: {len(batch)} líneas | "
+                    f"línea a línea {loop_elapsed:.3f}s ({len(batch) / loop_elapsed:.0f} líneas/s) | "
+                    f"lote {batch_elapsed:.3f}s ({len(batch) / batch_elapsed:.0f} líneas/s) | "
+                    f"x{loop_elapsed / batch_elapsed:.1f}"
+                )
+        finally:
+            Product.objects.filter(sku__startswith=SKU_PREFIX).delete()
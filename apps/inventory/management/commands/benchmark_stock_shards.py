@@ -0,0 +1,83 @@
+"""
+Throughput de escritura sobre un único SKU según el número de particiones.
+
+Uso:
+    python manage.py benchmark_stock_shards --threads 16 --ops 200 --shards 0,1,2,4,8,16
+
+0 particiones = UPDATE condicional sobre la fila de Product. Las cifras solo
+son representativas con un motor con bloqueo por fila (PostgreSQL); SQLite
+serializa todas las escrituras de la base de datos.
+Crea un producto temporal con prefijo SHARD- y lo elimina al terminar.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from apps.inventory.models import StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+SKU = "SHARD-001"
+
+
+class Command(BaseCommand):
+    help = "Benchmark de escrituras concurrentes sobre un SKU con contador particionado."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--ops", type=int, default=200, help="Entradas por hilo.")
+        parser.add_argument("--shards", default="0,1,2,4,8,16")
+
+    def handle(self, *args, **options):
+        for shards in [int(n) for n in options["shards"].split(",")]:
+            self._run(shards, options["threads"], options["ops"])
+
+    def _run(self, shards, threads, ops):
+        Product.objects.filter(sku=SKU).delete()
+        product = Product.objects.create(name="Shard", sku=SKU, unit_price=Decimal("1.00"))
+        if shards:
+            ShardedStockCounter().enable(product.pk, shards)
+        service = InventoryService(DjangoProductRepository(), StockSubject())
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(ops):
+                    try:
+                        service.register_movement(
+                            product_id=product.pk,
+                            movement_type=StockMovement.ENTRY,
+                            quantity=1,
+                            reason="benchmark",
+                            user=None,
+                        )
+                    except DatabaseError:
+                        errors.append(1)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        try:
+            if shards:
+                ShardedStockCounter().fold(product.pk)
+            product.refresh_from_db()
+            self.stdout.write(
+                f"particiones={shards:>2} | {threads * ops} entradas en {elapsed:.2f}s "
+                f"({threads * ops / elapsed:.0f} escrituras/s) | errores_bd={len(errors)} "
+                f"| stock final={product.stock_quantity}"
+            )
+        finally:
+            Product.objects.filter(sku=SKU).delete()
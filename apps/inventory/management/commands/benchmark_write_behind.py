@@ -0,0 +1,106 @@
+"""
+Escaneos por segundo: register_movement por lectura frente al buffer de
+escritura diferida (WriteBehindBuffer).
+
+Uso:
+    python manage.py benchmark_write_behind --threads 8 --scans 500 --products 20 --window-ms 20
+
+Cada hilo simula un escáner que emite salidas de 1 unidad; en modo diferido
+el escáner no espera cada confirmación, solo al final. Con SQLite las
+escrituras se serializan y la ruta directa puede dar errores de bloqueo; la
+comparación es representativa en PostgreSQL.
+Crea productos temporales con prefijo SCAN- y los elimina al terminar.
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from apps.inventory.models import StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.write_behind import WriteBehindBuffer
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+SKU_PREFIX = "SCAN-"
+
+
+class Command(BaseCommand):
+    help = "Benchmark: escaneos directos vs. buffer de escritura diferida."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--scans", type=int, default=500, help="Lecturas por hilo.")
+        parser.add_argument("--products", type=int, default=20)
+        parser.add_argument("--window-ms", type=int, default=20)
+        parser.add_argument("--max-lines", type=int, default=500)
+
+    def handle(self, *args, **options):
+        Product.objects.filter(sku__startswith=SKU_PREFIX).delete()
+        Product.objects.bulk_create(
+            [
+                Product(name=f"Scan {i}", sku=f"{SKU_PREFIX}{i:04d}", unit_price=Decimal("1.00"), stock_quantity=1_000_000)
+                for i in range(options["products"])
+            ]
+        )
+        product_ids = list(Product.objects.filter(sku__startswith=SKU_PREFIX).values_list("pk", flat=True))
+        service = InventoryService(DjangoProductRepository(), StockSubject())
+        try:
+            direct = self._run("directo", options, product_ids, lambda line: service.register_movement(**line))
+            buffer = WriteBehindBuffer(
+                service, window=options["window_ms"] / 1000, max_lines=options["max_lines"]
+            )
+            buffered = self._run(
+                "diferido", options, product_ids, lambda line: buffer.submit(**line)
+            )
+            buffer.close()
+            self.stdout.write(
+                f"flushes={buffer.flushes} líneas/flush={buffer.lines_flushed / max(buffer.flushes, 1):.1f} "
+                f"| x{buffered / direct:.1f}"
+            )
+        finally:
+            Product.objects.filter(sku__startswith=SKU_PREFIX).delete()
+
+    def _run(self, label, options, product_ids, register) -> float:
+        errors = []
+
+        def scanner(seed):
+            rng = random.Random(seed)
+            pending = []
+            try:
+                for _ in range(options["scans"]):
+                    line = {
+                        "product_id": rng.choice(product_ids),
+                        "movement_type": StockMovement.EXIT,
+                        "quantity": 1,
+                        "reason": "benchmark",
+                        "user": None,
+                    }
+                    try:
+                        pending.append(register(line))
+                    except DatabaseError:
+                        errors.append(1)
+                for future in pending:
+                    if isinstance(future, Future) and future.exception(timeout=30):
+                        errors.append(1)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=scanner, args=(n,)) for n in range(options["threads"])]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - start
+        total = options["threads"] * options["scans"]
+        self.stdout.write(
+            f"{label:>8}: {total} escaneos en {elapsed:.2f}s ({total / elapsed:.0f} escaneos/s) "
+            f"| errores_bd={len(errors)}"
+        )
+        return total / elapsed
@@ -0,0 +1,66 @@
+"""
+Concilia un conteo físico con el stock del sistema.
+
+Uso:
+    python manage.py cycle_count conteo.csv --label "Pasillo 4" --user admin --report varianza.csv
+    python manage.py cycle_count conteo.jsonl --dry-run
+
+Ver apps.inventory.services.cycle_count para el formato de las filas.
+"""
+import csv
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.services.cycle_count import CycleCountReconciler
+from apps.inventory.services.inventory_service import InventoryService
+from apps.products.repositories.product_repository import DjangoProductRepository
+from config.file_readers import read_rows
+
+REPORT_FIELDS = ["sku", "name", "system_quantity", "counted_quantity", "variance", "value_variance"]
+
+
+class Command(BaseCommand):
+    help = "Aplica en bloque los ajustes de un conteo cíclico y genera el informe de varianzas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+        parser.add_argument("--label", default="")
+        parser.add_argument("--user", default=None, help="Usuario al que se atribuyen los ajustes.")
+        parser.add_argument("--report", default=None, help="Ruta del CSV de varianzas (solo SKUs con diferencia).")
+        parser.add_argument("--dry-run", action="store_true", help="Calcula las varianzas sin aplicar ajustes.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Usuario no encontrado: {options['user']}")
+
+        reconciler = CycleCountReconciler(InventoryService(DjangoProductRepository()))
+        with open(path, newline="", encoding="utf-8") as stream:
+            report = reconciler.run(
+                read_rows(stream, path, options["format"]),
+                user=user,
+                label=options["label"],
+                dry_run=options["dry_run"],
+            )
+
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as out:
+                writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(line.as_row() for line in report.variances)
+
+        for row_number, message in report.errors:
+            self.stderr.write(f"fila {row_number}: {message}")
+        session = f"sesión #{report.session.pk} " if report.session else "[dry-run] "
+        self.stdout.write(
+            f"{session}filas={report.rows} skus_contados={len(report.lines)} "
+            f"ajustados={len(report.variances)} no_válidas={report.invalid} "
+            f"varianza_unidades={report.units_variance} varianza_valor={report.value_variance:.2f} "
+            f"| {report.elapsed:.2f}s"
+        )
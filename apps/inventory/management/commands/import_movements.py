@@ -0,0 +1,51 @@
+"""
+Importa movimientos históricos desde un fichero CSV o JSONL.
+
+Uso:
+    python manage.py import_movements movimientos.csv --chunk-size 2000 --user admin
+    python manage.py import_movements movimientos.jsonl
+
+Ver apps.inventory.services.movement_import para el formato de las filas.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.movement_import import MovementImporter
+from apps.products.repositories.product_repository import DjangoProductRepository
+from config.file_readers import read_rows
+
+
+class Command(BaseCommand):
+    help = "Importa movimientos en bloques desde CSV o JSONL (streaming)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--user", default=None, help="Usuario al que se atribuyen los movimientos.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Usuario no encontrado: {options['user']}")
+
+        importer = MovementImporter(
+            InventoryService(DjangoProductRepository()),
+            chunk_size=options["chunk_size"],
+            user=user,
+        )
+        with open(path, newline="", encoding="utf-8") as stream:
+            report = importer.run(read_rows(stream, path, options["format"]))
+
+        for row_number, message in report.errors:
+            self.stderr.write(f"fila {row_number}: {message}")
+        self.stdout.write(
+            f"filas={report.rows} importadas={report.imported} no_válidas={report.invalid} "
+            f"rechazadas_por_stock={report.rejected} | {report.elapsed:.2f}s "
+            f"({report.rows_per_second:.0f} filas/s)"
+        )
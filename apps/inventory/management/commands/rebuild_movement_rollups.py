@@ -0,0 +1,35 @@
+"""
+Recalcula los agregados diarios de movimientos (DailyMovementRollup).
+
+Uso:
+    python manage.py rebuild_movement_rollups                 # todo el historial
+    python manage.py rebuild_movement_rollups --since 2024-01-01
+
+Necesario una vez tras desplegar los agregados y si se importan o borran
+movimientos por fuera de InventoryService. Los meses archivados conservan sus
+agregados: el recálculo empieza como pronto tras el último mes archivado.
+"""
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.services import movement_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los agregados diarios de movimientos desde StockMovement."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", default=None, help="Fecha inicial (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.strptime(options["since"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError(f"Fecha no válida: {options['since']}")
+        start = time.perf_counter()
+        created = movement_rollups.rebuild(since=since)
+        self.stdout.write(f"agregados={created} | {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,66 @@
+"""
+Compara el stock de cada producto con el que resulta de su libro de movimientos.
+
+Uso:
+    python manage.py reconcile_stock --report deriva.csv
+    python manage.py reconcile_stock --workers 8 --chunk-size 10000
+    python manage.py reconcile_stock --repair --user admin
+
+Con --repair registra un ajuste al stock actual en cada producto con deriva
+(el stock no cambia; el libro vuelve a cuadrar). Ver
+apps.inventory.services.stock_drift.
+"""
+import csv
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.services.stock_drift import reconcile
+
+REPORT_FIELDS = ["sku", "name", "stock", "ledger", "variance", "movements", "diverged_at", "note"]
+
+
+class Command(BaseCommand):
+    help = "Detecta (y opcionalmente corrige) diferencias entre el stock y el libro de movimientos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo (por rangos de id de producto).")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Movimientos por lectura del cursor.")
+        parser.add_argument("--repair", action="store_true", help="Registra un ajuste al stock actual en cada deriva.")
+        parser.add_argument("--user", default=None, help="Usuario al que se atribuyen los ajustes.")
+        parser.add_argument("--report", default=None, help="Ruta del CSV de productos con deriva.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Usuario no encontrado: {options['user']}")
+
+        report = reconcile(
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            repair=options["repair"],
+            user=user,
+        )
+
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as out:
+                writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(line.as_row() for line in report.lines)
+
+        for line in report.lines[:20]:
+            self.stdout.write(
+                f"{line.sku}: stock={line.stock} libro={line.ledger} diferencia={line.variance:+d}"
+                + (f" ({line.note})" if line.note else "")
+            )
+        if len(report.lines) > 20:
+            self.stdout.write(f"... y {len(report.lines) - 20} más")
+        rate = report.movements / report.elapsed if report.elapsed else 0
+        self.stdout.write(
+            f"productos={report.products} movimientos={report.movements} con_deriva={len(report.lines)} "
+            f"indeterminados={report.unknown} ajustados={report.repaired} "
+            f"| {report.elapsed:.2f}s ({rate:.0f} movimientos/s)"
+        )
@@ -0,0 +1,73 @@
+"""
+Publica el outbox de eventos de stock en INVENTORY_OUTBOX_ENDPOINT.
+
+Uso:
+    python manage.py relay_stock_events                 # vacía el outbox y termina
+    python manage.py relay_stock_events --loop --interval 2
+    python manage.py relay_stock_events --endpoint http://127.0.0.1:9000/events --batch-size 1000
+
+Ejecutar una sola instancia: el orden por producto depende de ello. Tras
+vaciar el outbox (y en --loop, como mucho cada PURGE_EVERY segundos) borra
+los eventos publicados hace más de --retention-days días.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.services.outbox_relay import OutboxRelay, RelayError
+
+PURGE_EVERY = 3600
+
+
+class Command(BaseCommand):
+    help = "Publica los eventos pendientes de StockEventOutbox por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", default=None)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-retries", type=int, default=5)
+        parser.add_argument("--backoff", type=float, default=0.5, help="Espera base entre reintentos (s).")
+        parser.add_argument("--loop", action="store_true", help="Seguir sondeando el outbox.")
+        parser.add_argument("--interval", type=float, default=2.0)
+        parser.add_argument(
+            "--retention-days", type=int, default=None,
+            help="Días que se conservan los eventos publicados (INVENTORY_OUTBOX_RETENTION_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        endpoint = options["endpoint"] or getattr(settings, "INVENTORY_OUTBOX_ENDPOINT", "")
+        if not endpoint:
+            raise CommandError("Configura INVENTORY_OUTBOX_ENDPOINT o usa --endpoint.")
+        relay = OutboxRelay(
+            endpoint,
+            batch_size=options["batch_size"],
+            max_retries=options["max_retries"],
+            backoff=options["backoff"],
+        )
+        last_purge = None
+        try:
+            while True:
+                published = relay.drain()
+                if published and options["loop"]:
+                    self._report(relay)
+                if last_purge is None or time.monotonic() - last_purge >= PURGE_EVERY:
+                    purged = relay.purge_published(options["retention_days"])
+                    if purged:
+                        self.stdout.write(f"{purged} eventos publicados eliminados")
+                    last_purge = time.monotonic()
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except RelayError as exc:
+            self._report(relay)
+            raise CommandError(str(exc))
+        except KeyboardInterrupt:
+            pass
+        self._report(relay)
+
+    def _report(self, relay):
+        self.stdout.write(
+            f"publicados={relay.published} lotes={relay.batches} "
+            f"tiempo={relay.elapsed:.2f}s ({relay.throughput:.0f} eventos/s)"
+        )
@@ -0,0 +1,46 @@
+"""
+Gestiona los contadores de stock particionados.
+
+Uso:
+    python manage.py stock_shards enable --sku MON-001 --shards 8
+    python manage.py stock_shards disable --sku MON-001
+    python manage.py stock_shards fold            # todos los productos particionados
+    python manage.py stock_shards fold --sku MON-001
+
+"fold" está pensado para ejecutarse periódicamente (cron) y mantener
+Product.stock_quantity cerca del stock vivo.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Activa, desactiva o consolida contadores de stock particionados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["enable", "disable", "fold"])
+        parser.add_argument("--sku", action="append", default=[], help="Repetible.")
+        parser.add_argument("--shards", type=int, default=8)
+
+    def handle(self, *args, **options):
+        counter = ShardedStockCounter()
+        action = options["action"]
+        products = Product.objects.all()
+        if options["sku"]:
+            products = products.filter(sku__in=options["sku"])
+        elif action == "fold":
+            products = products.filter(stock_shards__gt=0)
+        else:
+            raise CommandError("Indica al menos un --sku.")
+
+        for product_id, sku in products.values_list("pk", "sku"):
+            if action == "enable":
+                counter.enable(product_id, options["shards"])
+                self.stdout.write(f"{sku}: {options['shards']} particiones")
+            elif action == "disable":
+                counter.disable(product_id)
+                self.stdout.write(f"{sku}: particiones desactivadas")
+            else:
+                self.stdout.write(f"{sku}: stock consolidado = {counter.fold(product_id)}")
@@ -0,0 +1,122 @@
+"""
+Arnés de estrés multihilo para las salidas de stock.
+
+Lanza N hilos que registran salidas de 1 unidad sobre un mismo producto y
+compara el camino anterior (leer, comprobar en Python y save() completo)
+con el UPDATE condicional de InventoryService.
+
+Uso:
+    python manage.py stress_stock_concurrency --threads 8 --ops 200 --mode both
+
+"Actualizaciones perdidas" = salidas registradas que no se reflejan en el
+stock final; "sobreventa" = salidas aceptadas por encima del stock inicial.
+Crea un producto temporal con prefijo STRESS- y lo elimina al terminar.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+
+from apps.inventory.models import StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InsufficientStockError, InventoryService
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+SKU = "STRESS-001"
+
+
+@transaction.atomic
+def legacy_exit(product_id: int, quantity: int) -> None:
+    """Camino anterior: lectura, comprobación en Python y save() de todas las columnas."""
+    product = Product.objects.get(pk=product_id, is_active=True)
+    if quantity > product.stock_quantity:
+        raise InsufficientStockError("La salida excede el stock disponible.")
+    product.stock_quantity -= quantity
+    product.save()
+    StockMovement.objects.create(product=product, movement_type=StockMovement.EXIT, quantity=quantity)
+
+
+class Command(BaseCommand):
+    help = "Estrés concurrente de salidas: throughput y actualizaciones perdidas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--ops", type=int, default=200, help="Salidas por hilo.")
+        parser.add_argument(
+            "--initial-stock",
+            type=int,
+            default=None,
+            help="Stock inicial (por defecto, la mitad de las salidas totales).",
+        )
+        parser.add_argument("--mode", choices=["legacy", "conditional", "both"], default="both")
+
+    def handle(self, *args, **options):
+        modes = ["legacy", "conditional"] if options["mode"] == "both" else [options["mode"]]
+        for mode in modes:
+            self._run(mode, options["threads"], options["ops"], options["initial_stock"])
+
+    def _run(self, mode, threads, ops, initial_stock):
+        if initial_stock is None:
+            initial_stock = threads * ops // 2
+        Product.objects.filter(sku=SKU).delete()
+        product = Product.objects.create(
+            name="Stress", sku=SKU, unit_price=Decimal("1.00"), stock_quantity=initial_stock
+        )
+        service = InventoryService(DjangoProductRepository(), StockSubject())
+        counters = {"ok": 0, "insufficient": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker():
+            local = {"ok": 0, "insufficient": 0, "errors": 0}
+            try:
+                for _ in range(ops):
+                    try:
+                        if mode == "legacy":
+                            legacy_exit(product.pk, 1)
+                        else:
+                            service.register_movement(
+                                product_id=product.pk,
+                                movement_type=StockMovement.EXIT,
+                                quantity=1,
+                                reason="stress",
+                                user=None,
+                            )
+                    except InsufficientStockError:
+                        local["insufficient"] += 1
+                    except DatabaseError:
+                        local["errors"] += 1
+                    else:
+                        local["ok"] += 1
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in local.items():
+                        counters[key] += value
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        try:
+            product.refresh_from_db()
+            recorded = StockMovement.objects.filter(product=product).count()
+            expected_stock = initial_stock - recorded
+            lost_updates = product.stock_quantity - expected_stock
+            oversold = max(0, recorded - initial_stock)
+            self.stdout.write(
+                f"[{mode}] hilos={threads} ops={threads * ops} en {elapsed:.2f}s "
+                f"({threads * ops / elapsed:.0f} ops/s) | aceptadas={counters['ok']} "
+                f"rechazadas={counters['insufficient']} errores_bd={counters['errors']} | "
+                f"stock inicial={initial_stock} final={product.stock_quantity} "
+                f"esperado={expected_stock} | actualizaciones perdidas={lost_updates} "
+                f"sobreventa={oversold}"
+            )
+        finally:
+            Product.objects.filter(sku=SKU).delete()
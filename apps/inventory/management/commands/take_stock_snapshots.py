@@ -0,0 +1,31 @@
+"""
+Guarda instantáneas de stock para las consultas de stock a una fecha.
+
+Uso (programar con cron o similar):
+    python manage.py take_stock_snapshots                      # diario: todos los productos
+    python manage.py take_stock_snapshots --every-movements 500  # solo los que acumulan 500 movimientos
+
+Ver apps.inventory.services.stock_snapshots.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services.stock_snapshots import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Guarda el stock actual de los productos como instantánea."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every-movements",
+            type=int,
+            default=None,
+            help="Solo productos con al menos N movimientos desde su última instantánea.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = take_snapshots(every_movements=options["every_movements"])
+        self.stdout.write(f"instantáneas={created} | {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,143 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_movement_type_keyset_idx'),
+        ('products', '0001_supplier_is_active'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='balance_after',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='signed_delta',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='ArchivedMovementFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primer día del mes archivado.')),
+                ('path', models.CharField(help_text='Ruta relativa a INVENTORY_ARCHIVE_DIR.', max_length=500)),
+                ('rows', models.PositiveIntegerField()),
+                ('first_id', models.BigIntegerField()),
+                ('last_id', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['month', 'id'],
+                'indexes': [models.Index(fields=['month'], name='archived_movement_month_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CycleCountSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('skus_counted', models.PositiveIntegerField(default=0)),
+                ('skus_adjusted', models.PositiveIntegerField(default=0)),
+                ('units_variance', models.IntegerField(default=0)),
+                ('value_variance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('performed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cycle_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_counter_shards', to='products.product')),
+            ],
+            options={
+                'ordering': ['product', 'index'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockEventOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(default='stock.movement_registered', max_length=50)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('movement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbox_events', to='inventory.stockmovement')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_events', to='products.product')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.product')),
+            ],
+            options={
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyMovementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('movement_type', models.CharField(choices=[('ENTRY', 'Entrada'), ('EXIT', 'Salida'), ('ADJUSTMENT', 'Ajuste')], max_length=20)),
+                ('quantity_total', models.PositiveBigIntegerField(default=0)),
+                ('movement_count', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_movement_rollups', to='products.product')),
+            ],
+            options={
+                'ordering': ['-day', 'product'],
+                'indexes': [models.Index(fields=['day'], name='daily_rollup_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailymovementrollup',
+            constraint=models.UniqueConstraint(fields=('product', 'day', 'movement_type'), name='daily_rollup_product_day_type_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockcountershard',
+            constraint=models.UniqueConstraint(fields=('product', 'index'), name='stock_shard_product_index_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockcountershard',
+            constraint=models.CheckConstraint(check=models.Q(('quantity__gte', 0)), name='stock_shard_quantity_non_negative'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('product', 'taken_at'), name='stock_snapshot_product_taken_at_unique'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_stock_movement_ledger_and_support_models'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='dailymovementrollup',
+            name='daily_rollup_product_day_type_unique',
+        ),
+        migrations.AddField(
+            model_name='dailymovementrollup',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='dailymovementrollup',
+            constraint=models.UniqueConstraint(fields=('product', 'day', 'movement_type', 'shard'), name='daily_rollup_product_day_type_shard_unique'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_daily_rollup_shard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockeventoutbox',
+            index=models.Index(condition=models.Q(('published_at__isnull', True)), fields=['id'], name='stock_outbox_pending_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from apps.products.models import Product
 
@@ -33,11 +34,188 @@ class StockMovement(models.Model):
         blank=True,
         related_name="movements",
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    # default (no auto_now_add) para poder importar movimientos históricos con su fecha.
+    created_at = models.DateTimeField(default=timezone.now)
+    # Clave opcional enviada por el cliente: los reintentos con la misma clave
+    # devuelven el movimiento original sin volver a tocar el stock.
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # Efecto con signo sobre el stock y stock resultante, fijados al registrar
+    # el movimiento (backfill_movement_balances para filas antiguas). Nulos si
+    # no se conocen, p. ej. en productos con contador particionado.
+    signed_delta = models.IntegerField(null=True, blank=True)
+    balance_after = models.IntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Listado, informe y panel sin filtros: ORDER BY created_at DESC LIMIT n.
+            models.Index(fields=["created_at", "id"], name="stock_mov_created_idx"),
+            # Filtro por tipo (listado e informe) con el mismo orden; id completa el cursor.
+            models.Index(fields=["movement_type", "created_at", "id"], name="stock_mov_type_created_idx"),
+            # Filtro por producto en el informe; también el recorrido por producto
+            # de la conciliación, los saldos y el stock a una fecha.
+            models.Index(fields=["product", "created_at", "id"], name="stock_mov_product_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.movement_type} - {self.product} ({self.quantity})"
 
+
+
+class StockCounterShard(models.Model):
+    """Fracción del stock de un producto con contador particionado (Product.stock_shards > 0)."""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_counter_shards",
+    )
+    index = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["product", "index"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "index"], name="stock_shard_product_index_unique"),
+            models.CheckConstraint(check=models.Q(quantity__gte=0), name="stock_shard_quantity_non_negative"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product} [shard {self.index}] ({self.quantity})"
+
+
+class StockEventOutbox(models.Model):
+    """
+    Evento de stock pendiente de publicar a sistemas externos (ERP, e-commerce).
+
+    Se escribe en la misma transacción que el StockMovement y lo publica el
+    comando relay_stock_events, en orden de id.
+    """
+
+    MOVEMENT_REGISTERED = "stock.movement_registered"
+
+    event_type = models.CharField(max_length=50, default=MOVEMENT_REGISTERED)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_events",
+    )
+    movement = models.ForeignKey(
+        StockMovement,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="outbox_events",
+    )
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # Solo los pendientes: el relay los recorre por id sin pasar por el historial publicado.
+            models.Index(fields=["id"], condition=models.Q(published_at__isnull=True), name="stock_outbox_pending_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event_type} #{self.pk} ({self.product_id})"
+
+
+class CycleCountSession(models.Model):
+    """Conteo físico conciliado de una vez; sus ajustes llevan el motivo "Conteo cíclico #<id>"."""
+
+    label = models.CharField(max_length=100, blank=True, default="")
+    performed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="cycle_counts",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    skus_counted = models.PositiveIntegerField(default=0)
+    skus_adjusted = models.PositiveIntegerField(default=0)
+    units_variance = models.IntegerField(default=0)
+    value_variance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"Conteo cíclico #{self.pk} {self.label}".strip()
+
+
+class StockSnapshot(models.Model):
+    """Stock de un producto en un instante; base de las consultas de stock a una fecha."""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_snapshots",
+    )
+    taken_at = models.DateTimeField()
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["-taken_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "taken_at"], name="stock_snapshot_product_taken_at_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product} @ {self.taken_at:%Y-%m-%d %H:%M} ({self.quantity})"
+
+
+class DailyMovementRollup(models.Model):
+    """
+    Totales diarios por producto y tipo; los mantiene InventoryService en la misma transacción.
+
+    Los productos particionados reparten sus totales entre stock_shards filas
+    (shard) para no volver a serializar sus escrituras en una sola fila; las
+    consultas suman todas.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="daily_movement_rollups",
+    )
+    day = models.DateField()
+    movement_type = models.CharField(max_length=20, choices=StockMovement.MOVEMENT_TYPE_CHOICES)
+    quantity_total = models.PositiveBigIntegerField(default=0)
+    movement_count = models.PositiveIntegerField(default=0)
+    shard = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-day", "product"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "day", "movement_type", "shard"], name="daily_rollup_product_day_type_shard_unique"
+            ),
+        ]
+        indexes = [models.Index(fields=["day"], name="daily_rollup_day_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.product} {self.day} {self.movement_type} ({self.movement_count})"
+
+
+class ArchivedMovementFile(models.Model):
+    """Fichero JSONL comprimido con los movimientos archivados de un mes (ver archive_movements)."""
+
+    month = models.DateField(help_text="Primer día del mes archivado.")
+    path = models.CharField(max_length=500, help_text="Ruta relativa a INVENTORY_ARCHIVE_DIR.")
+    rows = models.PositiveIntegerField()
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["month", "id"]
+        indexes = [models.Index(fields=["month"], name="archived_movement_month_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.month:%Y-%m} ({self.rows} movimientos)"
@@ -1,24 +1,58 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Collection, Optional, Tuple
+
+from .dispatch import SyncDispatcher
 
 
 class StockObserver(ABC):
+    # Tipos de movimiento que interesan al observador (None = todos). El
+    # sujeto no llama a update() para los demás.
+    movement_types: Optional[Collection[str]] = None
+
     @abstractmethod
     def update(self, *, product, movement) -> None:
         ...
 
 
 class StockSubject:
-    def __init__(self) -> None:
-        self._observers: List[StockObserver] = []
+    """
+    Sujeto observable compartible entre hilos: attach/detach sustituyen la
+    tupla de observadores bajo un lock y notify trabaja sobre la tupla
+    vigente sin bloquear.
+    """
+
+    def __init__(self, dispatcher=None) -> None:
+        self._observers: Tuple[StockObserver, ...] = ()
+        self._lock = threading.Lock()
+        # Por defecto se notifica en el acto; ver observers.dispatch.
+        self._dispatcher = dispatcher or SyncDispatcher()
+
+    @property
+    def observers(self) -> Tuple[StockObserver, ...]:
+        return self._observers
 
     def attach(self, observer: StockObserver) -> None:
-        self._observers.append(observer)
+        with self._lock:
+            self._observers = self._observers + (observer,)
 
     def detach(self, observer: StockObserver) -> None:
-        self._observers.remove(observer)
-
-    def notify(self, *, product, movement) -> None:
-        for observer in self._observers:
-            observer.update(product=product, movement=movement)
-
+        with self._lock:
+            observers = list(self._observers)
+            observers.remove(observer)
+            self._observers = tuple(observers)
+
+    def notify(self, *, product, movement, movement_types: Optional[Collection[str]] = None) -> None:
+        """
+        movement_types: tipos de todos los movimientos del producto que resume
+        esta notificación (un lote); por defecto, solo el de movement.
+        """
+        if movement_types is None:
+            movement_types = (getattr(movement, "movement_type", None),)
+        observers = [
+            observer
+            for observer in self._observers
+            if observer.movement_types is None or not set(movement_types).isdisjoint(observer.movement_types)
+        ]
+        if observers:
+            self._dispatcher.dispatch(observers, product=product, movement=movement)
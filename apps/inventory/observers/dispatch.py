@@ -0,0 +1,201 @@
+"""
+Estrategias de entrega de notificaciones de StockSubject a sus observadores.
+
+- SyncDispatcher: llama a los observadores en el acto, dentro de la
+  transacción del movimiento (comportamiento original; útil en tests).
+- OnCommitDispatcher: encola la notificación con transaction.on_commit y la
+  entrega desde un pool acotado de hilos, fuera de la petición. Las
+  notificaciones pendientes de un mismo producto se agrupan (solo se entrega
+  el último estado) y, si la cola está llena, el hilo que encola espera y,
+  agotado el plazo, entrega él mismo la notificación (contrapresión).
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_SETTINGS = {
+    "INVENTORY_OBSERVER_DISPATCH",
+    "INVENTORY_OBSERVER_WORKERS",
+    "INVENTORY_OBSERVER_MAX_PENDING",
+}
+
+
+def _deliver(observers, product, movement) -> None:
+    for observer in observers:
+        observer.update(product=product, movement=movement)
+
+
+class SyncDispatcher:
+    def dispatch(self, observers, *, product, movement) -> None:
+        _deliver(observers, product, movement)
+
+
+class DispatchMetrics:
+    """Contadores del despachador; snapshot() devuelve una copia coherente."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.enqueued = 0
+        self.coalesced = 0
+        self.delivered = 0
+        self.delivered_inline = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record_delivery(self, latency: float, *, inline: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            self.delivered += 1
+            self.delivered_inline += int(inline)
+            self.failed += int(failed)
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "delivered": self.delivered,
+                "delivered_inline": self.delivered_inline,
+                "failed": self.failed,
+                "latency_avg_ms": round(1000 * self.latency_total / self.delivered, 3) if self.delivered else 0.0,
+                "latency_max_ms": round(1000 * self.latency_max, 3),
+            }
+
+
+class OnCommitDispatcher:
+    def __init__(self, *, workers: int = 2, max_pending: int = 1000, enqueue_timeout: float = 1.0) -> None:
+        self._workers = workers
+        self._max_pending = max_pending
+        self._enqueue_timeout = enqueue_timeout
+        # clave -> [observers, product, movement, encolado_en]; el orden de
+        # inserción es el orden de entrega.
+        self._pending: "OrderedDict[tuple, list]" = OrderedDict()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+        self.metrics = DispatchMetrics()
+
+    def dispatch(self, observers, *, product, movement) -> None:
+        observers = tuple(observers)
+        if observers:
+            transaction.on_commit(lambda: self._enqueue(observers, product, movement))
+
+    def _enqueue(self, observers, product, movement) -> None:
+        key = (getattr(product, "pk", id(product)), tuple(id(o) for o in observers))
+        with self._cond:
+            self._start_workers()
+            if key in self._pending:
+                entry = self._pending[key]
+                entry[1], entry[2] = product, movement
+                self.metrics.coalesced += 1
+                return
+            deadline = time.monotonic() + self._enqueue_timeout
+            while len(self._pending) >= self._max_pending and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if len(self._pending) < self._max_pending and not self._closed:
+                self._pending[key] = [observers, product, movement, time.monotonic()]
+                self.metrics.enqueued += 1
+                self._update_depth()
+                self._cond.notify()
+                return
+        # Cola llena (o cerrada): la entrega la hace quien encola.
+        self._run(observers, product, movement, time.monotonic(), inline=True)
+
+    def _start_workers(self) -> None:
+        if self._threads or self._closed:
+            return
+        for n in range(self._workers):
+            thread = threading.Thread(target=self._worker, name=f"stock-observers-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                _, (observers, product, movement, enqueued_at) = self._pending.popitem(last=False)
+                self._in_flight += 1
+                self._update_depth()
+                self._cond.notify_all()
+            try:
+                self._run(observers, product, movement, enqueued_at)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _run(self, observers, product, movement, enqueued_at, *, inline=False) -> None:
+        failed = False
+        try:
+            _deliver(observers, product, movement)
+        except Exception:
+            failed = True
+            logger.exception("Error entregando notificación de stock (producto=%s)", getattr(product, "pk", None))
+        self.metrics.record_delivery(time.monotonic() - enqueued_at, inline=inline, failed=failed)
+
+    def _update_depth(self) -> None:
+        self.metrics.queue_depth = len(self._pending)
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.metrics.queue_depth)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Espera a que se entreguen las notificaciones pendientes."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Entrega lo pendiente y detiene los hilos."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+@lru_cache(maxsize=None)
+def get_dispatcher():
+    """Despachador compartido según INVENTORY_OBSERVER_DISPATCH ("sync" u "on_commit")."""
+    mode = getattr(settings, "INVENTORY_OBSERVER_DISPATCH", "sync")
+    if mode == "sync":
+        return SyncDispatcher()
+    if mode != "on_commit":
+        raise ValueError(f"INVENTORY_OBSERVER_DISPATCH no válido: {mode}")
+    dispatcher = OnCommitDispatcher(
+        workers=getattr(settings, "INVENTORY_OBSERVER_WORKERS", 2),
+        max_pending=getattr(settings, "INVENTORY_OBSERVER_MAX_PENDING", 1000),
+    )
+    atexit.register(dispatcher.close)
+    return dispatcher
+
+
+@receiver(setting_changed)
+def _reset_dispatcher(*, setting, **kwargs) -> None:
+    """Descarta el despachador en caché si cambia su configuración (override_settings)."""
+    if setting not in DISPATCH_SETTINGS or not get_dispatcher.cache_info().currsize:
+        return
+    previous = get_dispatcher()
+    get_dispatcher.cache_clear()
+    if hasattr(previous, "close"):
+        previous.close()
@@ -0,0 +1,57 @@
+"""
+Registro de observadores de stock definido en settings.
+
+INVENTORY_STOCK_OBSERVERS es una lista de rutas a clases StockObserver. Se
+resuelve una sola vez (InventoryConfig.ready) en un StockSubject compartido
+que reutilizan todas las instancias de InventoryService.
+"""
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .base import StockSubject
+from .dispatch import DISPATCH_SETTINGS, get_dispatcher
+
+DEFAULT_STOCK_OBSERVERS = [
+    "apps.inventory.observers.stock_alert_observer.LowStockAlertObserver",
+]
+
+_subject = None
+_lock = threading.Lock()
+
+
+def build_stock_subject() -> StockSubject:
+    subject = StockSubject(get_dispatcher())
+    for path in getattr(settings, "INVENTORY_STOCK_OBSERVERS", DEFAULT_STOCK_OBSERVERS):
+        subject.attach(import_string(path)())
+    return subject
+
+
+def configure() -> StockSubject:
+    """(Re)construye el sujeto compartido a partir de settings."""
+    global _subject
+    subject = build_stock_subject()
+    with _lock:
+        _subject = subject
+    return subject
+
+
+def get_stock_subject() -> StockSubject:
+    global _subject
+    if _subject is None:
+        with _lock:
+            if _subject is None:
+                _subject = build_stock_subject()
+    return _subject
+
+
+@receiver(setting_changed)
+def _reset_subject(*, setting, **kwargs) -> None:
+    """El sujeto compartido se reconstruye con los nuevos observadores o despachador."""
+    global _subject
+    if setting == "INVENTORY_STOCK_OBSERVERS" or setting in DISPATCH_SETTINGS:
+        with _lock:
+            _subject = None
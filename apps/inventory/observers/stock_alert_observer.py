@@ -1,17 +1,13 @@
-import logging
+from apps.inventory.alerts.engine import LowStockAlertEngine
 
 from .base import StockObserver
 
-logger = logging.getLogger(__name__)
-
 
 class LowStockAlertObserver(StockObserver):
-    def update(self, *, product, movement) -> None:
-        if product.stock_quantity <= product.minimum_stock:
-            logger.warning(
-                "ALERTA DE STOCK BAJO | SKU=%s | stock=%s | mínimo=%s",
-                product.sku,
-                product.stock_quantity,
-                product.minimum_stock,
-            )
+    """Alimenta el motor de alertas (cruce de umbral + resúmenes por ventana)."""
 
+    def __init__(self, engine: LowStockAlertEngine = None) -> None:
+        self.engine = engine or LowStockAlertEngine.from_settings()
+
+    def update(self, *, product, movement) -> None:
+        self.engine.observe(product, movement)
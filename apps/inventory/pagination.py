@@ -0,0 +1,203 @@
+"""
+Paginación por cursor (keyset) de movimientos, del más reciente al más antiguo.
+
+En lugar de ?page=N (OFFSET, que recorre y descarta todas las filas
+anteriores, más un COUNT(*) por página) las páginas se piden con
+?after=<cursor> (más antiguos que el cursor) o ?before=<cursor> (más
+recientes). El cursor codifica (created_at, id) de la última o primera fila
+mostrada y la consulta baja directamente por el índice (created_at, id): una
+página profunda cuesta lo mismo que la primera.
+
+Sin total por defecto. Con ?total=approx se muestra una estimación: en
+PostgreSQL las filas que estima el planificador; en otras bases un COUNT
+exacto cacheado durante COUNT_CACHE_SECONDS.
+
+Las fuentes se recorren en orden (p. ej. el queryset vivo y después los
+movimientos archivados, más antiguos); pueden ser querysets, listas u objetos
+con older(cursor, size) / newer(cursor, size) que leen solo lo necesario.
+"""
+import base64
+import hashlib
+import heapq
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.db.models.query import QuerySet
+
+COUNT_CACHE_SECONDS = 300
+
+
+def encode_cursor(item) -> str:
+    raw = f"{item.created_at.isoformat()}|{item.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str):
+    """(created_at, id) del cursor, o None si no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        created_at, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _key(item):
+    return item.created_at, item.pk
+
+
+def older_than(queryset, cursor):
+    """Movimientos anteriores al cursor, del más reciente al más antiguo."""
+    if cursor is not None:
+        created_at, pk = cursor
+        queryset = queryset.filter(created_at__lte=created_at).exclude(Q(created_at=created_at) & Q(pk__gte=pk))
+    return queryset.order_by("-created_at", "-pk")
+
+
+def newer_than(queryset, cursor):
+    """Movimientos posteriores al cursor, del más antiguo al más reciente."""
+    created_at, pk = cursor
+    queryset = queryset.filter(created_at__gte=created_at).exclude(Q(created_at=created_at) & Q(pk__lte=pk))
+    return queryset.order_by("created_at", "pk")
+
+
+def _older(source, cursor, size):
+    if isinstance(source, QuerySet):
+        return list(older_than(source, cursor)[:size])
+    if hasattr(source, "older"):
+        return source.older(cursor, size)
+    return [m for m in sorted(source, key=_key, reverse=True) if cursor is None or _key(m) < cursor][:size]
+
+
+def _newer(source, cursor, size):
+    if isinstance(source, QuerySet):
+        return list(newer_than(source, cursor)[:size])
+    if hasattr(source, "newer"):
+        return source.newer(cursor, size)
+    return [m for m in sorted(source, key=_key) if _key(m) > cursor][:size]
+
+
+class MergedSource:
+    """
+    Varias fuentes cuyos rangos de (created_at, id) se solapan, intercaladas por
+    clave: cada página pide size filas a cada una y mezcla.
+    """
+
+    def __init__(self, *sources) -> None:
+        self.sources = sources
+
+    def older(self, cursor, size):
+        return list(heapq.merge(*(_older(s, cursor, size) for s in self.sources), key=_key, reverse=True))[:size]
+
+    def newer(self, cursor, size):
+        return list(heapq.merge(*(_newer(s, cursor, size) for s in self.sources), key=_key))[:size]
+
+    def approximate_count(self) -> int:
+        return sum(_source_count(s) for s in self.sources)
+
+
+def approximate_count(queryset) -> int:
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = "movement_count:" + hashlib.sha256(f"{sql}|{params}".encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_SECONDS)
+    return count
+
+
+def _source_count(source) -> int:
+    if isinstance(source, QuerySet):
+        return approximate_count(source)
+    if hasattr(source, "approximate_count"):
+        return source.approximate_count()
+    return len(source)
+
+
+class KeysetPage:
+    def __init__(self, items, has_next, has_previous, params, total=None, cursor=()) -> None:
+        self.object_list = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.total = total
+        self._params = params
+        self._cursor = list(cursor)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+    def _query(self, **cursor) -> str:
+        return urlencode(self._params + list(cursor.items()))
+
+    @property
+    def next_query(self) -> str:
+        return self._query(after=encode_cursor(self.object_list[-1])) if self.has_next else ""
+
+    @property
+    def previous_query(self) -> str:
+        return self._query(before=encode_cursor(self.object_list[0])) if self.has_previous else ""
+
+    @property
+    def approximate_total_query(self) -> str:
+        """Enlace a esta misma página con ?total=approx."""
+        params = [(key, value) for key, value in self._params if key != "total"]
+        return urlencode(params + self._cursor + [("total", "approx")])
+
+
+def keyset_page(sources: Sequence, params, size: int, extra_params=()) -> KeysetPage:
+    """
+    Página de size movimientos de sources según ?after / ?before / ?total de params.
+    extra_params: pares (clave, valor) que se conservan en los enlaces (filtros).
+    """
+    after = decode_cursor(params.get("after") or "")
+    before = None if after else decode_cursor(params.get("before") or "")
+    approx = params.get("total") == "approx"
+    kept = list(extra_params) + ([("total", "approx")] if approx else [])
+
+    items: List = []
+    if before is not None:
+        # Hacia atrás: de la fuente más antigua a la más reciente, en orden ascendente.
+        for source in reversed(sources):
+            items += _newer(source, before, size + 1 - len(items))
+            if len(items) > size:
+                break
+        has_previous = len(items) > size
+        if has_previous:
+            items, has_next = list(reversed(items[:size])), True
+        else:
+            # Se llegó al principio: se muestra la primera página completa.
+            before, items = None, []
+    if before is None:
+        for source in sources:
+            items += _older(source, after, size + 1 - len(items))
+            if len(items) > size:
+                break
+        has_next = len(items) > size
+        items = items[:size]
+        has_previous = bool(after and items and any(_newer(source, _key(items[0]), 1) for source in sources))
+
+    total: Optional[int] = None
+    if approx:
+        total = sum(_source_count(s) for s in sources)
+    cursor = [("after", params["after"])] if after else [("before", params["before"])] if before else []
+    return KeysetPage(items, has_next, has_previous, kept, total, cursor)
@@ -0,0 +1,170 @@
+"""
+Conciliación de conteos físicos (conteo cíclico).
+
+Entrada: filas con sku y counted_quantity (CSV o JSONL). Un SKU que aparece
+en varias filas (p. ej. varias ubicaciones) suma sus cantidades. En una sola
+transacción se bloquean los productos contados, se compara lo contado con el
+stock del sistema y solo para los SKUs con diferencia se registra un
+ADJUSTMENT, todos con una llamada a InventoryService.register_movements. Si
+algo falla no se aplica ningún ajuste.
+"""
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+
+from apps.inventory.models import CycleCountSession, StockMovement
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Product
+
+LOOKUP_CHUNK = 2000
+MAX_REPORTED_ERRORS = 50
+
+
+class VarianceLine:
+    __slots__ = ("product_id", "sku", "name", "system_quantity", "counted_quantity", "unit_price")
+
+    def __init__(self, product_id, sku, name, system_quantity, counted_quantity, unit_price) -> None:
+        self.product_id = product_id
+        self.sku = sku
+        self.name = name
+        self.system_quantity = system_quantity
+        self.counted_quantity = counted_quantity
+        self.unit_price = unit_price
+
+    @property
+    def variance(self) -> int:
+        return self.counted_quantity - self.system_quantity
+
+    @property
+    def value_variance(self) -> Decimal:
+        return self.variance * self.unit_price
+
+    def as_row(self) -> dict:
+        return {
+            "sku": self.sku,
+            "name": self.name,
+            "system_quantity": self.system_quantity,
+            "counted_quantity": self.counted_quantity,
+            "variance": self.variance,
+            "value_variance": f"{self.value_variance:.2f}",
+        }
+
+
+class CycleCountReport:
+    def __init__(self) -> None:
+        self.session = None
+        self.rows = 0
+        self.invalid = 0
+        self.lines: List[VarianceLine] = []
+        self.elapsed = 0.0
+        self.errors: List[Tuple[int, str]] = []
+
+    @property
+    def variances(self) -> List[VarianceLine]:
+        return [line for line in self.lines if line.variance]
+
+    @property
+    def units_variance(self) -> int:
+        return sum(line.variance for line in self.lines)
+
+    @property
+    def value_variance(self) -> Decimal:
+        return sum((line.value_variance for line in self.lines), Decimal("0.00"))
+
+    def add_error(self, row_number: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+
+class CycleCountReconciler:
+    def __init__(self, service: InventoryService, *, sharded_counter: ShardedStockCounter = None) -> None:
+        self._service = service
+        self._sharded_counter = sharded_counter or ShardedStockCounter()
+
+    def run(self, rows: Iterable[dict], *, user=None, label: str = "", dry_run: bool = False) -> CycleCountReport:
+        report = CycleCountReport()
+        start = time.perf_counter()
+        counts = self._read_counts(rows, report)
+        with transaction.atomic():
+            report.lines = self._diff(counts, report)
+            if not dry_run:
+                report.session = self._apply(report, user=user, label=label)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _read_counts(self, rows: Iterable[dict], report: CycleCountReport) -> Dict[str, Tuple[int, int]]:
+        """sku -> (primera fila, cantidad contada acumulada)."""
+        counts: Dict[str, Tuple[int, int]] = {}
+        for row_number, row in enumerate(rows, start=1):
+            report.rows += 1
+            if "__error__" in row:
+                report.add_error(row_number, row["__error__"])
+                continue
+            sku = str(row.get("sku") or "").strip()
+            try:
+                quantity = int(row.get("counted_quantity"))
+            except (TypeError, ValueError):
+                report.add_error(row_number, f"Cantidad contada no válida: {row.get('counted_quantity')!r}")
+                continue
+            if not sku or quantity < 0:
+                report.add_error(row_number, f"Fila no válida: sku={sku!r} cantidad={quantity}")
+                continue
+            first_row, total = counts.get(sku, (row_number, 0))
+            counts[sku] = (first_row, total + quantity)
+        return counts
+
+    def _diff(self, counts: Dict[str, Tuple[int, int]], report: CycleCountReport) -> List[VarianceLine]:
+        skus = list(counts)
+        products = {}
+        for i in range(0, len(skus), LOOKUP_CHUNK):
+            # Bloqueo de las filas contadas: el informe refleja exactamente el
+            # stock que sustituyen los ajustes.
+            for row in (
+                Product.objects.select_for_update()
+                .filter(sku__in=skus[i : i + LOOKUP_CHUNK], is_active=True)
+                .values("pk", "sku", "name", "stock_quantity", "stock_shards", "unit_price")
+            ):
+                products[row["sku"]] = row
+        sharded = [p["pk"] for p in products.values() if p["stock_shards"]]
+        live = self._sharded_counter.totals(sharded) if sharded else {}
+
+        lines = []
+        for sku, (row_number, counted) in counts.items():
+            product = products.get(sku)
+            if product is None:
+                report.add_error(row_number, f"SKU desconocido o inactivo: {sku!r}")
+                continue
+            system = live.get(product["pk"], product["stock_quantity"])
+            lines.append(
+                VarianceLine(product["pk"], sku, product["name"], system, counted, product["unit_price"])
+            )
+        return lines
+
+    def _apply(self, report: CycleCountReport, *, user, label: str) -> CycleCountSession:
+        variances = report.variances
+        session = CycleCountSession.objects.create(
+            label=label[:100],
+            performed_by=user,
+            skus_counted=len(report.lines),
+            skus_adjusted=len(variances),
+            units_variance=report.units_variance,
+            value_variance=report.value_variance,
+        )
+        reason = f"Conteo cíclico #{session.pk} (sistema {{system}}, contado {{counted}})"
+        self._service.register_movements(
+            [
+                {
+                    "product_id": line.product_id,
+                    "movement_type": StockMovement.ADJUSTMENT,
+                    "quantity": line.counted_quantity,
+                    "reason": reason.format(system=line.system_quantity, counted=line.counted_quantity),
+                }
+                for line in variances
+            ],
+            user=user,
+        )
+        return session
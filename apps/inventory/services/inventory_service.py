@@ -1,20 +1,98 @@
-from django.db import transaction
+import hashlib
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
 from apps.products.repositories.base import AbstractProductRepository
-from apps.inventory.models import StockMovement
+from apps.inventory.models import StockEventOutbox, StockMovement
 from apps.inventory.observers.base import StockSubject
+from apps.inventory.observers.registry import get_stock_subject
+from apps.inventory.services import movement_rollups
+from apps.inventory.services.sharded_counter import ShardedStockCounter
 
 
 class InsufficientStockError(Exception):
     """Se lanza cuando se intenta registrar una salida mayor al stock disponible."""
 
 
+def normalize_idempotency_key(key) -> Optional[str]:
+    """
+    Clave de idempotencia tal como se guarda: las de más de 64 caracteres se
+    sustituyen por su sha256 (truncarlas haría colisionar claves distintas).
+    """
+    key = str(key or "").strip()
+    if len(key) > 64:
+        key = hashlib.sha256(key.encode()).hexdigest()
+    return key or None
+
+
+class StockPlan:
+    """
+    Efecto neto de una secuencia de movimientos sobre el stock de un producto.
+
+    El resultado es stock_final = (absolute o stock_actual) + delta, válido
+    solo si stock_actual >= required (ninguna salida previa al último ajuste
+    deja el stock en negativo).
+    """
+
+    def __init__(self) -> None:
+        self.delta = 0
+        self.absolute: Optional[int] = None
+        self.required = 0
+
+    def add(self, movement_type: str, quantity: int) -> bool:
+        """Acumula un movimiento; devuelve False si la salida deja el stock en negativo."""
+        if movement_type == StockMovement.ENTRY:
+            self.delta += quantity
+        elif movement_type == StockMovement.EXIT:
+            self.delta -= quantity
+            if self.absolute is None:
+                self.required = max(self.required, -self.delta)
+            elif self.absolute + self.delta < 0:
+                return False
+        elif movement_type == StockMovement.ADJUSTMENT:
+            self.absolute = quantity
+            self.delta = 0
+        else:
+            raise ValueError(f"Tipo de movimiento no válido: {movement_type}")
+        return True
+
+
+def advance_balance(running: Dict[int, Optional[int]], line: Mapping):
+    """
+    Devuelve (signed_delta, balance_after) de la línea y avanza running, el
+    saldo por producto. running[id] = None significa saldo desconocido hasta
+    el siguiente ajuste; un producto ausente de running no lleva saldo.
+    """
+    product_id, movement_type, quantity = line["product_id"], line["movement_type"], line["quantity"]
+    before = running.get(product_id)
+    if movement_type == StockMovement.ADJUSTMENT:
+        signed_delta = None if before is None else quantity - before
+        if product_id not in running:
+            return signed_delta, None
+        running[product_id] = quantity
+        return signed_delta, quantity
+    signed_delta = quantity if movement_type == StockMovement.ENTRY else -quantity
+    if before is None:
+        return signed_delta, None
+    running[product_id] = before + signed_delta
+    return signed_delta, running[product_id]
+
+
 class InventoryService:
-    def __init__(self, product_repository: AbstractProductRepository, subject: StockSubject):
+    def __init__(
+        self,
+        product_repository: AbstractProductRepository,
+        subject: Optional[StockSubject] = None,
+        sharded_counter: Optional[ShardedStockCounter] = None,
+    ):
         self._product_repo = product_repository
-        self._subject = subject
+        # Sin sujeto explícito se usa el registro compartido (INVENTORY_STOCK_OBSERVERS).
+        self._subject = subject if subject is not None else get_stock_subject()
+        self._sharded_counter = sharded_counter or ShardedStockCounter()
 
-    @transaction.atomic
     def register_movement(
         self,
         *,
@@ -23,30 +101,190 @@ class InventoryService:
         quantity: int,
         reason: str,
         user,
+        idempotency_key: Optional[str] = None,
     ) -> StockMovement:
+        return self.register_movements(
+            [
+                {
+                    "product_id": product_id,
+                    "movement_type": movement_type,
+                    "quantity": quantity,
+                    "reason": reason,
+                    "idempotency_key": idempotency_key,
+                }
+            ],
+            user=user,
+        )[0]
+
+    def find_by_idempotency_key(self, idempotency_key: str) -> Optional[StockMovement]:
+        if not idempotency_key:
+            return None
+        return StockMovement.objects.select_related("product").filter(idempotency_key=idempotency_key).first()
+
+    def current_stock(self, product_id: int) -> int:
+        """Stock vivo del producto (suma de particiones si está particionado)."""
         product = self._product_repo.get_by_id(product_id)
+        if getattr(product, "stock_shards", 0):
+            return self._sharded_counter.totals([product_id]).get(product_id, 0)
+        return product.stock_quantity
 
-        if movement_type == StockMovement.EXIT and quantity > product.stock_quantity:
-            raise InsufficientStockError("La salida excede el stock disponible.")
+    def register_movements(self, batch: Iterable[Mapping], *, user=None) -> List[StockMovement]:
+        """
+        Registra un lote de movimientos en una sola transacción.
 
-        if movement_type == StockMovement.ENTRY:
-            product.stock_quantity += quantity
-        elif movement_type == StockMovement.EXIT:
-            product.stock_quantity -= quantity
-        elif movement_type == StockMovement.ADJUSTMENT:
-            product.stock_quantity = quantity
+        Cada línea es un dict con product_id, movement_type, quantity y,
+        opcionalmente, reason, user, idempotency_key y created_at (para
+        movimientos históricos). Las líneas cuya clave
+        ya existe no se vuelven a aplicar: se devuelve el movimiento original
+        en su posición.
+        """
+        lines = list(batch)
+        try:
+            return self._register_movements(lines, user)
+        except IntegrityError:
+            # Otro reintento con la misma clave se confirmó entre la búsqueda y
+            # el INSERT; la segunda pasada lo encuentra y no reaplica nada.
+            if not any(line.get("idempotency_key") for line in lines):
+                raise
+            return self._register_movements(lines, user)
+
+    @transaction.atomic
+    def _register_movements(self, lines: List[Mapping], user) -> List[StockMovement]:
+        keys = [line["idempotency_key"] for line in lines if line.get("idempotency_key")]
+        if not keys:
+            return self._apply_lines(lines, user)
+
+        # Las líneas con clave ya registrada (o repetida dentro del lote) no se
+        # aplican; el resultado conserva el orden del lote.
+        known = StockMovement.objects.in_bulk(keys, field_name="idempotency_key")
+        pending, seen = [], set(known)
+        for line in lines:
+            key = line.get("idempotency_key")
+            if key and key in seen:
+                continue
+            if key:
+                seen.add(key)
+            pending.append(line)
+        applied = iter(self._apply_lines(pending, user))
+
+        result = []
+        for line in lines:
+            key = line.get("idempotency_key")
+            if key in known:
+                result.append(known[key])
+                continue
+            movement = next(applied)
+            if key:
+                known[key] = movement
+            result.append(movement)
+        return result
+
+    def _apply_lines(self, lines: List[Mapping], user) -> List[StockMovement]:
+        """
+        Las líneas se agregan en un StockPlan por producto y cada plan se
+        aplica con un único UPDATE condicional (stock = stock ± n WHERE
+        stock >= n), sin leer-modificar-escribir en Python. Si alguna salida
+        excede el stock no se aplica ninguna línea. Los movimientos se
+        insertan con bulk_create y los observadores se notifican una vez por
+        producto.
+        """
+        if not lines:
+            return []
+
+        plans: Dict[int, StockPlan] = {}
+        for line in lines:
+            plan = plans.setdefault(line["product_id"], StockPlan())
+            if not plan.add(line["movement_type"], line["quantity"]):
+                raise InsufficientStockError("La salida excede el stock disponible.")
+
+        # Orden fijo por id para que lotes concurrentes bloqueen filas en el mismo orden.
+        sharded_ids = []
+        before_adjustment: Dict[int, int] = {}
+        for product_id in sorted(plans):
+            plan = plans[product_id]
+            if plan.absolute is not None:
+                # Con un ajuste, el stock previo no se deduce del final: se lee antes.
+                before_adjustment[product_id] = self._product_repo.get_stock_for_update(product_id)
+            change = {"delta": plan.delta, "absolute": plan.absolute, "required": plan.required}
+            if self._product_repo.apply_stock_change(product_id, **change):
+                continue
+            # Lanza Product.DoesNotExist si el producto no existe o está inactivo.
+            product = self._product_repo.get_by_id(product_id)
+            if getattr(product, "stock_shards", 0):
+                sharded_ids.append(product_id)
+                if self._sharded_counter.apply(product, **change):
+                    continue
+                product.stock_quantity = self._sharded_counter.totals([product_id]).get(product_id, 0)
+            raise InsufficientStockError(
+                f"La salida excede el stock disponible. Stock actual: {product.stock_quantity}."
+            )
+
+        products = self._product_repo.get_by_ids(plans)
+        if sharded_ids:
+            # Los observadores ven el stock vivo, no el último total consolidado.
+            for product_id, total in self._sharded_counter.totals(sharded_ids).items():
+                products[product_id].stock_quantity = total
 
-        self._product_repo.save(product)
+        # Stock de partida de cada producto para calcular balance_after línea a
+        # línea. En productos particionados el orden entre particiones no está
+        # definido, así que su saldo queda sin registrar.
+        running = {
+            product_id: before_adjustment.get(product_id, products[product_id].stock_quantity - plan.delta)
+            for product_id, plan in plans.items()
+            if product_id not in sharded_ids
+        }
+        now = timezone.now()
+        movements = []
+        for line in lines:
+            signed_delta, balance_after = advance_balance(running, line)
+            movements.append(
+                StockMovement(
+                    product=products[line["product_id"]],
+                    movement_type=line["movement_type"],
+                    quantity=line["quantity"],
+                    reason=line.get("reason") or "",
+                    performed_by=line.get("user", user),
+                    idempotency_key=line.get("idempotency_key") or None,
+                    created_at=line.get("created_at") or now,
+                    signed_delta=signed_delta,
+                    balance_after=balance_after,
+                )
+            )
+        movements = StockMovement.objects.bulk_create(movements)
+        movement_rollups.record(movements)
 
-        movement = StockMovement.objects.create(
-            product=product,
-            movement_type=movement_type,
-            quantity=quantity,
-            reason=reason,
-            performed_by=user,
-        )
+        if getattr(settings, "INVENTORY_OUTBOX_ENABLED", False):
+            StockEventOutbox.objects.bulk_create(
+                [
+                    StockEventOutbox(
+                        product_id=m.product_id,
+                        movement=m,
+                        payload=self._event_payload(m),
+                    )
+                    for m in movements
+                ]
+            )
 
-        self._subject.notify(product=product, movement=movement)
+        last_movement, batch_types = {}, {}
+        for m in movements:
+            last_movement[m.product_id] = m
+            batch_types.setdefault(m.product_id, set()).add(m.movement_type)
+        for product_id, movement in last_movement.items():
+            self._subject.notify(
+                product=products[product_id], movement=movement, movement_types=batch_types[product_id]
+            )
 
-        return movement
+        return movements
 
+    @staticmethod
+    def _event_payload(movement: StockMovement) -> dict:
+        return {
+            "movement_id": movement.pk,
+            "product_id": movement.product_id,
+            "sku": movement.product.sku,
+            "movement_type": movement.movement_type,
+            "quantity": movement.quantity,
+            "balance_after": movement.balance_after,
+            "reason": movement.reason,
+            "created_at": movement.created_at.isoformat(),
+        }
@@ -0,0 +1,303 @@
+"""
+Archivo en frío de StockMovement por meses.
+
+archive_before(horizon) toma cada mes completo anterior a horizon, escribe sus
+movimientos en INVENTORY_ARCHIVE_DIR/AAAA/movements-AAAA-MM[-partN].jsonl.gz
+(una línea JSON por movimiento, en orden de id), registra el fichero en
+ArchivedMovementFile y borra las filas de la tabla. El borrado va en la misma
+transacción que el registro y se deshace si no coincide con lo escrito, así
+que un movimiento nunca queda fuera de ambos sitios.
+
+Los agregados diarios (DailyMovementRollup) no se tocan: los totales siguen
+incluyendo lo archivado. read_archived() recupera movimientos archivados de un
+rango de fechas para los informes, mes a mes y sin leer más de lo necesario.
+"""
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.utils import timezone
+
+from apps.inventory.models import ArchivedMovementFile, StockMovement
+from apps.products.models import Product
+
+DELETE_BATCH = 5000
+
+
+class ArchiveError(Exception):
+    """Lo borrado no coincide con lo escrito en el fichero; el mes no se archiva."""
+
+
+def archive_dir() -> Path:
+    return Path(getattr(settings, "INVENTORY_ARCHIVE_DIR"))
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _aware(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def pending_months(horizon: date) -> List[date]:
+    """Meses completos anteriores a horizon con movimientos en la tabla."""
+    limit = _month_start(horizon)
+    first = StockMovement.objects.filter(created_at__lt=_aware(limit)).aggregate(first=Min("created_at"))["first"]
+    months = []
+    month = _month_start(timezone.localdate(first)) if first else limit
+    while month < limit:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def archive_before(horizon: date, *, dry_run: bool = False) -> List[ArchivedMovementFile]:
+    files = []
+    for month in pending_months(horizon):
+        movements = StockMovement.objects.filter(
+            created_at__gte=_aware(month), created_at__lt=_aware(_next_month(month))
+        )
+        if dry_run:
+            count = movements.count()
+            if count:
+                files.append(ArchivedMovementFile(month=month, rows=count, path="", first_id=0, last_id=0, sha256=""))
+            continue
+        archived = _archive_month(month, movements)
+        if archived is not None:
+            files.append(archived)
+    return files
+
+
+def _archive_month(month: date, movements) -> Optional[ArchivedMovementFile]:
+    bounds = movements.aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        return None
+    # Solo las filas existentes al empezar: lo que llegue después irá a otra parte.
+    movements = movements.filter(id__lte=bounds["last"])
+    relative = _next_path(month)
+    target = archive_dir() / relative
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+
+    rows = 0
+    with open(tmp, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as gz, io.TextIOWrapper(gz, encoding="utf-8") as out:
+            for row in (
+                movements.order_by("id")
+                .values(
+                    "id", "product_id", "product__sku", "movement_type", "quantity", "reason",
+                    "performed_by__username", "created_at", "idempotency_key", "signed_delta", "balance_after",
+                )
+                .iterator(chunk_size=DELETE_BATCH)
+            ):
+                row["created_at"] = row["created_at"].isoformat()
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                rows += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    digest = _sha256(tmp)
+    os.replace(tmp, target)
+
+    try:
+        with transaction.atomic():
+            archived = ArchivedMovementFile.objects.create(
+                month=month,
+                path=str(relative),
+                rows=rows,
+                first_id=bounds["first"],
+                last_id=bounds["last"],
+                sha256=digest,
+            )
+            deleted = 0
+            for start in range(bounds["first"], bounds["last"] + 1, DELETE_BATCH):
+                _, by_model = movements.filter(id__gte=start, id__lt=start + DELETE_BATCH).delete()
+                deleted += by_model.get(StockMovement._meta.label, 0)
+            if deleted != rows:
+                raise ArchiveError(f"{month:%Y-%m}: escritos {rows}, borrados {deleted}.")
+    except Exception:
+        target.unlink(missing_ok=True)
+        raise
+    return archived
+
+
+def _next_path(month: date) -> Path:
+    base = Path(f"{month:%Y}") / f"movements-{month:%Y-%m}"
+    existing = ArchivedMovementFile.objects.filter(month=month).count()
+    suffix = f"-part{existing + 1}" if existing else ""
+    return base.with_name(base.name + suffix + ".jsonl.gz")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def archived_until() -> Optional[date]:
+    """Fin (exclusivo) del último mes archivado, o None si no hay archivo."""
+    last = ArchivedMovementFile.objects.aggregate(last=Max("month"))["last"]
+    return _next_month(last) if last else None
+
+
+def needs_archive(start: Optional[datetime]) -> bool:
+    until = archived_until()
+    return until is not None and start is not None and timezone.localdate(start) < until
+
+
+def _iter_file(archived: ArchivedMovementFile) -> Iterator[dict]:
+    with gzip.open(archive_dir() / archived.path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _key(row) -> Tuple[datetime, int]:
+    return row["created_at"], row["id"]
+
+
+class ArchivedMovements:
+    """
+    Movimientos archivados de [start, end) como fuente perezosa: para
+    keyset_page (older/newer) y para las exportaciones (iteración).
+
+    Los meses se leen de uno en uno en el orden pedido y la lectura se detiene
+    en cuanto se tiene lo necesario. Los ficheros están en orden de id, no de
+    (created_at, id): una página recorre el mes en streaming, salta lo que no
+    pasa del cursor y solo retiene las size filas de la página. La iteración
+    completa ordena cada mes en memoria salvo con by_id ascendente, que sale
+    tal cual de los ficheros.
+    """
+
+    def __init__(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        product_id: Optional[int] = None,
+        movement_type: Optional[str] = None,
+    ) -> None:
+        self.start, self.end = start, end
+        self.product_id, self.movement_type = product_id, movement_type
+        self._products = {}
+
+    def _files(self):
+        files = ArchivedMovementFile.objects.all()
+        if self.start:
+            files = files.filter(month__gte=_month_start(timezone.localdate(self.start)))
+        if self.end:
+            files = files.filter(month__lt=timezone.localdate(self.end))
+        return files
+
+    def _months(self, newest_first: bool, cursor=None) -> List[Tuple[date, List[ArchivedMovementFile]]]:
+        """Ficheros por mes en el orden pedido, sin los meses que quedan detrás del cursor."""
+        cursor_day = timezone.localdate(cursor[0]) if cursor else None
+        by_month = {}
+        # Las partes de un mes tienen rangos de id disjuntos y crecientes.
+        for archived in self._files().order_by("month", "first_id"):
+            if cursor_day and (
+                archived.month > cursor_day if newest_first else _next_month(archived.month) <= cursor_day
+            ):
+                continue
+            by_month.setdefault(archived.month, []).append(archived)
+        months = list(by_month.items())
+        return months[::-1] if newest_first else months
+
+    def _rows(self, files, cursor=None, newest_first: bool = True) -> Iterator[dict]:
+        """Filas de los ficheros que pasan los filtros y el cursor, en orden de id."""
+        for archived in files:
+            for row in _iter_file(archived):
+                created_at = datetime.fromisoformat(row["created_at"])
+                if (self.start and created_at < self.start) or (self.end and created_at >= self.end):
+                    continue
+                if self.product_id is not None and row["product_id"] != self.product_id:
+                    continue
+                if self.movement_type and row["movement_type"] != self.movement_type:
+                    continue
+                row["created_at"] = created_at
+                if cursor and not (_key(row) < cursor if newest_first else _key(row) > cursor):
+                    continue
+                yield row
+
+    def _movement(self, row: dict) -> SimpleNamespace:
+        username = row.pop("performed_by__username")
+        sku = row.pop("product__sku")
+        return SimpleNamespace(
+            **row,
+            pk=row["id"],
+            archived=True,
+            product=self._products.get(row["product_id"]) or SimpleNamespace(sku=sku, name=sku),
+            performed_by=SimpleNamespace(username=username, get_full_name="") if username else None,
+        )
+
+    def _movements(self, rows: Iterable[dict]) -> Iterator[SimpleNamespace]:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, DELETE_BATCH))
+            if not chunk:
+                return
+            missing = {r["product_id"] for r in chunk} - self._products.keys()
+            if missing:
+                self._products.update(Product.objects.in_bulk(missing))
+            for row in chunk:
+                yield self._movement(row)
+
+    def iterate(self, *, newest_first: bool = True, cursor=None, by_id: bool = False) -> Iterator[SimpleNamespace]:
+        """
+        Movimientos en orden (created_at, id), del más reciente al más antiguo o
+        al revés; con cursor, solo los anteriores (o posteriores) a él. by_id
+        ordena cada mes por id (exportaciones por rangos de id).
+        """
+        for month, files in self._months(newest_first, cursor):
+            rows = self._rows(files, cursor, newest_first)
+            if not (by_id and not newest_first):
+                rows = sorted(rows, key=(lambda r: r["id"]) if by_id else _key, reverse=newest_first)
+            yield from self._movements(rows)
+
+    def _page(self, cursor, size: int, newest_first: bool) -> List[SimpleNamespace]:
+        pick = heapq.nlargest if newest_first else heapq.nsmallest
+        page = []
+        for month, files in self._months(newest_first, cursor):
+            page += pick(size - len(page), self._rows(files, cursor, newest_first), key=_key)
+            if len(page) >= size:
+                break
+        return list(self._movements(page))
+
+    def __iter__(self) -> Iterator[SimpleNamespace]:
+        return self.iterate()
+
+    def older(self, cursor, size: int) -> List[SimpleNamespace]:
+        return self._page(cursor, size, newest_first=True)
+
+    def newer(self, cursor, size: int) -> List[SimpleNamespace]:
+        return self._page(cursor, size, newest_first=False)
+
+    def approximate_count(self) -> int:
+        """Filas de los ficheros del rango (exacto sin filtros; cota superior con ellos)."""
+        return self._files().aggregate(rows=Sum("rows", default=0))["rows"]
+
+
+def read_archived(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    product_id: Optional[int] = None,
+    movement_type: Optional[str] = None,
+) -> ArchivedMovements:
+    """Movimientos archivados de [start, end), del más reciente al más antiguo (como la tabla)."""
+    return ArchivedMovements(start, end, product_id, movement_type)
+
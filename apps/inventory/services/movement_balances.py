@@ -0,0 +1,85 @@
+"""
+Cálculo retroactivo de StockMovement.signed_delta y balance_after.
+
+Los movimientos de cada producto se recorren en orden (created_at, id) en
+bloques de chunk_size (paginación por clave, sin cursores abiertos mientras se
+escribe). El saldo de partida se deduce del stock actual menos el efecto neto
+de las entradas y salidas si el producto no tiene ajustes; si los tiene, el
+saldo anterior al primer ajuste se desconoce y queda nulo. Los productos con
+contador particionado no llevan saldo, igual que al registrar.
+"""
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from apps.inventory.models import StockMovement
+from apps.inventory.services.inventory_service import advance_balance
+from apps.products.models import Product
+
+
+class BackfillReport:
+    def __init__(self) -> None:
+        self.products = 0
+        self.movements = 0
+        self.without_balance = 0
+
+
+def backfill_movement_balances(
+    *, chunk_size: int = 2000, product_ids: Optional[Iterable[int]] = None
+) -> BackfillReport:
+    report = BackfillReport()
+    movements = StockMovement.objects.all()
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=list(product_ids))
+    totals = (
+        movements.values("product_id")
+        .annotate(
+            entries=Sum("quantity", filter=Q(movement_type=StockMovement.ENTRY), default=0),
+            exits=Sum("quantity", filter=Q(movement_type=StockMovement.EXIT), default=0),
+            adjustments=Count("id", filter=Q(movement_type=StockMovement.ADJUSTMENT)),
+        )
+        .order_by("product_id")
+    )
+    stock = {
+        row["pk"]: row
+        for row in Product.objects.filter(pk__in=movements.values("product_id")).values(
+            "pk", "stock_quantity", "stock_shards"
+        )
+    }
+
+    for row in totals:
+        product_id = row["product_id"]
+        product = stock[product_id]
+        running: Dict[int, Optional[int]] = {}
+        if not product["stock_shards"]:
+            running[product_id] = (
+                None if row["adjustments"] else product["stock_quantity"] - row["entries"] + row["exits"]
+            )
+        _backfill_product(product_id, running, chunk_size, report)
+        report.products += 1
+    return report
+
+
+def _backfill_product(product_id: int, running: dict, chunk_size: int, report: BackfillReport) -> None:
+    last = None
+    while True:
+        chunk = StockMovement.objects.filter(product_id=product_id)
+        if last is not None:
+            chunk = chunk.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1]))
+        chunk = list(
+            chunk.order_by("created_at", "id").values("id", "product_id", "movement_type", "quantity", "created_at")[
+                :chunk_size
+            ]
+        )
+        if not chunk:
+            return
+        updates = []
+        for line in chunk:
+            signed_delta, balance_after = advance_balance(running, line)
+            updates.append(StockMovement(id=line["id"], signed_delta=signed_delta, balance_after=balance_after))
+            report.without_balance += balance_after is None
+        with transaction.atomic():
+            StockMovement.objects.bulk_update(updates, ["signed_delta", "balance_after"], batch_size=500)
+        report.movements += len(chunk)
+        last = (chunk[-1]["created_at"], chunk[-1]["id"])
@@ -0,0 +1,131 @@
+"""
+Importación masiva de movimientos desde CSV o JSONL en memoria constante.
+
+Columnas / claves: sku, movement_type, quantity y, opcionalmente, reason,
+created_at (ISO 8601) e idempotency_key. Las filas se leen en streaming, se
+validan y se agrupan en bloques de chunk_size que se aplican con
+InventoryService.register_movements (una transacción y un bulk_create por
+bloque). Con idempotency_key, reimportar un fichero tras un fallo no duplica
+movimientos.
+"""
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.inventory.models import StockMovement
+from apps.inventory.services.inventory_service import (
+    InsufficientStockError,
+    InventoryService,
+    normalize_idempotency_key,
+)
+from apps.products.models import Product
+
+VALID_TYPES = {choice for choice, _ in StockMovement.MOVEMENT_TYPE_CHOICES}
+MAX_REPORTED_ERRORS = 50
+
+
+class ImportReport:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.imported = 0
+        self.invalid = 0
+        self.rejected = 0
+        self.elapsed = 0.0
+        self.errors: List[Tuple[int, str]] = []
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, row_number: int, message: str) -> None:
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+
+class MovementImporter:
+    def __init__(self, service: InventoryService, *, chunk_size: int = 1000, user=None) -> None:
+        self._service = service
+        self._chunk_size = chunk_size
+        self._user = user
+        self._sku_map: Dict[str, int] = {}
+
+    def run(self, rows: Iterable[dict]) -> ImportReport:
+        report = ImportReport()
+        start = time.perf_counter()
+        self._sku_map = dict(Product.objects.filter(is_active=True).values_list("sku", "pk"))
+        chunk: List[Tuple[int, dict]] = []
+        for row_number, row in enumerate(rows, start=1):
+            report.rows += 1
+            line, error = self._parse(row)
+            if error:
+                report.invalid += 1
+                report.add_error(row_number, error)
+                continue
+            chunk.append((row_number, line))
+            if len(chunk) >= self._chunk_size:
+                self._flush(chunk, report)
+                chunk = []
+        if chunk:
+            self._flush(chunk, report)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _parse(self, row: dict):
+        if "__error__" in row:
+            return None, row["__error__"]
+        try:
+            return self._parse_fields(row)
+        except (AttributeError, TypeError, ValueError) as exc:
+            # Valores de tipo inesperado (sku numérico, fecha imposible...): la fila es inválida.
+            return None, f"Fila no válida: {exc}"
+
+    def _parse_fields(self, row: dict):
+        sku = (row.get("sku") or "").strip()
+        product_id = self._sku_map.get(sku)
+        if product_id is None:
+            return None, f"SKU desconocido o inactivo: {sku!r}"
+        movement_type = (row.get("movement_type") or "").strip().upper()
+        if movement_type not in VALID_TYPES:
+            return None, f"Tipo de movimiento no válido: {movement_type!r}"
+        try:
+            quantity = int(row.get("quantity"))
+        except (TypeError, ValueError):
+            return None, f"Cantidad no válida: {row.get('quantity')!r}"
+        if quantity < 1:
+            return None, f"Cantidad no válida: {quantity}"
+        reason = (row.get("reason") or "")[:255]
+        line = {
+            "product_id": product_id,
+            "movement_type": movement_type,
+            "quantity": quantity,
+            "reason": reason,
+            "idempotency_key": normalize_idempotency_key(row.get("idempotency_key")),
+        }
+        if row.get("created_at"):
+            created_at = parse_datetime(str(row["created_at"]))
+            if created_at is None:
+                return None, f"Fecha no válida: {row['created_at']!r}"
+            if timezone.is_naive(created_at):
+                created_at = timezone.make_aware(created_at)
+            line["created_at"] = created_at
+        return line, None
+
+    def _flush(self, chunk: List[Tuple[int, dict]], report: ImportReport) -> None:
+        try:
+            self._service.register_movements([line for _, line in chunk], user=self._user)
+            report.imported += len(chunk)
+            return
+        except InsufficientStockError:
+            pass
+        # Alguna salida del bloque excede el stock: se reaplica línea a línea
+        # para importar el resto y señalar solo las filas rechazadas.
+        for row_number, line in chunk:
+            try:
+                self._service.register_movements([line], user=self._user)
+            except InsufficientStockError as exc:
+                report.rejected += 1
+                report.add_error(row_number, str(exc))
+            else:
+                report.imported += 1
@@ -0,0 +1,146 @@
+"""
+Agregados diarios de movimientos (DailyMovementRollup).
+
+record() suma un lote de movimientos a sus filas (producto, día, tipo) con un
+número fijo de consultas: un INSERT que crea las filas que faltan, un SELECT de
+sus ids y un UPDATE con incrementos por fila. En productos particionados cada
+lote suma en una fila (shard) al azar de las stock_shards del día, como el
+contador de stock, para que las entradas concurrentes no se esperen entre sí. rebuild() los recalcula desde
+StockMovement. Las consultas de volumen de los informes leen de aquí en lugar
+de recorrer los movimientos.
+"""
+import random
+from collections import defaultdict
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from apps.inventory.models import DailyMovementRollup, StockMovement
+from apps.inventory.services import movement_archive
+
+BATCH_SIZE = 2000
+
+Key = Tuple[int, date, str, int]
+
+
+def record(movements: Iterable[StockMovement], rng: random.Random = random) -> None:
+    """Acumula los movimientos en sus agregados diarios (llamar dentro de la transacción)."""
+    totals: Dict[Key, List[int]] = defaultdict(lambda: [0, 0])
+    shard_of: Dict[int, int] = {}
+    for m in movements:
+        if m.product_id not in shard_of:
+            shards = getattr(m.product, "stock_shards", 0)
+            shard_of[m.product_id] = rng.randrange(shards) if shards else 0
+        entry = totals[(m.product_id, timezone.localdate(m.created_at), m.movement_type, shard_of[m.product_id])]
+        entry[0] += m.quantity
+        entry[1] += 1
+    if not totals:
+        return
+    DailyMovementRollup.objects.bulk_create(
+        [DailyMovementRollup(product_id=p, day=d, movement_type=t, shard=n) for p, d, t, n in totals],
+        ignore_conflicts=True,
+    )
+    ids = {
+        (row["product_id"], row["day"], row["movement_type"], row["shard"]): row["pk"]
+        for row in DailyMovementRollup.objects.filter(
+            product_id__in={p for p, _, _, _ in totals},
+            day__in={d for _, d, _, _ in totals},
+            shard__in={n for _, _, _, n in totals},
+        ).values("pk", "product_id", "day", "movement_type", "shard")
+    }
+    increments = {ids[key]: value for key, value in totals.items()}
+    DailyMovementRollup.objects.filter(pk__in=list(increments)).update(
+        quantity_total=F("quantity_total")
+        + Case(
+            *[When(pk=pk, then=Value(q)) for pk, (q, _) in increments.items()],
+            default=Value(0),
+            output_field=BigIntegerField(),
+        ),
+        movement_count=F("movement_count")
+        + Case(
+            *[When(pk=pk, then=Value(c)) for pk, (_, c) in increments.items()],
+            default=Value(0),
+            output_field=BigIntegerField(),
+        ),
+    )
+
+
+@transaction.atomic
+def rebuild(*, since: Optional[date] = None) -> int:
+    """
+    Recalcula los agregados (desde since, o todos). Devuelve las filas creadas.
+
+    Los meses archivados ya no están en StockMovement: el recálculo empieza
+    como pronto en archived_until() y conserva sus agregados.
+    """
+    archived_until = movement_archive.archived_until()
+    if archived_until and (since is None or since < archived_until):
+        since = archived_until
+    rollups = DailyMovementRollup.objects.all()
+    movements = StockMovement.objects.all()
+    if since:
+        rollups = rollups.filter(day__gte=since)
+        # Límite sobre la columna (no sobre su fecha) para que use el índice de created_at.
+        movements = movements.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+    rollups.delete()
+    rows = (
+        movements.annotate(day=TruncDate("created_at"))
+        .values("product_id", "day", "movement_type")
+        .annotate(quantity_total=Sum("quantity"), movement_count=Count("id"))
+        .order_by()
+    )
+    batch, created = [], 0
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(DailyMovementRollup(**row))
+        if len(batch) >= BATCH_SIZE:
+            DailyMovementRollup.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    DailyMovementRollup.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+def _filtered(date_from=None, date_to=None, product_id=None, movement_type=None):
+    rollups = DailyMovementRollup.objects.all()
+    if date_from:
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(day__lte=date_to)
+    if product_id is not None:
+        rollups = rollups.filter(product_id=product_id)
+    if movement_type:
+        rollups = rollups.filter(movement_type=movement_type)
+    return rollups
+
+
+def _by_type():
+    return {
+        "movements": Sum("movement_count"),
+        "entries": Sum("quantity_total", filter=Q(movement_type=StockMovement.ENTRY), default=0),
+        "exits": Sum("quantity_total", filter=Q(movement_type=StockMovement.EXIT), default=0),
+        "adjustments": Sum("quantity_total", filter=Q(movement_type=StockMovement.ADJUSTMENT), default=0),
+    }
+
+
+def daily_volume(**filters) -> List[dict]:
+    """Movimientos y unidades por día y tipo."""
+    return list(_filtered(**filters).values("day").annotate(**_by_type()).order_by("day"))
+
+
+def monthly_volume_by_product(**filters) -> List[dict]:
+    """Movimientos y unidades por mes y producto."""
+    return list(
+        _filtered(**filters)
+        .annotate(month=TruncMonth("day"))
+        .values("month", "product_id", "product__sku", "product__name")
+        .annotate(**_by_type())
+        .order_by("month", "product__sku")
+    )
+
+
+def total_movements() -> int:
+    return _filtered().aggregate(total=Sum("movement_count", default=0))["total"]
@@ -0,0 +1,133 @@
+"""
+Publica los eventos de StockEventOutbox en un endpoint HTTP por lotes.
+
+Los eventos se envían en orden de id, así que el orden por producto se
+conserva. Si un lote falla tras los reintentos, el relay se detiene sin saltar
+al siguiente: un evento posterior del mismo producto nunca se publica antes
+que uno anterior. Debe ejecutarse una sola instancia del relay a la vez.
+
+purge_published() borra los eventos publicados hace más de
+INVENTORY_OUTBOX_RETENTION_DAYS días para que la tabla no crezca sin límite.
+"""
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db.models import F, Min
+from django.utils import timezone
+
+from apps.inventory.models import StockEventOutbox
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH = 5000
+
+
+class RelayError(Exception):
+    """El endpoint rechazó un lote tras agotar los reintentos."""
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        endpoint: str,
+        *,
+        batch_size: int = 500,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        sleep=time.sleep,
+    ) -> None:
+        self._endpoint = endpoint
+        self._batch_size = batch_size
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._timeout = timeout
+        self._sleep = sleep
+        self.published = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.published / self.elapsed if self.elapsed else 0.0
+
+    def drain(self, max_batches: int = None) -> int:
+        """Publica lotes hasta vaciar el outbox (o max_batches). Devuelve eventos publicados."""
+        published = 0
+        while max_batches is None or self.batches < max_batches:
+            events = list(
+                StockEventOutbox.objects.filter(published_at__isnull=True)
+                .order_by("id")
+                .values("id", "event_type", "product_id", "payload", "created_at")[: self._batch_size]
+            )
+            if not events:
+                break
+            start = time.perf_counter()
+            self._post_with_retries(events)
+            StockEventOutbox.objects.filter(id__in=[e["id"] for e in events]).update(
+                published_at=timezone.now()
+            )
+            self.elapsed += time.perf_counter() - start
+            self.batches += 1
+            self.published += len(events)
+            published += len(events)
+        return published
+
+    def purge_published(self, days: Optional[int] = None) -> int:
+        """Borra por lotes los eventos publicados hace más de days días. Devuelve los borrados."""
+        days = settings.INVENTORY_OUTBOX_RETENTION_DAYS if days is None else days
+        limit = timezone.now() - timedelta(days=days)
+        published = StockEventOutbox.objects.filter(published_at__lt=limit)
+        # Se publica en orden de id: todo lo anterior al primer pendiente ya salió,
+        # y el recorrido por la clave primaria no llega a los pendientes.
+        first_pending = StockEventOutbox.objects.filter(published_at__isnull=True).aggregate(first=Min("id"))["first"]
+        if first_pending is not None:
+            published = published.filter(id__lt=first_pending)
+        deleted = 0
+        while True:
+            ids = list(published.order_by("id").values_list("id", flat=True)[:PURGE_BATCH])
+            if not ids:
+                return deleted
+            deleted += StockEventOutbox.objects.filter(id__in=ids).delete()[0]
+
+    def _post_with_retries(self, events: List[dict]) -> None:
+        body = json.dumps(
+            {
+                "events": [
+                    {
+                        "id": e["id"],
+                        "type": e["event_type"],
+                        "product_id": e["product_id"],
+                        "created_at": e["created_at"].isoformat(),
+                        "data": e["payload"],
+                    }
+                    for e in events
+                ]
+            }
+        ).encode()
+        ids = [e["id"] for e in events]
+        for attempt in range(1, self._max_retries + 1):
+            try:
+                self._post(body)
+                return
+            except (urllib.error.URLError, OSError) as exc:
+                logger.warning("Relay de stock: intento %s/%s fallido: %s", attempt, self._max_retries, exc)
+                StockEventOutbox.objects.filter(id__in=ids).update(
+                    attempts=F("attempts") + 1, last_error=str(exc)[:1000]
+                )
+                if attempt < self._max_retries:
+                    self._sleep(self._backoff * 2 ** (attempt - 1))
+        raise RelayError(f"No se pudo publicar el lote {ids[0]}..{ids[-1]} en {self._endpoint}.")
+
+    def _post(self, body: bytes) -> None:
+        request = urllib.request.Request(
+            self._endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self._timeout):
+            pass
@@ -0,0 +1,148 @@
+"""
+Contadores de stock particionados para SKUs con mucha concurrencia.
+
+Con Product.stock_shards = N, el stock vivo se reparte en N filas de
+StockCounterShard. Cada escritura toca una sola fila elegida al azar, de modo
+que las escrituras concurrentes sobre el mismo SKU no compiten por la fila de
+Product. El stock real es la suma de las particiones; fold() la consolida
+periódicamente en Product.stock_quantity y reequilibra las particiones.
+"""
+import random
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from apps.inventory.models import StockCounterShard
+from apps.products.models import Product
+
+
+def _split(total: int, shards: int) -> List[int]:
+    base, extra = divmod(total, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+class ShardedStockCounter:
+    def __init__(self, rng: random.Random = None) -> None:
+        self._rng = rng or random.Random()
+
+    @transaction.atomic
+    def enable(self, product_id: int, shards: int) -> None:
+        if shards < 1:
+            raise ValueError("El número de particiones debe ser >= 1.")
+        product = Product.objects.select_for_update().get(pk=product_id)
+        total = self._total(self._lock(product)) if product.stock_shards else product.stock_quantity
+        StockCounterShard.objects.filter(product=product).delete()
+        StockCounterShard.objects.bulk_create(
+            [
+                StockCounterShard(product=product, index=i, quantity=quantity)
+                for i, quantity in enumerate(_split(total, shards))
+            ]
+        )
+        product.stock_quantity = total
+        product.stock_shards = shards
+        product.save(update_fields=["stock_quantity", "stock_shards", "updated_at"])
+
+    @transaction.atomic
+    def disable(self, product_id: int) -> None:
+        product = Product.objects.select_for_update().get(pk=product_id)
+        if not product.stock_shards:
+            return
+        product.stock_quantity = self._total(self._lock(product))
+        product.stock_shards = 0
+        product.save(update_fields=["stock_quantity", "stock_shards", "updated_at"])
+        StockCounterShard.objects.filter(product=product).delete()
+
+    @transaction.atomic
+    def fold(self, product_id: int) -> int:
+        """Consolida las particiones en Product.stock_quantity y las reequilibra."""
+        product = Product.objects.get(pk=product_id)
+        if not product.stock_shards:
+            return product.stock_quantity
+        shards = self._lock(product)
+        total = self._total(shards)
+        self._rebalance(shards, total)
+        Product.objects.filter(pk=product_id).update(stock_quantity=total, updated_at=timezone.now())
+        return total
+
+    def totals(self, product_ids: Iterable[int]) -> Dict[int, int]:
+        """Stock vivo (suma de particiones) de los productos indicados."""
+        rows = (
+            StockCounterShard.objects.filter(product_id__in=list(product_ids))
+            .values("product_id")
+            .annotate(total=Sum("quantity"))
+            .order_by()
+        )
+        return {row["product_id"]: row["total"] for row in rows}
+
+    def apply(self, product: Product, *, delta: int = 0, absolute: int = None, required: int = 0) -> bool:
+        """
+        Mismo contrato que AbstractProductRepository.apply_stock_change, sobre las particiones.
+
+        Las entradas y las salidas que caben en una partición se aplican con un
+        UPDATE condicional sobre una sola fila. Los ajustes y las salidas que
+        no caben en ninguna partición bloquean todas las filas del producto.
+        """
+        if absolute is None:
+            shards = product.stock_shards
+            start = self._rng.randrange(shards)
+            for offset in range(shards if required > 0 else 1):
+                updated = StockCounterShard.objects.filter(
+                    product_id=product.pk,
+                    index=(start + offset) % shards,
+                    quantity__gte=required,
+                ).update(quantity=F("quantity") + delta)
+                if updated:
+                    return True
+        return self._apply_locked(product, delta=delta, absolute=absolute, required=required)
+
+    @transaction.atomic
+    def _apply_locked(self, product: Product, *, delta: int, absolute, required: int) -> bool:
+        shards = self._lock(product)
+        total = self._total(shards)
+        if total < required:
+            return False
+        self._rebalance(shards, (total if absolute is None else absolute) + delta)
+        return True
+
+    def _lock(self, product: Product) -> List[StockCounterShard]:
+        return list(
+            StockCounterShard.objects.select_for_update().filter(product_id=product.pk).order_by("index")
+        )
+
+    def _total(self, shards: List[StockCounterShard]) -> int:
+        return sum(shard.quantity for shard in shards)
+
+    def _rebalance(self, shards: List[StockCounterShard], total: int) -> None:
+        for shard, quantity in zip(shards, _split(total, len(shards))):
+            shard.quantity = quantity
+        StockCounterShard.objects.bulk_update(shards, ["quantity"])
+
+
+def low_stock_products():
+    """
+    Productos activos en o bajo su mínimo, con el stock vivo anotado en current_stock.
+
+    En los productos particionados stock_quantity es el último total
+    consolidado: se decide con la suma de sus particiones (son pocos).
+    """
+    sharded = dict(Product.objects.filter(is_active=True, stock_shards__gt=0).values_list("pk", "minimum_stock"))
+    live = ShardedStockCounter().totals(sharded)
+    low = {pk: live.get(pk, 0) for pk, minimum in sharded.items() if live.get(pk, 0) <= minimum}
+
+    condition = Q(stock_shards=0, stock_quantity__lte=F("minimum_stock"))
+    stock = F("stock_quantity")
+    if low:
+        condition |= Q(pk__in=list(low))
+        stock = Case(
+            *[When(pk=pk, then=Value(total)) for pk, total in low.items()],
+            default=F("stock_quantity"),
+            output_field=IntegerField(),
+        )
+    return (
+        Product.objects.filter(condition, is_active=True)
+        .annotate(current_stock=stock)
+        .annotate(stock_deficit=F("minimum_stock") - F("current_stock"))
+        .order_by("current_stock", "name")
+    )
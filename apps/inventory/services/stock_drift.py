@@ -0,0 +1,226 @@
+"""
+Conciliación del libro de movimientos con el stock de los productos.
+
+El stock según el libro es la reproducción de los StockMovement del producto
+en orden (created_at, id) partiendo de 0: las entradas suman, las salidas
+restan y cada ajuste fija el valor. Se compara con el stock actual (suma de
+particiones si el producto está particionado); las diferencias vienen de
+ediciones directas de stock_quantity (admin, formulario de producto) o de
+altas con stock inicial sin movimiento.
+
+Los productos se recorren por bloques de ids y sus movimientos se leen con
+iterator(chunk_size) en orden de producto, guardando solo el estado del
+producto en curso: la memoria no depende del tamaño del libro. Con workers > 1
+los rangos de ids se reparten entre procesos.
+
+Si hay meses archivados (movement_archive) el libro vivo no empieza en 0: el
+saldo inicial se toma del primer movimiento vivo con balance_after y, si no lo
+tiene, se desconoce hasta el primer ajuste.
+
+Con repair=True se registra, para cada producto con deriva, un ajuste al stock
+actual: el libro vuelve a cuadrar sin modificar el stock (y sin avisos a los
+observadores). Los productos inactivos o particionados solo se informan.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import django
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from apps.inventory.models import ArchivedMovementFile, StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InventoryService, advance_balance
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+PRODUCT_BATCH = 5000
+PARTITIONS_PER_WORKER = 4
+REPAIR_BATCH = 2000
+
+
+class DriftLine:
+    __slots__ = ("product_id", "sku", "name", "stock", "ledger", "movements", "diverged_at", "note")
+
+    def __init__(self, product_id, sku, name, stock, ledger, movements, diverged_at=None, note="") -> None:
+        self.product_id = product_id
+        self.sku = sku
+        self.name = name
+        self.stock = stock
+        self.ledger = ledger
+        self.movements = movements
+        # Primer movimiento (desde el último ajuste) cuyo balance_after ya no
+        # coincide con el libro: la edición directa ocurrió antes de él.
+        self.diverged_at = diverged_at
+        self.note = note
+
+    @property
+    def variance(self) -> int:
+        return self.stock - self.ledger
+
+    def as_row(self) -> dict:
+        return {
+            "sku": self.sku,
+            "name": self.name,
+            "stock": self.stock,
+            "ledger": self.ledger,
+            "variance": self.variance,
+            "movements": self.movements,
+            "diverged_at": self.diverged_at or "",
+            "note": self.note,
+        }
+
+
+class DriftReport:
+    def __init__(self) -> None:
+        self.products = 0
+        self.movements = 0
+        self.unknown = 0
+        self.repaired = 0
+        self.lines: List[DriftLine] = []
+        self.elapsed = 0.0
+
+    def merge(self, other: "DriftReport") -> None:
+        self.products += other.products
+        self.movements += other.movements
+        self.unknown += other.unknown
+        self.repaired += other.repaired
+        self.lines.extend(other.lines)
+
+
+def partitions(workers: int) -> List[Tuple[int, int]]:
+    """Rangos [inicio, fin) de ids de producto, varios por proceso para equilibrar la carga."""
+    bounds = Product.objects.aggregate(first=Min("pk"), last=Max("pk"))
+    if bounds["first"] is None:
+        return []
+    count = max(workers, 1) * (PARTITIONS_PER_WORKER if workers > 1 else 1)
+    span = bounds["last"] - bounds["first"] + 1
+    step = max(-(-span // count), 1)
+    return [(start, min(start + step, bounds["last"] + 1)) for start in range(bounds["first"], bounds["last"] + 1, step)]
+
+
+def reconcile(
+    *, workers: int = 1, chunk_size: int = 5000, repair: bool = False, user=None
+) -> DriftReport:
+    started = time.perf_counter()
+    archived = ArchivedMovementFile.objects.exists()
+    # Los productos con movimientos posteriores a este id no se corrigen en esta pasada.
+    scanned_until = StockMovement.objects.aggregate(last=Max("id"))["last"] or 0
+    ranges = partitions(workers)
+    report = DriftReport()
+    if workers > 1 and len(ranges) > 1:
+        # Cada proceso abre sus propias conexiones; las heredadas no se comparten.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            futures = [
+                pool.submit(_reconcile_range, start, stop, chunk_size, archived)
+                for start, stop in ranges
+            ]
+            for future in futures:
+                report.merge(future.result())
+    else:
+        for start, stop in ranges:
+            report.merge(_reconcile_range(start, stop, chunk_size, archived))
+    report.lines.sort(key=lambda line: line.sku)
+    if repair:
+        # Los procesos solo leen; las correcciones (pocas) se escriben desde aquí.
+        service = InventoryService(DjangoProductRepository(), StockSubject())
+        for start in range(0, len(report.lines), REPAIR_BATCH):
+            report.repaired += _repair(service, report.lines[start : start + REPAIR_BATCH], user, scanned_until)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def _reconcile_range(start, stop, chunk_size, archived) -> DriftReport:
+    report = DriftReport()
+    last_pk = start - 1
+    while True:
+        products = list(
+            Product.objects.filter(pk__gt=last_pk, pk__lt=stop)
+            .order_by("pk")
+            .values_list("pk", "sku", "name", "stock_quantity", "stock_shards", "is_active")[:PRODUCT_BATCH]
+        )
+        if not products:
+            return report
+        last_pk = products[-1][0]
+        report.lines.extend(_scan_batch(products, chunk_size, archived, report))
+
+
+def _scan_batch(products, chunk_size, archived, report) -> List[DriftLine]:
+    live = ShardedStockCounter().totals([pk for pk, _, _, _, shards, _ in products if shards])
+    movements = (
+        StockMovement.objects.filter(product_id__gte=products[0][0], product_id__lte=products[-1][0])
+        .order_by("product_id", "created_at", "id")
+        .values_list("id", "product_id", "movement_type", "quantity", "signed_delta", "balance_after")
+        .iterator(chunk_size=chunk_size)
+    )
+    pending = next(movements, None)
+    lines = []
+    for pk, sku, name, stock, shards, is_active in products:
+        running = {pk: 0}
+        count = 0
+        diverged_at = None
+        while pending is not None and pending[1] <= pk:
+            movement_id, product_id, movement_type, quantity, signed_delta, balance_after = pending
+            pending = next(movements, None)
+            if product_id != pk:
+                continue
+            if count == 0 and archived and movement_type != StockMovement.ADJUSTMENT:
+                known = balance_after is not None and signed_delta is not None
+                running[pk] = balance_after - signed_delta if known else None
+            line = {"product_id": pk, "movement_type": movement_type, "quantity": quantity}
+            _, replayed = advance_balance(running, line)
+            count += 1
+            if movement_type == StockMovement.ADJUSTMENT:
+                diverged_at = None
+            elif diverged_at is None and None not in (replayed, balance_after) and replayed != balance_after:
+                diverged_at = movement_id
+        if count == 0 and archived:
+            running[pk] = None
+        report.products += 1
+        report.movements += count
+        ledger = running[pk]
+        current = live.get(pk, 0) if shards else stock
+        if ledger is None:
+            report.unknown += 1
+        elif current != ledger:
+            note = "inactivo" if not is_active else "particionado" if shards else ""
+            lines.append(DriftLine(pk, sku, name, current, ledger, count, diverged_at, note))
+    return lines
+
+
+def _repair(service: InventoryService, lines: List[DriftLine], user, scanned_until: int) -> int:
+    repairable = {line.product_id: line for line in lines if not line.note}
+    if not repairable:
+        return 0
+    with transaction.atomic():
+        locked = dict(
+            Product.objects.select_for_update()
+            .filter(pk__in=list(repairable))
+            .values_list("pk", "stock_quantity")
+        )
+        # Un producto que se movió o se editó después de leerlo se deja para la próxima pasada.
+        moved = set(
+            StockMovement.objects.filter(product_id__in=list(repairable), id__gt=scanned_until).values_list(
+                "product_id", flat=True
+            )
+        )
+        batch = []
+        for product_id, line in repairable.items():
+            if product_id in moved or locked.get(product_id) != line.stock:
+                line.note = "cambió durante la conciliación"
+                continue
+            line.note = "ajustado"
+            batch.append(
+                {
+                    "product_id": product_id,
+                    "movement_type": StockMovement.ADJUSTMENT,
+                    "quantity": line.stock,
+                    "reason": f"Conciliación libro/stock (libro {line.ledger}, stock {line.stock})",
+                }
+            )
+        if batch:
+            service.register_movements(batch, user=user)
+    return len(batch)
@@ -0,0 +1,189 @@
+"""
+Instantáneas de stock y consulta de stock a una fecha.
+
+take_snapshots() guarda el stock actual de los productos (todos, o solo los
+que acumulan N movimientos desde su última instantánea). stock_as_of(at)
+responde con la instantánea más reciente anterior a at más los movimientos
+posteriores hasta at, sin recorrer el historial completo. Sin instantánea
+previa se usa el balance_after del último movimiento o, si no lo hay, el stock
+actual menos las entradas/salidas posteriores a at.
+
+Los movimientos de meses ya archivados (movement_archive) se leen de los
+ficheros cuando el tramo consultado llega a ellos, mezclados en orden con los
+de la tabla. Un movimiento importado con fecha anterior a una instantánea ya
+tomada no queda reflejado en ella; tras importar historial conviene
+regenerarlas.
+"""
+import heapq
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, Optional
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement, StockSnapshot
+from apps.inventory.services.inventory_service import advance_balance
+from apps.inventory.services.movement_archive import needs_archive, read_archived
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Product
+
+BATCH_SIZE = 2000
+
+
+def take_snapshots(*, every_movements: Optional[int] = None, taken_at: Optional[datetime] = None) -> int:
+    """Guarda instantáneas y devuelve cuántas se crearon."""
+    taken_at = taken_at or timezone.now()
+    products = Product.objects.all()
+    if every_movements:
+        last_snapshot = (
+            StockSnapshot.objects.filter(product=OuterRef("pk")).order_by("-taken_at").values("taken_at")[:1]
+        )
+        products = products.annotate(last_snapshot=Subquery(last_snapshot)).annotate(
+            pending=Count(
+                "stock_movements",
+                filter=Q(last_snapshot__isnull=True) | Q(stock_movements__created_at__gt=F("last_snapshot")),
+            )
+        ).filter(pending__gte=every_movements)
+    rows = list(products.values_list("pk", "stock_quantity", "stock_shards"))
+    live = ShardedStockCounter().totals([pk for pk, _, shards in rows if shards])
+    StockSnapshot.objects.bulk_create(
+        [StockSnapshot(product_id=pk, taken_at=taken_at, quantity=live.get(pk, stock)) for pk, stock, _ in rows],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(rows)
+
+
+def stock_as_of(at: datetime, product_ids: Optional[Iterable[int]] = None) -> Dict[int, Optional[int]]:
+    """
+    {product_id: stock en el instante at} para los productos que ya existían.
+    None si no puede determinarse (sin instantánea y con ajustes posteriores).
+    """
+    products = Product.objects.filter(created_at__lte=at)
+    if product_ids is not None:
+        products = products.filter(pk__in=list(product_ids))
+    snapshot = StockSnapshot.objects.filter(product=OuterRef("pk"), taken_at__lte=at).order_by("-taken_at")
+    rows = list(
+        products.annotate(
+            snapshot_quantity=Subquery(snapshot.values("quantity")[:1]),
+            snapshot_taken_at=Subquery(snapshot.values("taken_at")[:1]),
+        ).values_list("pk", "snapshot_quantity", "snapshot_taken_at")
+    )
+    result: Dict[int, Optional[int]] = {}
+
+    # Con instantánea: su cantidad más los movimientos (instantánea, at].
+    running = {pk: quantity for pk, quantity, _ in rows if quantity is not None}
+    if running:
+        taken = {pk: taken_at for pk, quantity, taken_at in rows if quantity is not None}
+        after_snapshot = StockSnapshot.objects.filter(
+            product=OuterRef("product_id"), taken_at__lte=at
+        ).order_by("-taken_at")
+        movements = StockMovement.objects.filter(product_id__in=list(running), created_at__lte=at).filter(
+            created_at__gt=Subquery(after_snapshot.values("taken_at")[:1])
+        )
+        oldest = min(taken.values())
+        if needs_archive(oldest):
+            # Parte del tramo está archivada: tabla y ficheros se mezclan en orden
+            # (created_at, id), que conserva el orden de cada producto.
+            live = movements.order_by("created_at", "id").values(
+                "id", "product_id", "movement_type", "quantity", "created_at"
+            )
+            archived = (
+                row for row in _archived(oldest, at, running) if row["created_at"] > taken[row["product_id"]]
+            )
+            movements = heapq.merge(
+                live.iterator(chunk_size=BATCH_SIZE), archived, key=lambda row: (row["created_at"], row["id"])
+            )
+        else:
+            movements = (
+                movements.order_by("product_id", "created_at", "id")
+                .values("product_id", "movement_type", "quantity")
+                .iterator(chunk_size=BATCH_SIZE)
+            )
+        for movement in movements:
+            advance_balance(running, movement)
+        result.update(running)
+
+    pending = [pk for pk, quantity, _ in rows if quantity is None]
+    if pending:
+        result.update(_stock_without_snapshot(at, pending))
+    return result
+
+
+def _archived(start: datetime, until: Optional[datetime], product_ids) -> Iterator[dict]:
+    """Movimientos archivados de esos productos en [start, until], del más antiguo al más reciente."""
+    # read_archived toma el final exclusivo; el microsegundo incluye until.
+    end = until + timedelta(microseconds=1) if until else None
+    for m in read_archived(start, end).iterate(newest_first=False):
+        if m.product_id in product_ids:
+            yield {
+                "id": m.pk,
+                "product_id": m.product_id,
+                "movement_type": m.movement_type,
+                "quantity": m.quantity,
+                "created_at": m.created_at,
+                "balance_after": m.balance_after,
+            }
+
+
+def _stock_without_snapshot(at: datetime, product_ids) -> Dict[int, Optional[int]]:
+    last_movement = StockMovement.objects.filter(product=OuterRef("pk"), created_at__lte=at).order_by(
+        "-created_at", "-id"
+    )
+    rows = list(
+        Product.objects.filter(pk__in=product_ids)
+        .annotate(
+            last_balance=Subquery(last_movement.values("balance_after")[:1]),
+            last_at=Subquery(last_movement.values("created_at")[:1]),
+            last_id=Subquery(last_movement.values("id")[:1]),
+        )
+        .values_list("pk", "stock_quantity", "stock_shards", "last_balance", "last_at", "last_id")
+    )
+    after = {
+        row["product_id"]: row
+        for row in StockMovement.objects.filter(product_id__in=product_ids, created_at__gt=at)
+        .values("product_id")
+        .annotate(
+            entries=Sum("quantity", filter=Q(movement_type=StockMovement.ENTRY), default=0),
+            exits=Sum("quantity", filter=Q(movement_type=StockMovement.EXIT), default=0),
+            adjustments=Count("id", filter=Q(movement_type=StockMovement.ADJUSTMENT)),
+        )
+        .order_by()
+    }
+
+    archived_last: Dict[int, dict] = {}
+    month_start = None
+    if needs_archive(at):
+        # Los movimientos posteriores a at que ya están archivados cuentan como
+        # los de la tabla. El último anterior a at solo se busca en el mes de at:
+        # un balance_after de la tabla de un mes anterior se descarta, porque
+        # podría haber movimientos archivados más recientes entre medias.
+        month_start = timezone.make_aware(datetime.combine(timezone.localdate(at).replace(day=1), time.min))
+        for row in _archived(month_start, None, set(product_ids)):
+            if row["created_at"] <= at:
+                archived_last[row["product_id"]] = row
+                continue
+            changes = after.setdefault(row["product_id"], {"entries": 0, "exits": 0, "adjustments": 0})
+            if row["movement_type"] == StockMovement.ENTRY:
+                changes["entries"] += row["quantity"]
+            elif row["movement_type"] == StockMovement.EXIT:
+                changes["exits"] += row["quantity"]
+            else:
+                changes["adjustments"] += 1
+
+    live = ShardedStockCounter().totals([pk for pk, _, shards, *_ in rows if shards])
+    result = {}
+    for pk, stock, _, last_balance, last_at, last_id in rows:
+        if month_start is not None and (last_at is None or last_at < month_start):
+            last_balance = None
+        archived = archived_last.get(pk)
+        if archived and (last_at is None or (archived["created_at"], archived["id"]) > (last_at, last_id)):
+            last_balance = archived["balance_after"]
+        changes = after.get(pk, {"entries": 0, "exits": 0, "adjustments": 0})
+        if last_balance is not None:
+            result[pk] = last_balance
+        elif changes["adjustments"]:
+            result[pk] = None
+        else:
+            result[pk] = live.get(pk, stock) - changes["entries"] + changes["exits"]
+    return result
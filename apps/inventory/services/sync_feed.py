@@ -0,0 +1,178 @@
+"""
+Feed de cambios para sincronización incremental (TPV, clientes móviles).
+
+El cliente guarda un token opaco y pide los cambios posteriores. El token
+(firmado con django.core.signing) lleva dos marcas de agua:
+
+- productos: el último (updated_at, id) entregado. Cada página es un
+  recorrido por keyset sobre product_updated_idx, así que cuesta lo que el
+  delta y no lo que la tabla. Un producto desactivado sale como tombstone
+  (is_active=False también actualiza updated_at); uno reactivado vuelve a
+  salir como producto. Los borrados físicos (admin) no se propagan.
+- movimientos: el último id entregado (recorrido por la clave primaria). La
+  primera sincronización no descarga el historial: parte del id más alto en
+  ese momento, ya que el stock llega con los productos.
+
+Solo se entregan filas con más de INVENTORY_SYNC_LAG_SECONDS de antigüedad:
+una transacción que escribe updated_at o un id antes de confirmarse y tarda
+menos que ese margen no queda por detrás de la marca de agua. Las
+escrituras en contadores particionados no tocan Product; ese stock llega
+por los movimientos. El cliente repite mientras has_more sea True y
+conserva el último token.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Product
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+TOKEN_SALT = "inventory.sync_feed"
+
+_PRODUCT_FIELDS = (
+    "pk", "sku", "name", "category__name", "supplier__name", "unit_price",
+    "stock_quantity", "stock_shards", "minimum_stock", "is_active", "updated_at",
+)
+_MOVEMENT_FIELDS = (
+    "pk", "product_id", "product__sku", "movement_type", "quantity", "balance_after", "reason", "created_at",
+)
+
+
+class InvalidSyncToken(ValueError):
+    """Token manipulado, de otra instalación o con formato desconocido."""
+
+
+def encode_token(updated_at: Optional[datetime], product_id: int, movement_id: int) -> str:
+    return signing.dumps(
+        {"u": updated_at.isoformat() if updated_at else None, "p": product_id, "m": movement_id},
+        salt=TOKEN_SALT,
+        compress=True,
+    )
+
+
+def decode_token(token: str):
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT)
+        updated_at = datetime.fromisoformat(data["u"]) if data["u"] else None
+        return updated_at, int(data["p"]), int(data["m"])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidSyncToken("Token de sincronización no válido.")
+
+
+def _iso(value) -> str:
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value.isoformat()
+
+
+def changed_products(updated_at, product_id, cutoff):
+    """Productos posteriores a (updated_at, id) y anteriores a cutoff, en orden de keyset."""
+    products = Product.objects.filter(updated_at__lt=cutoff)
+    if updated_at is not None:
+        products = products.filter(updated_at__gte=updated_at).exclude(updated_at=updated_at, pk__lte=product_id)
+    return products.order_by("updated_at", "pk")
+
+
+def _movement_page(movement_id, cutoff, limit):
+    page = []
+    rows = StockMovement.objects.filter(pk__gt=movement_id).order_by("pk").values_list(*_MOVEMENT_FIELDS)
+    for row in rows[:limit]:
+        if row[-1] >= cutoff:
+            # Los ids siguientes se confirmaron hace menos del margen: esperan a la próxima.
+            break
+        page.append(row)
+    return page
+
+
+def _mock_changes(token, limit):
+    from config.mock_data import MOCK_CATEGORIES, MOCK_SUPPLIERS, get_mock_movements, get_mock_products
+
+    # Los datos demo no tienen updated_at: el catálogo solo se entrega en la primera sincronización.
+    first = token is None
+    movement_id = 0 if first else decode_token(token)[2]
+    categories = {c.id: c.name for c in MOCK_CATEGORIES}
+    suppliers = {s.id: s.name for s in MOCK_SUPPLIERS}
+    products, tombstones = [], []
+    for p in get_mock_products(active_only=False) if first else []:
+        if not p.is_active:
+            tombstones.append({"id": p.id, "sku": p.sku, "deactivated_at": None})
+            continue
+        products.append({
+            "id": p.id, "sku": p.sku, "name": p.name, "category": categories.get(p.category_id),
+            "supplier": suppliers.get(p.supplier_id), "unit_price": str(p.unit_price),
+            "stock_quantity": p.stock_quantity, "minimum_stock": p.minimum_stock, "updated_at": None,
+        })
+    movements = sorted(get_mock_movements(), key=lambda m: m.id)
+    if first:
+        movement_id, movements = max((m.id for m in movements), default=0), []
+    movements = [m for m in movements if m.id > movement_id][:limit]
+    if movements:
+        movement_id = movements[-1].id
+    return {
+        "products": products,
+        "tombstones": tombstones,
+        "movements": [
+            {
+                "id": m.id, "product_id": m.product_id, "sku": m.product.sku if m.product else None,
+                "movement_type": m.movement_type, "quantity": m.quantity, "balance_after": m.balance_after,
+                "reason": m.reason, "created_at": _iso(m.created_at),
+            }
+            for m in movements
+        ],
+        "next_token": encode_token(None, 0, movement_id),
+        "has_more": len(movements) == limit,
+    }
+
+
+def changes_since(token: Optional[str] = None, *, limit: int = DEFAULT_LIMIT) -> dict:
+    """Una página de cambios posteriores a token (None: sincronización inicial)."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    if getattr(settings, "USE_MOCK_DATA", False):
+        return _mock_changes(token, limit)
+
+    cutoff = timezone.now() - timedelta(seconds=settings.INVENTORY_SYNC_LAG_SECONDS)
+    if token is None:
+        updated_at, product_id = None, 0
+        movement_id = StockMovement.objects.aggregate(last=Max("pk"))["last"] or 0
+    else:
+        updated_at, product_id, movement_id = decode_token(token)
+
+    product_rows = list(changed_products(updated_at, product_id, cutoff).values_list(*_PRODUCT_FIELDS)[:limit])
+    movement_rows = _movement_page(movement_id, cutoff, limit)
+    live = ShardedStockCounter().totals([row[0] for row in product_rows if row[7]])
+
+    products, tombstones = [], []
+    for pk, sku, name, category, supplier, price, stock, shards, minimum, active, changed_at in product_rows:
+        if not active:
+            tombstones.append({"id": pk, "sku": sku, "deactivated_at": _iso(changed_at)})
+            continue
+        products.append({
+            "id": pk, "sku": sku, "name": name, "category": category, "supplier": supplier,
+            "unit_price": str(price), "stock_quantity": live.get(pk, stock) if shards else stock,
+            "minimum_stock": minimum, "updated_at": _iso(changed_at),
+        })
+    if product_rows:
+        updated_at, product_id = product_rows[-1][-1], product_rows[-1][0]
+    if movement_rows:
+        movement_id = movement_rows[-1][0]
+
+    return {
+        "products": products,
+        "tombstones": tombstones,
+        "movements": [
+            {
+                "id": pk, "product_id": product, "sku": sku, "movement_type": movement_type, "quantity": quantity,
+                "balance_after": balance, "reason": reason, "created_at": _iso(created_at),
+            }
+            for pk, product, sku, movement_type, quantity, balance, reason, created_at in movement_rows
+        ],
+        "next_token": encode_token(updated_at, product_id, movement_id),
+        "has_more": len(product_rows) == limit or len(movement_rows) == limit,
+    }
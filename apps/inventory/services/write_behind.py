@@ -0,0 +1,199 @@
+"""
+Buffer de escritura diferida para tráfico de escáneres (muchas ENTRY/EXIT de 1 unidad).
+
+submit() encola el movimiento y devuelve un Future. Un hilo de fondo vacía el
+buffer cada window segundos o al llegar a max_lines líneas: todas las líneas
+pendientes se registran con una sola llamada a register_movements (un UPDATE
+agregado por producto y un bulk_create). Si alguna salida excede el stock, el
+lote se reparte por producto y, en el producto afectado, se rechazan solo las
+salidas que dejarían el stock en negativo; su Future recibe
+InsufficientStockError. close() vacía lo pendiente antes de parar el hilo.
+"""
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import close_old_connections, connection
+
+from apps.inventory.models import StockMovement
+from apps.inventory.services.inventory_service import InsufficientStockError, InventoryService
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        service: InventoryService,
+        *,
+        window: float = 0.05,
+        max_lines: int = 500,
+        background: bool = True,
+    ) -> None:
+        self._service = service
+        self._window = window
+        self._max_lines = max_lines
+        self._background = background
+        self._pending: List[Tuple[dict, Future]] = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.flushes = 0
+        self.lines_flushed = 0
+        self.rejected = 0
+
+    def submit(self, *, product_id, movement_type, quantity, reason="", user=None) -> Future:
+        future: Future = Future()
+        line = {
+            "product_id": product_id,
+            "movement_type": movement_type,
+            "quantity": quantity,
+            "reason": reason,
+            "user": user,
+        }
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("El buffer de escritura diferida está cerrado.")
+            self._pending.append((line, future))
+            full = len(self._pending) >= self._max_lines
+            if self._background:
+                self._start_thread()
+                if full or len(self._pending) == 1:
+                    self._cond.notify()
+        if full and not self._background:
+            self.flush()
+        return future
+
+    def _start_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="stock-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._cond:
+                    if not self._pending and not self._closed:
+                        self._cond.wait()
+                    if len(self._pending) < self._max_lines and not self._closed:
+                        # Ventana: se espera a que se acumulen más líneas.
+                        self._cond.wait_for(
+                            lambda: len(self._pending) >= self._max_lines or self._closed, self._window
+                        )
+                    if self._closed and not self._pending:
+                        return
+                close_old_connections()
+                self.flush()
+        finally:
+            connection.close()
+
+    def flush(self) -> int:
+        """Registra las líneas pendientes; devuelve cuántas se procesaron."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+                self._cond.notify_all()
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+            except Exception as exc:
+                logger.exception("Error vaciando el buffer de escritura diferida (%s líneas)", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            self.flushes += 1
+            self.lines_flushed += len(batch)
+            return len(batch)
+
+    def _write(self, batch: List[Tuple[dict, Future]]) -> None:
+        try:
+            movements = self._service.register_movements([line for line, _ in batch])
+        except (InsufficientStockError, ObjectDoesNotExist):
+            # Un producto problemático no debe arrastrar al resto del lote.
+            by_product: "OrderedDict[int, list]" = OrderedDict()
+            for entry in batch:
+                by_product.setdefault(entry[0]["product_id"], []).append(entry)
+            for entries in by_product.values():
+                self._write_product(entries)
+            return
+        for (_, future), movement in zip(batch, movements):
+            future.set_result(movement)
+
+    def _write_product(self, entries: List[Tuple[dict, Future]]) -> None:
+        """Aplica las líneas de un producto descartando solo las salidas que no caben."""
+        for _ in range(3):
+            try:
+                movements = self._service.register_movements([line for line, _ in entries])
+            except InsufficientStockError:
+                entries = self._admit(entries)
+                if not entries:
+                    return
+                continue
+            except ObjectDoesNotExist as exc:
+                for _, future in entries:
+                    future.set_exception(exc)
+                return
+            for (_, future), movement in zip(entries, movements):
+                future.set_result(movement)
+            return
+        # El stock cambió entre la lectura y el UPDATE en cada intento: línea a línea.
+        for line, future in entries:
+            try:
+                future.set_result(self._service.register_movements([line])[0])
+            except InsufficientStockError as exc:
+                self._reject(future, exc)
+
+    def _admit(self, entries: List[Tuple[dict, Future]]) -> List[Tuple[dict, Future]]:
+        product_id = entries[0][0]["product_id"]
+        stock = self._service.current_stock(product_id)
+        admitted = []
+        for line, future in entries:
+            movement_type, quantity = line["movement_type"], line["quantity"]
+            if movement_type == StockMovement.EXIT and quantity > stock:
+                self._reject(
+                    future,
+                    InsufficientStockError(f"La salida excede el stock disponible. Stock actual: {stock}."),
+                )
+                continue
+            if movement_type == StockMovement.ADJUSTMENT:
+                stock = quantity
+            else:
+                stock += quantity if movement_type == StockMovement.ENTRY else -quantity
+            admitted.append((line, future))
+        return admitted
+
+    def _reject(self, future: Future, exc: Exception) -> None:
+        self.rejected += 1
+        future.set_exception(exc)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Vacía lo pendiente y detiene el hilo."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+
+@lru_cache(maxsize=None)
+def get_write_behind_buffer():
+    """Buffer compartido si INVENTORY_WRITE_BEHIND_ENABLED; None en caso contrario."""
+    if not getattr(settings, "INVENTORY_WRITE_BEHIND_ENABLED", False):
+        return None
+    buffer = WriteBehindBuffer(
+        InventoryService(DjangoProductRepository()),
+        window=getattr(settings, "INVENTORY_WRITE_BEHIND_WINDOW_MS", 50) / 1000,
+        max_lines=getattr(settings, "INVENTORY_WRITE_BEHIND_MAX_LINES", 500),
+    )
+    atexit.register(buffer.close)
+    return buffer
@@ -0,0 +1,130 @@
+"""
+Tests for the threshold-crossing low-stock alert engine and its sinks.
+No database required.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+
+from django.core import mail
+from django.test import SimpleTestCase, override_settings
+
+from apps.inventory.alerts.engine import LOW, RECOVERED, LowStockAlertEngine
+from apps.inventory.alerts.sinks import EmailAlertSink, WebhookAlertSink
+
+
+class ListSink:
+    def __init__(self):
+        self.digests = []
+
+    def send(self, alerts):
+        self.digests.append([(a.kind, a.sku, a.stock) for a in alerts])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def product(pk, stock, minimum=5):
+    return SimpleNamespace(pk=pk, sku=f"SKU-{pk}", stock_quantity=stock, minimum_stock=minimum)
+
+
+def exit_of(quantity):
+    return SimpleNamespace(movement_type="EXIT", quantity=quantity)
+
+
+def entry_of(quantity):
+    return SimpleNamespace(movement_type="ENTRY", quantity=quantity)
+
+
+class TestLowStockAlertEngine(SimpleTestCase):
+    def setUp(self):
+        self.sink = ListSink()
+        self.engine = LowStockAlertEngine([self.sink])
+
+    def test_alerts_only_when_crossing_threshold(self):
+        self.engine.observe(product(1, 6), exit_of(1))
+        self.engine.observe(product(1, 5), exit_of(1))
+        self.engine.observe(product(1, 4), exit_of(1))
+        self.engine.observe(product(1, 3), exit_of(1))
+        self.assertEqual(self.sink.digests, [[(LOW, "SKU-1", 5)]])
+        self.assertEqual(self.engine.counters["suppressed"], 2)
+        self.assertEqual(self.engine.counters["emitted"], 1)
+
+    def test_recovery_is_reported_once(self):
+        self.engine.observe(product(1, 2), exit_of(5))
+        self.engine.observe(product(1, 10), entry_of(8))
+        self.engine.observe(product(1, 12), entry_of(2))
+        self.assertEqual(self.sink.digests, [[(LOW, "SKU-1", 2)], [(RECOVERED, "SKU-1", 10)]])
+
+    def test_previous_state_is_derived_from_movement(self):
+        # 3 + 1 = 4 <= 5: ya estaba bajo mínimo antes de esta salida.
+        self.engine.observe(product(1, 3), exit_of(1))
+        self.assertEqual(self.sink.digests, [])
+        self.assertEqual(self.engine.counters["suppressed"], 1)
+
+    def test_alerts_are_coalesced_into_window_digest(self):
+        clock = FakeClock()
+        engine = LowStockAlertEngine([self.sink], window_seconds=60, clock=clock)
+        self.addCleanup(engine.flush)
+        engine.observe(product(1, 4), exit_of(2))
+        clock.now = 30
+        engine.observe(product(2, 1), exit_of(5))
+        self.assertEqual(self.sink.digests, [])
+        clock.now = 61
+        engine.observe(product(3, 0), exit_of(6))
+        self.assertEqual(len(self.sink.digests), 1)
+        self.assertEqual([sku for _, sku, _ in self.sink.digests[0]], ["SKU-1", "SKU-2", "SKU-3"])
+        self.assertEqual(engine.counters["digests"], 1)
+
+    def test_failing_sink_does_not_block_others(self):
+        class BrokenSink:
+            def send(self, alerts):
+                raise RuntimeError("boom")
+
+        engine = LowStockAlertEngine([BrokenSink(), self.sink])
+        with self.assertLogs("apps.inventory.alerts.engine", level="ERROR"):
+            engine.observe(product(1, 0), exit_of(6))
+        self.assertEqual(len(self.sink.digests), 1)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class TestEmailAlertSink(SimpleTestCase):
+    def test_digest_sent_as_single_email(self):
+        engine = LowStockAlertEngine([EmailAlertSink(["almacen@example.com"])], window_seconds=3600)
+        engine.observe(product(1, 0), exit_of(6))
+        engine.observe(product(2, 1), exit_of(5))
+        engine.flush()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("SKU=SKU-1", mail.outbox[0].body)
+        self.assertIn("SKU=SKU-2", mail.outbox[0].body)
+
+
+class TestWebhookAlertSink(SimpleTestCase):
+    def test_posts_json_digest(self):
+        received = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        sink = WebhookAlertSink(f"http://127.0.0.1:{server.server_port}/alerts")
+        LowStockAlertEngine([sink]).observe(product(7, 1), exit_of(10))
+        self.assertEqual(received[0]["alerts"][0]["sku"], "SKU-7")
+        self.assertEqual(received[0]["alerts"][0]["kind"], LOW)
@@ -0,0 +1,71 @@
+"""
+Tests for cycle-count reconciliation.
+"""
+import io
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.inventory.models import CycleCountSession, StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.cycle_count import CycleCountReconciler
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+from config.file_readers import read_csv, read_jsonl
+
+
+class TestCycleCountReconciler(TestCase):
+    def setUp(self):
+        self.monitor = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=10)
+        self.mouse = Product.objects.create(name="Mouse", sku="MOU-001", unit_price="10.00", stock_quantity=4)
+        self.cable = Product.objects.create(name="Cable", sku="CAB-001", unit_price="2.50", stock_quantity=30)
+        self.reconciler = CycleCountReconciler(InventoryService(DjangoProductRepository(), StockSubject()))
+
+    def counts(self, *rows):
+        return read_csv(io.StringIO("sku,counted_quantity\n" + "".join(f"{r}\n" for r in rows)))
+
+    def test_adjusts_only_skus_with_variance(self):
+        report = self.reconciler.run(
+            self.counts("MON-001,8", "MOU-001,4", "CAB-001,20", "CAB-001,12"), label="Pasillo 4"
+        )
+        self.assertEqual([line.sku for line in report.variances], ["MON-001", "CAB-001"])
+        self.assertEqual(report.units_variance, -2 + 2)
+        self.assertEqual(report.value_variance, Decimal("-195.00"))
+
+        self.monitor.refresh_from_db()
+        self.cable.refresh_from_db()
+        self.assertEqual((self.monitor.stock_quantity, self.cable.stock_quantity), (8, 32))
+        adjustments = StockMovement.objects.filter(movement_type=StockMovement.ADJUSTMENT)
+        self.assertEqual(adjustments.count(), 2)
+        self.assertFalse(adjustments.filter(product=self.mouse).exists())
+
+        session = CycleCountSession.objects.get()
+        self.assertEqual((session.skus_counted, session.skus_adjusted), (3, 2))
+        self.assertTrue(adjustments.first().reason.startswith(f"Conteo cíclico #{session.pk}"))
+
+    def test_dry_run_and_invalid_rows(self):
+        report = self.reconciler.run(self.counts("MON-001,0", "XXX-999,3", "MOU-001,abc"), dry_run=True)
+        self.assertEqual(report.invalid, 2)
+        self.assertEqual([(line.sku, line.variance) for line in report.variances], [("MON-001", -10)])
+        self.assertIsNone(report.session)
+        self.monitor.refresh_from_db()
+        self.assertEqual(self.monitor.stock_quantity, 10)
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_non_object_jsonl_lines_are_reported(self):
+        data = io.StringIO('[1, 2]\n5\n{"sku": "MON-001", "counted_quantity": 9}\n')
+        report = self.reconciler.run(read_jsonl(data))
+        self.assertEqual([row for row, _ in report.errors], [1, 2])
+        self.assertEqual([(line.sku, line.variance) for line in report.variances], [("MON-001", -1)])
+        self.monitor.refresh_from_db()
+        self.assertEqual(self.monitor.stock_quantity, 9)
+
+    def test_sharded_product_uses_live_stock(self):
+        counter = ShardedStockCounter()
+        counter.enable(self.monitor.pk, 2)
+        counter.apply(Product.objects.get(pk=self.monitor.pk), delta=-3)
+        report = self.reconciler.run(self.counts("MON-001,7"))
+        self.assertEqual(report.variances, [])
+        self.assertEqual(report.session.skus_adjusted, 0)
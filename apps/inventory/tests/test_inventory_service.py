@@ -4,10 +4,11 @@ Uses the real database (Django TestCase) because register_movement
 writes StockMovement records via the ORM.
 """
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from apps.inventory.models import StockMovement
-from apps.inventory.observers.base import StockSubject
+from apps.inventory.observers.base import StockObserver, StockSubject
 from apps.inventory.observers.stock_alert_observer import LowStockAlertObserver
 from apps.inventory.services.inventory_service import InsufficientStockError, InventoryService
 from apps.products.models import Product
@@ -159,3 +160,201 @@ class TestInventoryServiceObserverIntegration(TestCase):
                 reason="Compra",
                 user=self.user,
             )
+
+
+class RecordingObserver(StockObserver):
+    def __init__(self):
+        self.calls = []
+
+    def update(self, *, product, movement):
+        self.calls.append((product.sku, product.stock_quantity, movement.pk))
+
+
+class ExitOnlyObserver(RecordingObserver):
+    movement_types = (StockMovement.EXIT,)
+
+
+class TestInventoryServiceBatch(TestCase):
+    def setUp(self):
+        self.teclado = Product.objects.create(
+            name="Teclado", sku="TEC-001", unit_price="25.00",
+            stock_quantity=10, minimum_stock=5,
+        )
+        self.mouse = Product.objects.create(
+            name="Mouse", sku="MOU-001", unit_price="15.00",
+            stock_quantity=8, minimum_stock=3,
+        )
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.observer = RecordingObserver()
+        self.service = make_service(observers=[self.observer])
+
+    def test_batch_applies_net_stock_per_product(self):
+        movements = self.service.register_movements(
+            [
+                {"product_id": self.teclado.pk, "movement_type": StockMovement.ENTRY, "quantity": 5},
+                {"product_id": self.mouse.pk, "movement_type": StockMovement.EXIT, "quantity": 8},
+                {"product_id": self.teclado.pk, "movement_type": StockMovement.EXIT, "quantity": 12},
+                {"product_id": self.mouse.pk, "movement_type": StockMovement.ADJUSTMENT, "quantity": 4},
+            ],
+            user=self.user,
+        )
+        self.teclado.refresh_from_db()
+        self.mouse.refresh_from_db()
+        self.assertEqual(self.teclado.stock_quantity, 3)
+        self.assertEqual(self.mouse.stock_quantity, 4)
+        self.assertEqual(len(movements), 4)
+        self.assertTrue(all(m.pk for m in movements))
+        self.assertEqual(StockMovement.objects.filter(performed_by=self.user).count(), 4)
+
+    def test_batch_notifies_once_per_product(self):
+        self.service.register_movements(
+            [
+                {"product_id": self.teclado.pk, "movement_type": StockMovement.EXIT, "quantity": 1},
+                {"product_id": self.teclado.pk, "movement_type": StockMovement.EXIT, "quantity": 1},
+                {"product_id": self.mouse.pk, "movement_type": StockMovement.ENTRY, "quantity": 1},
+            ],
+            user=self.user,
+        )
+        self.assertEqual(sorted(call[:2] for call in self.observer.calls), [("MOU-001", 9), ("TEC-001", 8)])
+
+    def test_batch_filter_sees_every_movement_type_of_a_product(self):
+        exit_only = ExitOnlyObserver()
+        service = make_service(observers=[exit_only])
+        service.register_movements(
+            [
+                {"product_id": self.teclado.pk, "movement_type": StockMovement.EXIT, "quantity": 7},
+                {"product_id": self.teclado.pk, "movement_type": StockMovement.ENTRY, "quantity": 1},
+                {"product_id": self.mouse.pk, "movement_type": StockMovement.ENTRY, "quantity": 1},
+            ],
+            user=self.user,
+        )
+        self.assertEqual([call[:2] for call in exit_only.calls], [("TEC-001", 4)])
+
+    def test_batch_overdraw_rejects_whole_batch(self):
+        with self.assertRaises(InsufficientStockError):
+            self.service.register_movements(
+                [
+                    {"product_id": self.mouse.pk, "movement_type": StockMovement.ENTRY, "quantity": 2},
+                    {"product_id": self.teclado.pk, "movement_type": StockMovement.EXIT, "quantity": 6},
+                    {"product_id": self.teclado.pk, "movement_type": StockMovement.EXIT, "quantity": 6},
+                ],
+                user=self.user,
+            )
+        self.mouse.refresh_from_db()
+        self.teclado.refresh_from_db()
+        self.assertEqual(self.mouse.stock_quantity, 8)
+        self.assertEqual(self.teclado.stock_quantity, 10)
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual(self.observer.calls, [])
+
+    def test_batch_with_inactive_product_raises(self):
+        self.mouse.is_active = False
+        self.mouse.save()
+        with self.assertRaises(Product.DoesNotExist):
+            self.service.register_movements(
+                [{"product_id": self.mouse.pk, "movement_type": StockMovement.ENTRY, "quantity": 1}],
+                user=self.user,
+            )
+
+    def test_empty_batch_returns_empty_list(self):
+        self.assertEqual(self.service.register_movements([], user=self.user), [])
+
+
+class TestConditionalStockUpdate(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Disco", sku="DIS-001", unit_price="60.00",
+            stock_quantity=5, minimum_stock=1,
+        )
+        self.repo = DjangoProductRepository()
+
+    def test_conditional_update_refuses_overdraw(self):
+        self.assertFalse(self.repo.apply_stock_change(self.product.pk, delta=-6, required=6))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 5)
+
+    def test_stale_instance_does_not_overwrite_concurrent_exit(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        service = make_service()
+        service.register_movement(
+            product_id=self.product.pk, movement_type=StockMovement.EXIT,
+            quantity=3, reason="", user=None,
+        )
+        service.register_movement(
+            product_id=stale.pk, movement_type=StockMovement.EXIT,
+            quantity=2, reason="", user=None,
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 0)
+        with self.assertRaises(InsufficientStockError):
+            service.register_movement(
+                product_id=stale.pk, movement_type=StockMovement.EXIT,
+                quantity=1, reason="", user=None,
+            )
+
+    def test_adjustment_then_exit_in_batch_is_validated_against_adjusted_value(self):
+        service = make_service()
+        with self.assertRaises(InsufficientStockError):
+            service.register_movements([
+                {"product_id": self.product.pk, "movement_type": StockMovement.ADJUSTMENT, "quantity": 2},
+                {"product_id": self.product.pk, "movement_type": StockMovement.EXIT, "quantity": 3},
+            ])
+        service.register_movements([
+            {"product_id": self.product.pk, "movement_type": StockMovement.EXIT, "quantity": 5},
+            {"product_id": self.product.pk, "movement_type": StockMovement.ADJUSTMENT, "quantity": 2},
+            {"product_id": self.product.pk, "movement_type": StockMovement.EXIT, "quantity": 2},
+        ])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 0)
+
+    def test_check_constraint_rejects_negative_stock(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Product.objects.filter(pk=self.product.pk).update(stock_quantity=-1)
+
+
+class TestInventoryServiceIdempotency(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Lector", sku="LEC-001", unit_price="30.00",
+            stock_quantity=10, minimum_stock=2,
+        )
+        self.observer = RecordingObserver()
+        self.service = make_service(observers=[self.observer])
+
+    def exit(self, quantity, key):
+        return self.service.register_movement(
+            product_id=self.product.pk, movement_type=StockMovement.EXIT,
+            quantity=quantity, reason="Escáner", user=None, idempotency_key=key,
+        )
+
+    def test_retry_returns_original_without_reapplying(self):
+        first = self.exit(4, "scan-1")
+        retry = self.exit(4, "scan-1")
+        self.assertEqual(first.pk, retry.pk)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 6)
+        self.assertEqual(StockMovement.objects.count(), 1)
+        self.assertEqual(len(self.observer.calls), 1)
+
+    def test_retry_succeeds_even_if_stock_is_now_insufficient(self):
+        self.exit(10, "scan-2")
+        self.assertEqual(self.exit(10, "scan-2").quantity, 10)
+
+    def test_batch_skips_known_and_duplicate_keys(self):
+        self.exit(1, "k1")
+        movements = self.service.register_movements([
+            {"product_id": self.product.pk, "movement_type": StockMovement.EXIT, "quantity": 1, "idempotency_key": "k1"},
+            {"product_id": self.product.pk, "movement_type": StockMovement.EXIT, "quantity": 2, "idempotency_key": "k2"},
+            {"product_id": self.product.pk, "movement_type": StockMovement.EXIT, "quantity": 2, "idempotency_key": "k2"},
+            {"product_id": self.product.pk, "movement_type": StockMovement.EXIT, "quantity": 3},
+        ])
+        self.assertEqual(movements[0].idempotency_key, "k1")
+        self.assertEqual(movements[1].pk, movements[2].pk)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 4)
+        self.assertEqual(StockMovement.objects.count(), 3)
+
+    def test_movements_without_key_are_not_deduplicated(self):
+        self.exit(1, None)
+        self.exit(1, None)
+        self.assertEqual(StockMovement.objects.count(), 2)
@@ -0,0 +1,128 @@
+"""
+Tests for cold-storage archival of old stock movements.
+"""
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import date, datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.inventory.models import ArchivedMovementFile, DailyMovementRollup, StockMovement
+from apps.inventory.services import movement_archive, movement_rollups
+from apps.products.models import Product
+
+
+def at(year, month, day):
+    return timezone.make_aware(datetime(year, month, day, 12))
+
+
+class TestMovementArchive(TestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        override = override_settings(INVENTORY_ARCHIVE_DIR=self.archive_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=10)
+        for when, movement_type in (
+            (at(2024, 1, 5), "ENTRY"),
+            (at(2024, 1, 20), "EXIT"),
+            (at(2024, 3, 2), "ENTRY"),
+            (at(2024, 6, 1), "EXIT"),
+        ):
+            StockMovement.objects.create(product=self.product, movement_type=movement_type, quantity=2, created_at=when)
+        movement_rollups.rebuild()
+
+    def test_archives_complete_months_before_horizon(self):
+        files = movement_archive.archive_before(date(2024, 4, 15))
+        self.assertEqual([(f.month, f.rows) for f in files], [(date(2024, 1, 1), 2), (date(2024, 3, 1), 1)])
+        self.assertEqual(StockMovement.objects.count(), 1)
+        self.assertEqual(DailyMovementRollup.objects.count(), 4)  # los agregados conservan lo archivado
+
+        with gzip.open(f"{self.archive_dir}/{files[0].path}", "rt") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([r["movement_type"] for r in rows], ["ENTRY", "EXIT"])
+        self.assertEqual(rows[0]["product__sku"], "MON-001")
+
+        # Un movimiento histórico importado después va a un fichero nuevo del mismo mes.
+        StockMovement.objects.create(product=self.product, movement_type="ENTRY", quantity=1, created_at=at(2024, 1, 9))
+        late = movement_archive.archive_before(date(2024, 4, 15))
+        self.assertEqual(late[0].path, "2024/movements-2024-01-part2.jsonl.gz")
+        self.assertEqual(ArchivedMovementFile.objects.filter(month=date(2024, 1, 1)).count(), 2)
+
+    def test_rebuild_keeps_rollups_of_archived_months(self):
+        movement_archive.archive_before(date(2024, 4, 15))
+        before = sorted(DailyMovementRollup.objects.values_list("day", "quantity_total"))
+        self.assertEqual(movement_rollups.rebuild(), 1)
+        self.assertEqual(movement_rollups.rebuild(since=date(2024, 1, 1)), 1)
+        self.assertEqual(sorted(DailyMovementRollup.objects.values_list("day", "quantity_total")), before)
+
+    def test_archived_reads_stop_at_the_page(self):
+        movement_archive.archive_before(date(2024, 4, 15))
+        archived = movement_archive.read_archived(start=at(2024, 1, 1))
+        with mock.patch.object(movement_archive, "_iter_file", wraps=movement_archive._iter_file) as opened:
+            newest = archived.older(None, 1)
+        self.assertEqual([m.created_at.date() for m in newest], [date(2024, 3, 2)])
+        self.assertEqual(opened.call_count, 1)  # solo el fichero de marzo
+
+        cursor = (newest[0].created_at, newest[0].pk)
+        self.assertEqual([m.created_at.day for m in archived.older(cursor, 5)], [20, 5])
+        self.assertEqual(archived.newer((at(2024, 1, 5), 0), 5)[0].created_at, at(2024, 1, 5))
+        self.assertEqual(archived.approximate_count(), 3)
+
+    def test_pages_stream_each_month(self):
+        movement_archive.archive_before(date(2024, 4, 15))
+        # Importado después de archivar enero: va a otra parte del mes, con id mayor.
+        StockMovement.objects.create(product=self.product, movement_type="EXIT", quantity=1, created_at=at(2024, 1, 9))
+        movement_archive.archive_before(date(2024, 4, 15))
+        archived = movement_archive.read_archived(start=at(2024, 1, 1))
+        with mock.patch.object(movement_archive, "sorted", create=True, side_effect=AssertionError):
+            self.assertEqual([m.created_at.day for m in archived.older((at(2024, 1, 20), 0), 2)], [9, 5])
+            self.assertEqual([m.created_at.day for m in archived.newer((at(2024, 1, 5), 0), 3)], [5, 9, 20])
+
+            # by_id ascendente sale tal cual de los ficheros: por id dentro de cada mes.
+            by_id = [(m.created_at.month, m.pk) for m in archived.iterate(newest_first=False, by_id=True)]
+        self.assertEqual(by_id, sorted(by_id))
+        self.assertEqual([month for month, _ in by_id], [1, 1, 1, 3])
+
+    def test_dry_run_writes_nothing(self):
+        files = movement_archive.archive_before(date(2024, 4, 15), dry_run=True)
+        self.assertEqual(sum(f.rows for f in files), 3)
+        self.assertEqual(StockMovement.objects.count(), 4)
+        self.assertFalse(ArchivedMovementFile.objects.exists())
+
+    def test_reads_archived_rows(self):
+        movement_archive.archive_before(date(2024, 4, 15))
+        self.assertTrue(movement_archive.needs_archive(at(2024, 1, 10)))
+        self.assertFalse(movement_archive.needs_archive(at(2024, 4, 1)))
+
+        archived = list(
+            movement_archive.read_archived(start=at(2024, 1, 10), end=at(2024, 3, 2), movement_type="EXIT")
+        )
+        self.assertEqual([m.created_at.date() for m in archived], [date(2024, 1, 20)])
+        self.assertEqual(archived[0].product, self.product)
+
+
+    @override_settings(USE_MOCK_DATA=False)
+    def test_report_interleaves_late_live_rows_with_archive(self):
+        movement_archive.archive_before(date(2024, 4, 15))
+        # Importado después de archivar enero: sigue en la tabla, entre filas archivadas.
+        StockMovement.objects.create(product=self.product, movement_type="EXIT", quantity=1, created_at=at(2024, 1, 25))
+        get_user_model().objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        url = reverse("reports:movement_report")
+        with mock.patch("apps.reports.views.PAGE_SIZE", 2):
+            page = self.client.get(url, {"date_from": "2024-01-01"}).context["page_obj"]
+            seen = [m.created_at.date() for m in page]
+            while page.has_next:
+                page = self.client.get(f"{url}?{page.next_query}").context["page_obj"]
+                seen += [m.created_at.date() for m in page]
+        self.assertEqual(
+            seen, [date(2024, 6, 1), date(2024, 3, 2), date(2024, 1, 25), date(2024, 1, 20), date(2024, 1, 5)]
+        )
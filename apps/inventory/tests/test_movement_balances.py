@@ -0,0 +1,59 @@
+"""
+Tests for balance_after / signed_delta on stock movements.
+"""
+from django.test import TestCase
+
+from apps.inventory.models import StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.movement_balances import backfill_movement_balances
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+
+def line(product, movement_type, quantity):
+    return {"product_id": product.pk, "movement_type": movement_type, "quantity": quantity}
+
+
+class TestMovementBalances(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=10)
+        self.service = InventoryService(DjangoProductRepository(), StockSubject())
+
+    def balances(self):
+        return list(
+            StockMovement.objects.order_by("id").values_list("movement_type", "signed_delta", "balance_after")
+        )
+
+    def test_balance_is_recorded_at_write_time(self):
+        self.service.register_movements(
+            [
+                line(self.product, StockMovement.EXIT, 3),
+                line(self.product, StockMovement.ADJUSTMENT, 20),
+                line(self.product, StockMovement.ENTRY, 5),
+            ]
+        )
+        self.service.register_movements([line(self.product, StockMovement.EXIT, 4)])
+        self.assertEqual(
+            self.balances(),
+            [("EXIT", -3, 7), ("ADJUSTMENT", 13, 20), ("ENTRY", 5, 25), ("EXIT", -4, 21)],
+        )
+
+    def test_backfill_from_current_stock(self):
+        self.service.register_movements(
+            [line(self.product, StockMovement.ENTRY, 5), line(self.product, StockMovement.EXIT, 2)]
+        )
+        StockMovement.objects.update(signed_delta=None, balance_after=None)
+        report = backfill_movement_balances(chunk_size=1)
+        self.assertEqual((report.products, report.movements, report.without_balance), (1, 2, 0))
+        self.assertEqual(self.balances(), [("ENTRY", 5, 15), ("EXIT", -2, 13)])
+
+    def test_backfill_before_first_adjustment_is_unknown(self):
+        self.service.register_movements(
+            [line(self.product, StockMovement.EXIT, 1), line(self.product, StockMovement.ADJUSTMENT, 4)]
+        )
+        self.service.register_movements([line(self.product, StockMovement.ENTRY, 2)])
+        StockMovement.objects.update(signed_delta=None, balance_after=None)
+        report = backfill_movement_balances()
+        self.assertEqual(report.without_balance, 1)
+        self.assertEqual(self.balances(), [("EXIT", -1, None), ("ADJUSTMENT", None, 4), ("ENTRY", 2, 6)])
@@ -0,0 +1,96 @@
+"""
+Tests for the streaming CSV/JSONL movement importer.
+"""
+import io
+
+from django.test import TestCase
+
+from apps.inventory.models import StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InventoryService, normalize_idempotency_key
+from apps.inventory.services.movement_import import MovementImporter
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+from config.file_readers import read_csv, read_jsonl
+
+
+class TestMovementImporter(TestCase):
+    def setUp(self):
+        self.monitor = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=10)
+        self.mouse = Product.objects.create(name="Mouse", sku="MOU-001", unit_price="10.00", stock_quantity=0)
+        self.importer = MovementImporter(
+            InventoryService(DjangoProductRepository(), StockSubject()), chunk_size=2
+        )
+
+    def test_csv_import_in_chunks(self):
+        data = io.StringIO(
+            "sku,movement_type,quantity,reason,created_at\n"
+            "MON-001,EXIT,3,Venta,2024-01-05T10:00:00\n"
+            "MOU-001,ENTRY,20,Compra,2024-01-05T11:00:00\n"
+            "MOU-001,exit,5,,\n"
+        )
+        report = self.importer.run(read_csv(data))
+        self.assertEqual((report.rows, report.imported, report.invalid), (3, 3, 0))
+        self.monitor.refresh_from_db()
+        self.mouse.refresh_from_db()
+        self.assertEqual((self.monitor.stock_quantity, self.mouse.stock_quantity), (7, 15))
+        first = StockMovement.objects.get(reason="Venta")
+        self.assertEqual(first.created_at.year, 2024)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        data = io.StringIO(
+            '{"sku": "MON-001", "movement_type": "ENTRY", "quantity": 1}\n'
+            '{"sku": "NOPE", "movement_type": "ENTRY", "quantity": 1}\n'
+            '{"sku": "MON-001", "movement_type": "MOVE", "quantity": 1}\n'
+            '{"sku": "MON-001", "movement_type": "ENTRY", "quantity": "x"}\n'
+            "not json\n"
+        )
+        report = self.importer.run(read_jsonl(data))
+        self.assertEqual((report.rows, report.imported, report.invalid), (5, 1, 4))
+        self.assertEqual([row for row, _ in report.errors], [2, 3, 4, 5])
+
+    def test_malformed_values_are_invalid_rows(self):
+        data = io.StringIO(
+            '{"sku": "MON-001", "movement_type": "ENTRY", "quantity": 1, "created_at": "2024-13-45T00:00:00"}\n'
+            '{"sku": 1001, "movement_type": "ENTRY", "quantity": 1}\n'
+            '["MON-001", "ENTRY", 1]\n'
+            "7\n"
+            '{"sku": "MON-001", "movement_type": "ENTRY", "quantity": 2}\n'
+        )
+        report = self.importer.run(read_jsonl(data))
+        self.assertEqual((report.rows, report.imported, report.invalid), (5, 1, 4))
+        self.assertEqual([row for row, _ in report.errors], [1, 2, 3, 4])
+        self.monitor.refresh_from_db()
+        self.assertEqual(self.monitor.stock_quantity, 12)
+
+    def test_overdraw_rejects_only_offending_rows(self):
+        data = io.StringIO(
+            "sku,movement_type,quantity\n"
+            "MON-001,ENTRY,1\n"
+            "MOU-001,EXIT,1\n"
+        )
+        report = self.importer.run(read_csv(data))
+        self.assertEqual((report.imported, report.rejected), (1, 1))
+        self.monitor.refresh_from_db()
+        self.assertEqual(self.monitor.stock_quantity, 11)
+
+    def test_reimport_with_idempotency_keys_is_a_noop(self):
+        content = "sku,movement_type,quantity,idempotency_key\nMON-001,EXIT,4,erp-1\n"
+        self.importer.run(read_csv(io.StringIO(content)))
+        self.importer.run(read_csv(io.StringIO(content)))
+        self.monitor.refresh_from_db()
+        self.assertEqual(self.monitor.stock_quantity, 6)
+        self.assertEqual(StockMovement.objects.count(), 1)
+
+    def test_long_keys_sharing_a_prefix_do_not_collide(self):
+        prefix = "erp-" + "x" * 70
+        content = f"sku,movement_type,quantity,idempotency_key\nMON-001,EXIT,1,{prefix}-a\nMON-001,EXIT,2,{prefix}-b\n"
+        report = self.importer.run(read_csv(io.StringIO(content)))
+        self.assertEqual(report.imported, 2)
+        self.monitor.refresh_from_db()
+        self.assertEqual(self.monitor.stock_quantity, 7)
+        # La misma clave larga por la web se reconoce como el movimiento importado.
+        stored = InventoryService(DjangoProductRepository()).find_by_idempotency_key(
+            normalize_idempotency_key(f"{prefix}-a")
+        )
+        self.assertEqual(stored.quantity, 1)
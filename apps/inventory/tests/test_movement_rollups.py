@@ -0,0 +1,110 @@
+"""
+Tests for the incrementally maintained daily movement rollups.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.inventory.models import DailyMovementRollup, StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services import movement_rollups
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+
+class TestDailyMovementRollups(TestCase):
+    def setUp(self):
+        self.monitor = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=10)
+        self.mouse = Product.objects.create(name="Mouse", sku="MOU-001", unit_price="10.00", stock_quantity=10)
+        self.service = InventoryService(DjangoProductRepository(), StockSubject())
+        self.yesterday = timezone.now() - timedelta(days=1)
+
+    def line(self, product, movement_type, quantity, **extra):
+        return dict(product_id=product.pk, movement_type=movement_type, quantity=quantity, **extra)
+
+    def snapshot(self):
+        return sorted(
+            DailyMovementRollup.objects.values_list("product__sku", "day", "movement_type", "quantity_total", "movement_count")
+        )
+
+    def test_service_updates_rollups_in_the_same_transaction(self):
+        self.service.register_movements(
+            [
+                self.line(self.monitor, StockMovement.EXIT, 2),
+                self.line(self.monitor, StockMovement.EXIT, 3),
+                self.line(self.mouse, StockMovement.ENTRY, 4, created_at=self.yesterday),
+            ]
+        )
+        self.service.register_movements([self.line(self.monitor, StockMovement.EXIT, 1)])
+        today = timezone.localdate()
+        self.assertEqual(
+            self.snapshot(),
+            [
+                ("MON-001", today, "EXIT", 6, 3),
+                ("MOU-001", timezone.localdate(self.yesterday), "ENTRY", 4, 1),
+            ],
+        )
+        self.assertEqual(movement_rollups.total_movements(), 4)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.service.register_movements(
+            [
+                self.line(self.monitor, StockMovement.ENTRY, 5, created_at=self.yesterday),
+                self.line(self.monitor, StockMovement.ADJUSTMENT, 7),
+                self.line(self.mouse, StockMovement.EXIT, 1),
+            ]
+        )
+        incremental = self.snapshot()
+        DailyMovementRollup.objects.all().delete()
+        self.assertEqual(movement_rollups.rebuild(), 3)
+        self.assertEqual(self.snapshot(), incremental)
+        movement_rollups.rebuild(since=timezone.localdate())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rebuild_since_starts_at_local_midnight(self):
+        today = timezone.localdate()
+        midnight = timezone.make_aware(datetime.combine(today, time.min))
+        self.service.register_movements(
+            [
+                self.line(self.monitor, StockMovement.ENTRY, 5, created_at=midnight - timedelta(seconds=1)),
+                self.line(self.monitor, StockMovement.ENTRY, 3, created_at=midnight),
+            ]
+        )
+        DailyMovementRollup.objects.filter(day=today).delete()
+        with CaptureQueriesContext(connection) as queries:
+            movement_rollups.rebuild(since=today)
+        self.assertEqual(
+            self.snapshot(),
+            [("MON-001", today - timedelta(days=1), "ENTRY", 5, 1), ("MON-001", today, "ENTRY", 3, 1)],
+        )
+        select = next(q["sql"] for q in queries if "inventory_stockmovement" in q["sql"] and "GROUP BY" in q["sql"])
+        self.assertIn('"inventory_stockmovement"."created_at" >=', select.split("WHERE", 1)[1])
+
+    def test_volume_queries(self):
+        self.service.register_movements(
+            [self.line(self.monitor, StockMovement.ENTRY, 5), self.line(self.mouse, StockMovement.EXIT, 2)]
+        )
+        daily = movement_rollups.daily_volume()
+        self.assertEqual([(r["movements"], r["entries"], r["exits"]) for r in daily], [(2, 5, 2)])
+        monthly = movement_rollups.monthly_volume_by_product(product_id=self.mouse.pk)
+        self.assertEqual([(r["product__sku"], r["exits"]) for r in monthly], [("MOU-001", 2)])
+
+    def test_sharded_products_spread_rollups_across_rows(self):
+        ShardedStockCounter().enable(self.monitor.pk, 4)
+        for _ in range(12):
+            self.service.register_movement(
+                product_id=self.monitor.pk, movement_type=StockMovement.ENTRY, quantity=2, reason="", user=None
+            )
+        rows = DailyMovementRollup.objects.filter(product=self.monitor)
+        self.assertGreater(rows.count(), 1)
+        self.assertTrue(set(rows.values_list("shard", flat=True)) <= {0, 1, 2, 3})
+        daily = movement_rollups.daily_volume(product_id=self.monitor.pk)
+        self.assertEqual([(r["movements"], r["entries"]) for r in daily], [(12, 24)])
+
+        movement_rollups.rebuild()
+        self.assertEqual(list(rows.values_list("shard", "quantity_total", "movement_count")), [(0, 24, 12)])
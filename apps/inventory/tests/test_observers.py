@@ -1,11 +1,13 @@
 """
 Unit tests for the Observer pattern (StockSubject + LowStockAlertObserver).
-No database required.
+Only the on_commit dispatcher tests need a database (transaction hooks).
 """
 from types import SimpleNamespace
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
 
 from apps.inventory.observers.base import StockObserver, StockSubject
+from apps.inventory.observers.dispatch import OnCommitDispatcher, SyncDispatcher, get_dispatcher
+from apps.inventory.observers.registry import build_stock_subject, get_stock_subject
 from apps.inventory.observers.stock_alert_observer import LowStockAlertObserver
 
 
@@ -71,3 +73,87 @@ class TestLowStockAlertObserver(SimpleTestCase):
         product = SimpleNamespace(sku="OK-001", stock_quantity=20, minimum_stock=5)
         with self.assertNoLogs("apps.inventory.observers.stock_alert_observer", level="WARNING"):
             self.observer.update(product=product, movement=SimpleNamespace())
+
+
+class TestOnCommitDispatcher(TestCase):
+    def make_subject(self, **kwargs):
+        dispatcher = OnCommitDispatcher(**kwargs)
+        self.addCleanup(dispatcher.close)
+        subject = StockSubject(dispatcher)
+        observer = RecordingObserver()
+        subject.attach(observer)
+        return subject, dispatcher, observer
+
+    def test_delivery_waits_for_commit(self):
+        subject, dispatcher, observer = self.make_subject()
+        product = SimpleNamespace(pk=1, sku="X-001", stock_quantity=5, minimum_stock=5)
+        with self.captureOnCommitCallbacks() as callbacks:
+            subject.notify(product=product, movement=SimpleNamespace())
+            self.assertEqual(observer.calls, [])
+        for callback in callbacks:
+            callback()
+        self.assertTrue(dispatcher.flush(timeout=5))
+        self.assertEqual(len(observer.calls), 1)
+        self.assertEqual(dispatcher.metrics.snapshot()["delivered"], 1)
+
+    def test_pending_events_are_coalesced_per_product(self):
+        # Sin hilos de entrega: las notificaciones quedan en cola.
+        subject, dispatcher, observer = self.make_subject(workers=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            for stock in (5, 4, 3):
+                subject.notify(
+                    product=SimpleNamespace(pk=1, sku="X-001", stock_quantity=stock, minimum_stock=5),
+                    movement=SimpleNamespace(),
+                )
+            subject.notify(product=SimpleNamespace(pk=2, sku="Y-001"), movement=SimpleNamespace())
+        metrics = dispatcher.metrics.snapshot()
+        self.assertEqual((metrics["queue_depth"], metrics["coalesced"]), (2, 2))
+        self.assertEqual(observer.calls, [])
+
+    def test_full_queue_delivers_in_caller_thread(self):
+        subject, dispatcher, observer = self.make_subject(workers=0, max_pending=1, enqueue_timeout=0.01)
+        with self.captureOnCommitCallbacks(execute=True):
+            subject.notify(product=SimpleNamespace(pk=1), movement=SimpleNamespace())
+            subject.notify(product=SimpleNamespace(pk=2), movement=SimpleNamespace())
+        self.assertEqual(len(observer.calls), 1)
+        self.assertEqual(dispatcher.metrics.snapshot()["delivered_inline"], 1)
+
+
+class ExitOnlyObserver(RecordingObserver):
+    movement_types = ("EXIT",)
+
+
+class TestObserverMovementTypes(SimpleTestCase):
+    def test_observer_skipped_for_other_movement_types(self):
+        subject = StockSubject()
+        exit_only = ExitOnlyObserver()
+        everything = RecordingObserver()
+        subject.attach(exit_only)
+        subject.attach(everything)
+        product = SimpleNamespace(sku="X", stock_quantity=1, minimum_stock=5)
+        subject.notify(product=product, movement=SimpleNamespace(movement_type="ENTRY"))
+        subject.notify(product=product, movement=SimpleNamespace(movement_type="EXIT"))
+        self.assertEqual(len(exit_only.calls), 1)
+        self.assertEqual(len(everything.calls), 2)
+
+
+class TestObserverRegistry(SimpleTestCase):
+    @override_settings(
+        INVENTORY_OBSERVER_DISPATCH="sync",
+        INVENTORY_STOCK_OBSERVERS=["apps.inventory.tests.test_observers.RecordingObserver"],
+    )
+    def test_build_stock_subject_from_settings(self):
+        subject = build_stock_subject()
+        self.assertEqual([type(o) for o in subject.observers], [RecordingObserver])
+
+    def test_shared_subject_is_reused(self):
+        self.assertIs(get_stock_subject(), get_stock_subject())
+
+    @override_settings(INVENTORY_OBSERVER_DISPATCH="sync")
+    def test_dispatcher_follows_settings_changes(self):
+        self.assertIsInstance(get_dispatcher(), SyncDispatcher)
+        with override_settings(INVENTORY_OBSERVER_DISPATCH="on_commit", INVENTORY_OBSERVER_WORKERS=1):
+            self.assertIsInstance(get_dispatcher(), OnCommitDispatcher)
+            self.assertIs(get_stock_subject()._dispatcher, get_dispatcher())
+        self.assertIsInstance(get_dispatcher(), SyncDispatcher)
+        self.assertIs(get_stock_subject()._dispatcher, get_dispatcher())
@@ -0,0 +1,144 @@
+"""
+Tests for the transactional stock event outbox and its HTTP relay.
+The relay posts to a stub HTTP server running on localhost.
+"""
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.inventory.models import StockEventOutbox, StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InsufficientStockError, InventoryService
+from apps.inventory.services.outbox_relay import OutboxRelay, RelayError
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+
+class StubEndpoint:
+    """HTTP server that records posted batches and fails the first `failures` requests."""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if stub.failures:
+                    stub.failures -= 1
+                    self.send_response(503)
+                else:
+                    stub.batches.append(body["events"])
+                    self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/events"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(INVENTORY_OUTBOX_ENABLED=True)
+class TestStockEventOutbox(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Router", sku="ROU-001", unit_price="50.00", stock_quantity=10,
+        )
+        self.service = InventoryService(DjangoProductRepository(), StockSubject())
+
+    def register(self, movement_type, quantity):
+        return self.service.register_movement(
+            product_id=self.product.pk, movement_type=movement_type,
+            quantity=quantity, reason="", user=None,
+        )
+
+    def relay(self, endpoint, **kwargs):
+        kwargs.setdefault("sleep", lambda seconds: None)
+        return OutboxRelay(endpoint.url, **kwargs)
+
+    def stub(self, **kwargs):
+        endpoint = StubEndpoint(**kwargs)
+        self.addCleanup(endpoint.close)
+        return endpoint
+
+    def test_event_written_with_movement(self):
+        movement = self.register(StockMovement.EXIT, 3)
+        event = StockEventOutbox.objects.get()
+        self.assertEqual(event.movement, movement)
+        self.assertEqual(event.payload["sku"], "ROU-001")
+        self.assertIsNone(event.published_at)
+
+    def test_rejected_movement_leaves_no_event(self):
+        with self.assertRaises(InsufficientStockError):
+            self.register(StockMovement.EXIT, 11)
+        self.assertFalse(StockEventOutbox.objects.exists())
+
+    @override_settings(INVENTORY_OUTBOX_ENABLED=False)
+    def test_outbox_disabled(self):
+        self.register(StockMovement.ENTRY, 1)
+        self.assertFalse(StockEventOutbox.objects.exists())
+
+    def test_relay_publishes_in_order_and_in_batches(self):
+        for _ in range(5):
+            self.register(StockMovement.ENTRY, 1)
+        endpoint = self.stub()
+        relay = self.relay(endpoint, batch_size=2)
+        self.assertEqual(relay.drain(), 5)
+        self.assertEqual([len(batch) for batch in endpoint.batches], [2, 2, 1])
+        ids = [event["id"] for batch in endpoint.batches for event in batch]
+        self.assertEqual(ids, sorted(ids))
+        self.assertFalse(StockEventOutbox.objects.filter(published_at__isnull=True).exists())
+
+    def test_relay_retries_transient_failures(self):
+        self.register(StockMovement.ENTRY, 1)
+        endpoint = self.stub(failures=2)
+        self.assertEqual(self.relay(endpoint, max_retries=3).drain(), 1)
+        self.assertEqual(StockEventOutbox.objects.get().attempts, 2)
+
+    def test_relay_stops_without_skipping_on_persistent_failure(self):
+        self.register(StockMovement.ENTRY, 1)
+        self.register(StockMovement.ENTRY, 1)
+        endpoint = self.stub(failures=10)
+        with self.assertRaises(RelayError):
+            self.relay(endpoint, batch_size=1, max_retries=2).drain()
+        self.assertEqual(StockEventOutbox.objects.filter(published_at__isnull=True).count(), 2)
+        self.assertEqual(endpoint.batches, [])
+
+    def test_purge_removes_only_old_published_events(self):
+        for _ in range(4):
+            self.register(StockMovement.ENTRY, 1)
+        events = list(StockEventOutbox.objects.values_list("id", flat=True))
+        old = timezone.now() - timedelta(days=30)
+        StockEventOutbox.objects.filter(id__in=events[:2]).update(published_at=old)
+        StockEventOutbox.objects.filter(id=events[2]).update(published_at=timezone.now())
+        endpoint = self.stub()
+        self.assertEqual(self.relay(endpoint).purge_published(days=7), 2)
+        self.assertEqual(list(StockEventOutbox.objects.values_list("id", flat=True)), events[2:])
+
+    def test_command_purges_after_draining(self):
+        self.register(StockMovement.ENTRY, 1)
+        StockEventOutbox.objects.update(published_at=timezone.now() - timedelta(days=30))
+        self.register(StockMovement.ENTRY, 1)
+        endpoint = self.stub()
+        out = StringIO()
+        call_command("relay_stock_events", "--endpoint", endpoint.url, "--retention-days", "7", stdout=out)
+        self.assertIn("1 eventos publicados eliminados", out.getvalue())
+        self.assertEqual(StockEventOutbox.objects.filter(published_at__isnull=False).count(), 1)
+
+    def test_pending_scan_uses_partial_index(self):
+        index = next(i for i in StockEventOutbox._meta.indexes if i.name == "stock_outbox_pending_idx")
+        self.assertEqual(index.fields, ["id"])
+        self.assertIsNotNone(index.condition)
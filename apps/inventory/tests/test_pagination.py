@@ -0,0 +1,93 @@
+"""
+Tests for keyset (cursor) pagination of stock movements.
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement
+from apps.inventory.pagination import keyset_page
+from apps.products.models import Product
+
+User = get_user_model()
+
+
+def walk(sources, size, **params):
+    """Follow next links to the end, then previous links back; returns both id sequences."""
+    forward, backward = [], []
+    page = keyset_page(sources, QueryDict(), size, **params)
+    forward.append([m.pk for m in page])
+    while page.has_next:
+        page = keyset_page(sources, QueryDict(page.next_query), size, **params)
+        forward.append([m.pk for m in page])
+    backward.append([m.pk for m in page])
+    while page.has_previous:
+        page = keyset_page(sources, QueryDict(page.previous_query), size, **params)
+        backward.append([m.pk for m in page])
+    return forward, backward
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestKeysetPagination(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00")
+        base = timezone.now() - timedelta(days=1)
+        # Varias filas comparten created_at: el id desempata.
+        StockMovement.objects.bulk_create(
+            [
+                StockMovement(
+                    product=self.product,
+                    movement_type=StockMovement.ENTRY if i % 2 else StockMovement.EXIT,
+                    quantity=1,
+                    created_at=base + timedelta(minutes=i // 3),
+                )
+                for i in range(43)
+            ]
+        )
+        self.expected = list(StockMovement.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def test_next_and_previous_cover_every_row_once(self):
+        forward, backward = walk([StockMovement.objects.all()], 5)
+        self.assertEqual([pk for page in forward for pk in page], self.expected)
+        self.assertEqual(backward, forward[::-1])
+        self.assertEqual([len(page) for page in forward], [5] * 8 + [3])
+
+    def test_continues_into_archived_rows(self):
+        archived = [
+            SimpleNamespace(pk=-i, created_at=timezone.now() - timedelta(days=400 + i)) for i in range(1, 8)
+        ]
+        forward, backward = walk([StockMovement.objects.all(), archived], 10)
+        self.assertEqual([pk for page in forward for pk in page], self.expected + [-i for i in range(1, 8)])
+        self.assertEqual(backward, forward[::-1])
+
+    def test_deep_page_seeks_instead_of_offset(self):
+        page = keyset_page([StockMovement.objects.all()], QueryDict(), 20)
+        with CaptureQueriesContext(connection) as queries:
+            keyset_page([StockMovement.objects.all()], QueryDict(page.next_query), 20)
+        sql = " ".join(q["sql"] for q in queries).upper()
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT(", sql)
+
+    def test_movement_list_links_and_approximate_total(self):
+        User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        url = reverse("inventory:movements")
+        first = self.client.get(url, {"type": "ENTRY"}).context["page_obj"]
+        self.assertIn("type=ENTRY", first.next_query)
+        second = self.client.get(f"{url}?{first.next_query}").context["page_obj"]
+        entries = list(
+            StockMovement.objects.filter(movement_type="ENTRY").order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual([m.pk for m in first] + [m.pk for m in second], entries)
+
+        response = self.client.get(f"{url}?{first.approximate_total_query}")
+        self.assertEqual(response.context["page_obj"].total, len(entries))
+        self.assertContains(response, f"≈ {len(entries)} movimientos")
+
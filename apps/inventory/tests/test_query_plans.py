@@ -0,0 +1,65 @@
+"""
+EXPLAIN-based tests: the hot movement and low-stock queries use their indexes.
+"""
+import unittest
+
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement
+from apps.inventory.pagination import older_than
+from apps.inventory.services import sharded_counter, sync_feed
+from apps.inventory.views import MovementListView
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+from apps.reports.views import _get_movements_queryset
+
+
+@unittest.skipUnless(connection.vendor in ("sqlite", "postgresql"), "EXPLAIN solo comprobado en SQLite y PostgreSQL")
+@override_settings(USE_MOCK_DATA=False)
+class TestQueryPlans(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=1)
+        StockMovement.objects.create(product=self.product, movement_type=StockMovement.ENTRY, quantity=1)
+        if connection.vendor == "postgresql":
+            # Con tablas de prueba diminutas el planificador preferiría un seq scan.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def movement_list(self, **params):
+        view = MovementListView()
+        view.setup(RequestFactory().get("/", params))
+        return view.get_queryset()[:20]
+
+    def report(self, **params):
+        return _get_movements_queryset(RequestFactory().get("/", params))[:50]
+
+    def test_movement_list(self):
+        self.assertUsesIndex(self.movement_list(), "stock_mov_created_idx")
+        self.assertUsesIndex(self.movement_list(type="EXIT"), "stock_mov_type_created_idx")
+
+    def test_movement_report_filters(self):
+        self.assertUsesIndex(self.report(movement_type="ENTRY"), "stock_mov_type_created_idx")
+        self.assertUsesIndex(self.report(product=self.product.pk), "stock_mov_product_created_idx")
+
+    def test_dashboard_recent_movements(self):
+        self.assertUsesIndex(StockMovement.objects.select_related("product").all()[:10], "stock_mov_created_idx")
+
+    def test_low_stock_uses_partial_index(self):
+        self.assertUsesIndex(DjangoProductRepository().get_low_stock(), "product_active_low_stock_idx")
+        self.assertUsesIndex(sharded_counter.low_stock_products(), "product_active_low_stock_idx")
+
+    def test_sync_feed_keyset(self):
+        products = sync_feed.changed_products(self.product.updated_at, self.product.pk, timezone.now())
+        self.assertUsesIndex(products[:500], "product_updated_idx")
+
+    def test_keyset_pages(self):
+        cursor = (timezone.now(), 10**6)
+        movements = StockMovement.objects.select_related("product")
+        self.assertUsesIndex(older_than(movements, cursor)[:21], "stock_mov_created_idx")
+        self.assertUsesIndex(older_than(movements.filter(movement_type="EXIT"), cursor)[:21], "stock_mov_type_created_idx")
@@ -0,0 +1,108 @@
+"""
+Tests for the sharded stock counter and its integration with InventoryService.
+"""
+import random
+
+from django.test import TestCase
+
+from apps.inventory.forms import StockMovementForm
+from apps.inventory.models import StockCounterShard, StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InsufficientStockError, InventoryService
+from apps.inventory.services.sharded_counter import ShardedStockCounter, low_stock_products
+from apps.products.forms import ProductForm
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+
+class TestShardedStockCounter(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Cable HDMI", sku="HDM-001", unit_price="8.00",
+            stock_quantity=10, minimum_stock=2,
+        )
+        self.counter = ShardedStockCounter(rng=random.Random(0))
+        self.counter.enable(self.product.pk, 4)
+        self.service = InventoryService(DjangoProductRepository(), StockSubject(), self.counter)
+
+    def register(self, movement_type, quantity):
+        return self.service.register_movement(
+            product_id=self.product.pk, movement_type=movement_type,
+            quantity=quantity, reason="", user=None,
+        )
+
+    def live_total(self):
+        return self.counter.totals([self.product.pk])[self.product.pk]
+
+    def test_enable_distributes_stock_across_shards(self):
+        quantities = list(StockCounterShard.objects.filter(product=self.product).values_list("quantity", flat=True))
+        self.assertEqual(quantities, [3, 3, 2, 2])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_shards, 4)
+
+    def test_movements_update_shards_not_product_row(self):
+        self.register(StockMovement.ENTRY, 5)
+        self.register(StockMovement.EXIT, 3)
+        self.assertEqual(self.live_total(), 12)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 10)
+
+    def test_exit_larger_than_any_shard_uses_total(self):
+        self.register(StockMovement.EXIT, 9)
+        self.assertEqual(self.live_total(), 1)
+        with self.assertRaises(InsufficientStockError):
+            self.register(StockMovement.EXIT, 2)
+        self.assertEqual(self.live_total(), 1)
+
+    def test_adjustment_sets_live_total(self):
+        self.register(StockMovement.ADJUSTMENT, 40)
+        self.assertEqual(self.live_total(), 40)
+
+    def test_observers_receive_live_stock(self):
+        movement = self.register(StockMovement.ENTRY, 1)
+        self.assertEqual(movement.product.stock_quantity, 11)
+
+    def test_fold_writes_total_back_to_product(self):
+        self.register(StockMovement.ENTRY, 7)
+        self.assertEqual(self.counter.fold(self.product.pk), 17)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 17)
+
+    def test_disable_restores_single_row_counter(self):
+        self.register(StockMovement.EXIT, 4)
+        self.counter.disable(self.product.pk)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock_quantity, self.product.stock_shards), (6, 0))
+        self.assertFalse(StockCounterShard.objects.filter(product=self.product).exists())
+        self.register(StockMovement.EXIT, 6)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 0)
+
+    def test_low_stock_uses_live_total(self):
+        self.register(StockMovement.EXIT, 9)  # vivo 1, consolidado 10
+        low = list(low_stock_products())
+        self.assertEqual([(p.sku, p.current_stock, p.stock_deficit) for p in low], [("HDM-001", 1, 1)])
+
+    def test_form_and_full_save_keep_sharded_stock(self):
+        self.register(StockMovement.ENTRY, 5)
+        form = ProductForm(
+            data={
+                "name": "Cable HDMI 2m", "sku": "HDM-001", "unit_price": "8.00",
+                "stock_quantity": 99, "minimum_stock": 2, "is_active": "on",
+            },
+            instance=Product.objects.get(pk=self.product.pk),
+        )
+        self.assertTrue(form.fields["stock_quantity"].disabled)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.name, self.product.stock_quantity), ("Cable HDMI 2m", 10))
+        self.assertEqual(self.live_total(), 15)
+
+    def test_movement_form_checks_exits_against_live_total(self):
+        self.register(StockMovement.ENTRY, 50)  # vivo 60, consolidado 10
+        data = {"product": self.product.pk, "movement_type": StockMovement.EXIT, "quantity": 20}
+        self.assertTrue(StockMovementForm(data).is_valid())
+        form = StockMovementForm(dict(data, quantity=61))
+        self.assertFalse(form.is_valid())
+        self.assertIn("Stock actual: 60", form.non_field_errors()[0])
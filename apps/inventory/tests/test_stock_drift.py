@@ -0,0 +1,79 @@
+"""
+Tests for the ledger-vs-stock drift reconciliation.
+"""
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.inventory.models import ArchivedMovementFile, StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.stock_drift import partitions, reconcile
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+
+def line(product, movement_type, quantity):
+    return {"product_id": product.pk, "movement_type": movement_type, "quantity": quantity}
+
+
+class TestStockDrift(TestCase):
+    def setUp(self):
+        self.service = InventoryService(DjangoProductRepository(), StockSubject())
+        self.edited = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=0)
+        self.seeded = Product.objects.create(name="Teclado", sku="TEC-001", unit_price="20.00", stock_quantity=10)
+        self.adjusted = Product.objects.create(name="Ratón", sku="RAT-001", unit_price="10.00", stock_quantity=0)
+        self.service.register_movements(
+            [
+                line(self.edited, StockMovement.ENTRY, 5),
+                line(self.edited, StockMovement.EXIT, 2),
+                line(self.adjusted, StockMovement.ADJUSTMENT, 8),
+                line(self.adjusted, StockMovement.ENTRY, 2),
+            ]
+        )
+        # Edición directa (admin / formulario) seguida de un movimiento normal.
+        Product.objects.filter(pk=self.edited.pk).update(stock_quantity=7)
+        self.exit = self.service.register_movements([line(self.edited, StockMovement.EXIT, 1)])[0]
+
+    def test_reports_drift_against_replayed_ledger(self):
+        report = reconcile(chunk_size=1)
+        self.assertEqual(report.products, 3)
+        self.assertEqual(report.movements, 5)
+        rows = {l.sku: (l.stock, l.ledger, l.variance, l.diverged_at) for l in report.lines}
+        self.assertEqual(rows, {"MON-001": (6, 2, 4, self.exit.pk), "TEC-001": (10, 0, 10, None)})
+
+    def test_repair_adjusts_ledger_without_touching_stock(self):
+        report = reconcile(repair=True)
+        self.assertEqual(report.repaired, 2)
+        self.assertEqual(
+            list(Product.objects.order_by("sku").values_list("sku", "stock_quantity")),
+            [("MON-001", 6), ("RAT-001", 10), ("TEC-001", 10)],
+        )
+        adjustment = StockMovement.objects.filter(product=self.seeded).get()
+        self.assertEqual((adjustment.movement_type, adjustment.quantity), (StockMovement.ADJUSTMENT, 10))
+        self.assertEqual(reconcile().lines, [])
+
+    def test_archived_history_anchors_on_first_live_balance(self):
+        ArchivedMovementFile.objects.create(
+            month=date(2020, 1, 1), path="2020/movements-2020-01.jsonl.gz", rows=1, first_id=1, last_id=1, sha256=""
+        )
+        StockMovement.objects.filter(product=self.edited).exclude(pk=self.exit.pk).delete()
+        report = reconcile()
+        # El primer movimiento vivo de MON-001 ya traía el saldo editado; TEC-001 no tiene movimientos vivos.
+        self.assertEqual(report.lines, [])
+        self.assertEqual(report.unknown, 1)
+
+    def test_partitions_cover_every_product(self):
+        ranges = partitions(3)
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0][0], self.edited.pk)
+        self.assertEqual(ranges[-1][1], self.adjusted.pk + 1)
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+
+    def test_command_writes_report(self):
+        out = StringIO()
+        call_command("reconcile_stock", stdout=out)
+        self.assertIn("con_deriva=2", out.getvalue())
+        self.assertIn("MON-001: stock=6 libro=2 diferencia=+4", out.getvalue())
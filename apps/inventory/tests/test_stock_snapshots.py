@@ -0,0 +1,87 @@
+"""
+Tests for stock snapshots and point-in-time stock queries.
+"""
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement, StockSnapshot
+from apps.inventory.services import movement_archive
+from apps.inventory.services.stock_snapshots import stock_as_of, take_snapshots
+from apps.products.models import Product
+
+
+class TestStockSnapshots(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.monitor = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=10)
+        self.mouse = Product.objects.create(name="Mouse", sku="MOU-001", unit_price="10.00", stock_quantity=4)
+        Product.objects.update(created_at=self.now - timedelta(days=30))
+
+    def movement(self, product, movement_type, quantity, days_ago, balance_after=None):
+        return StockMovement.objects.create(
+            product=product,
+            movement_type=movement_type,
+            quantity=quantity,
+            created_at=self.now - timedelta(days=days_ago),
+            balance_after=balance_after,
+        )
+
+    def test_snapshot_plus_later_movements(self):
+        StockSnapshot.objects.create(product=self.monitor, taken_at=self.now - timedelta(days=10), quantity=50)
+        self.movement(self.monitor, StockMovement.EXIT, 5, days_ago=12)  # anterior a la instantánea
+        self.movement(self.monitor, StockMovement.ENTRY, 7, days_ago=8)
+        self.movement(self.monitor, StockMovement.EXIT, 2, days_ago=6)
+        self.movement(self.monitor, StockMovement.ADJUSTMENT, 3, days_ago=2)  # posterior a la consulta
+        self.assertEqual(stock_as_of(self.now - timedelta(days=5), [self.monitor.pk]), {self.monitor.pk: 55})
+        self.assertEqual(stock_as_of(self.now - timedelta(days=1), [self.monitor.pk]), {self.monitor.pk: 3})
+
+    def test_without_snapshot_falls_back_to_current_stock(self):
+        self.movement(self.mouse, StockMovement.ENTRY, 5, days_ago=3)
+        self.movement(self.mouse, StockMovement.EXIT, 2, days_ago=1)
+        self.movement(self.monitor, StockMovement.ADJUSTMENT, 10, days_ago=1)
+        result = stock_as_of(self.now - timedelta(days=5))
+        self.assertEqual(result, {self.mouse.pk: 1, self.monitor.pk: None})
+        self.movement(self.monitor, StockMovement.EXIT, 1, days_ago=6, balance_after=9)
+        self.assertEqual(stock_as_of(self.now - timedelta(days=5), [self.monitor.pk]), {self.monitor.pk: 9})
+
+    def test_products_created_later_are_excluded(self):
+        Product.objects.filter(pk=self.mouse.pk).update(created_at=self.now)
+        self.assertEqual(list(stock_as_of(self.now - timedelta(days=1))), [self.monitor.pk])
+
+    def test_take_snapshots_every_n_movements(self):
+        self.assertEqual(take_snapshots(), 2)
+        self.movement(self.monitor, StockMovement.ENTRY, 1, days_ago=-1)
+        self.movement(self.monitor, StockMovement.ENTRY, 1, days_ago=-1)
+        self.movement(self.mouse, StockMovement.ENTRY, 1, days_ago=-1)
+        self.assertEqual(take_snapshots(every_movements=2, taken_at=self.now + timedelta(days=2)), 1)
+        self.assertEqual(StockSnapshot.objects.filter(product=self.monitor).count(), 2)
+
+    def test_reads_archived_months(self):
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir, ignore_errors=True)
+
+        def at(month, day):
+            return timezone.make_aware(datetime(2024, month, day, 12))
+
+        Product.objects.update(created_at=at(1, 1) - timedelta(days=30))
+        StockSnapshot.objects.create(product=self.monitor, taken_at=at(1, 1), quantity=6)
+        for when, movement_type, quantity, balance in (
+            (at(1, 10), StockMovement.ENTRY, 3, 9),
+            (at(2, 10), StockMovement.EXIT, 1, 8),
+            (at(6, 1), StockMovement.ADJUSTMENT, 10, 10),
+        ):
+            StockMovement.objects.create(
+                product=self.monitor, movement_type=movement_type, quantity=quantity,
+                created_at=when, balance_after=balance,
+            )
+        with override_settings(INVENTORY_ARCHIVE_DIR=archive_dir):
+            movement_archive.archive_before(date(2024, 4, 1))
+            self.assertEqual(StockMovement.objects.count(), 1)
+            self.assertEqual(stock_as_of(at(2, 15), [self.monitor.pk]), {self.monitor.pk: 8})
+            StockSnapshot.objects.all().delete()
+            self.assertEqual(stock_as_of(at(1, 15), [self.monitor.pk]), {self.monitor.pk: 9})
+            self.assertEqual(stock_as_of(at(2, 20), [self.monitor.pk]), {self.monitor.pk: 8})
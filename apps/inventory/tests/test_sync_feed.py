@@ -0,0 +1,69 @@
+"""
+Tests for the delta-sync changes feed.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.inventory.models import StockMovement
+from apps.inventory.services.inventory_service import InventoryService
+from apps.inventory.services.sync_feed import changes_since
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+from apps.products.services.product_service import ProductService
+
+User = get_user_model()
+
+
+@override_settings(USE_MOCK_DATA=False, INVENTORY_SYNC_LAG_SECONDS=0)
+class TestSyncFeed(TestCase):
+    def setUp(self):
+        self.products = [
+            Product.objects.create(name=f"Producto {i}", sku=f"SYN-{i:03d}", unit_price="1.00", stock_quantity=10)
+            for i in range(5)
+        ]
+        StockMovement.objects.create(product=self.products[0], movement_type=StockMovement.ENTRY, quantity=10)
+
+    def sync(self, token=None, limit=2):
+        """Drain the feed; returns (pages, products, tombstones, movements, token)."""
+        pages, products, tombstones, movements = 0, [], [], []
+        while True:
+            batch = changes_since(token, limit=limit)
+            pages += 1
+            products += [p["sku"] for p in batch["products"]]
+            tombstones += [t["sku"] for t in batch["tombstones"]]
+            movements += [m["id"] for m in batch["movements"]]
+            token = batch["next_token"]
+            if not batch["has_more"]:
+                return pages, products, tombstones, movements, token
+
+    def test_initial_sync_then_only_deltas(self):
+        pages, products, _, movements, token = self.sync()
+        self.assertEqual(products, [p.sku for p in self.products])
+        self.assertEqual(pages, 3)
+        self.assertEqual(movements, [])  # el historial no se descarga
+
+        self.assertEqual(self.sync(token)[1:4], ([], [], []))
+
+        movement = InventoryService(DjangoProductRepository()).register_movement(
+            product_id=self.products[3].pk, movement_type=StockMovement.EXIT, quantity=4, reason="", user=None
+        )
+        ProductService(DjangoProductRepository()).deactivate_product(self.products[1])
+        _, products, tombstones, movements, token = self.sync(token)
+        self.assertEqual((products, tombstones, movements), (["SYN-003"], ["SYN-001"], [movement.pk]))
+        self.assertEqual(self.sync(token)[1:4], ([], [], []))
+
+    @override_settings(INVENTORY_SYNC_LAG_SECONDS=60)
+    def test_recent_changes_wait_for_the_lag(self):
+        batch = changes_since(None)
+        self.assertEqual(batch["products"], [])
+        Product.objects.update(updated_at=self.products[0].updated_at.replace(year=2020))
+        self.assertEqual(len(changes_since(batch["next_token"])["products"]), 5)
+
+    def test_view_rejects_tampered_token(self):
+        User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        url = reverse("inventory:sync_changes")
+        token = self.client.get(url).json()["next_token"]
+        self.assertEqual(self.client.get(url, {"token": token}).status_code, 200)
+        self.assertEqual(self.client.get(url, {"token": token[:-2] + "xx"}).status_code, 400)
@@ -0,0 +1,118 @@
+"""
+Integration tests for the inventory views.
+"""
+from concurrent.futures import Future
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.inventory.models import StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InventoryService, normalize_idempotency_key
+from apps.inventory.services.write_behind import WriteBehindBuffer
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository as ProductRepository
+
+User = get_user_model()
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestMovementCreateIdempotency(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        self.product = Product.objects.create(
+            name="Etiquetas", sku="ETI-001", unit_price="2.00", stock_quantity=5,
+        )
+        self.url = reverse("inventory:movement_create")
+
+    def post_exit(self, **extra):
+        data = {"product": self.product.pk, "movement_type": "EXIT", "quantity": 5, "reason": ""}
+        data.update(extra.pop("data", {}))
+        return self.client.post(self.url, data, **extra)
+
+    def test_form_renders_idempotency_key(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'name="idempotency_key"')
+
+    def test_resubmitted_form_is_applied_once(self):
+        first = self.post_exit(data={"idempotency_key": "form-key-1"})
+        retry = self.post_exit(data={"idempotency_key": "form-key-1"})
+        self.assertRedirects(first, reverse("inventory:movements"), fetch_redirect_response=False)
+        self.assertRedirects(retry, reverse("inventory:movements"), fetch_redirect_response=False)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 0)
+        self.assertEqual(StockMovement.objects.count(), 1)
+
+    def test_long_form_key_is_hashed_and_applied_once(self):
+        key = "form-" + "k" * 80
+        self.post_exit(data={"idempotency_key": key})
+        retry = self.post_exit(data={"idempotency_key": key})
+        self.assertRedirects(retry, reverse("inventory:movements"), fetch_redirect_response=False)
+        self.assertEqual(StockMovement.objects.get().idempotency_key, normalize_idempotency_key(key))
+
+    def test_idempotency_key_header(self):
+        self.post_exit(headers={"Idempotency-Key": "scanner-42"})
+        self.post_exit(headers={"Idempotency-Key": "scanner-42"})
+        self.assertEqual(StockMovement.objects.get().idempotency_key, "scanner-42")
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestMovementScanView(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        self.product = Product.objects.create(
+            name="Etiquetas", sku="ETI-001", unit_price="2.00", stock_quantity=1,
+        )
+        self.url = reverse("inventory:movement_scan")
+
+    def test_scan_registers_exit_and_rejects_overdraw(self):
+        first = self.client.post(self.url, {"sku": "ETI-001"})
+        second = self.client.post(self.url, {"sku": "ETI-001"})
+        self.assertEqual((first.status_code, second.status_code), (201, 409))
+        self.assertEqual(self.client.post(self.url, {"sku": "NOPE"}).status_code, 404)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 0)
+
+    def test_buffered_scan_not_flushed_in_time_is_accepted(self):
+        buffer = WriteBehindBuffer(InventoryService(ProductRepository(), StockSubject()), background=False)
+        with mock.patch("apps.inventory.views.get_write_behind_buffer", return_value=buffer), \
+                mock.patch("apps.inventory.views.SCAN_TIMEOUT_SECONDS", 0.01):
+            response = self.client.post(self.url, {"sku": "ETI-001"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "pending")
+        self.assertEqual(buffer.flush(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 0)
+
+    def test_buffered_scan_of_vanished_product_is_not_found(self):
+        future = Future()
+        future.set_exception(Product.DoesNotExist())
+        buffer = mock.Mock(submit=mock.Mock(return_value=future))
+        with mock.patch("apps.inventory.views.get_write_behind_buffer", return_value=buffer):
+            response = self.client.post(self.url, {"sku": "ETI-001"})
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("ETI-001", response.json()["error"])
+
+    def test_buffered_scan_not_flushed_in_time_is_accepted(self):
+        buffer = WriteBehindBuffer(InventoryService(ProductRepository(), StockSubject()), background=False)
+        with mock.patch("apps.inventory.views.get_write_behind_buffer", return_value=buffer), \
+                mock.patch("apps.inventory.views.SCAN_TIMEOUT_SECONDS", 0.01):
+            response = self.client.post(self.url, {"sku": "ETI-001"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "pending")
+        self.assertEqual(buffer.flush(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 0)
+
+    def test_buffered_scan_of_vanished_product_is_not_found(self):
+        future = Future()
+        future.set_exception(Product.DoesNotExist())
+        buffer = mock.Mock(submit=mock.Mock(return_value=future))
+        with mock.patch("apps.inventory.views.get_write_behind_buffer", return_value=buffer):
+            response = self.client.post(self.url, {"sku": "ETI-001"})
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("ETI-001", response.json()["error"])
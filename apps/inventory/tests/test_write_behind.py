@@ -0,0 +1,78 @@
+"""
+Tests for the write-behind buffer used by scanner traffic.
+"""
+from django.test import TestCase, TransactionTestCase
+
+from apps.inventory.models import StockMovement
+from apps.inventory.observers.base import StockSubject
+from apps.inventory.services.inventory_service import InsufficientStockError, InventoryService
+from apps.inventory.services.write_behind import WriteBehindBuffer
+from apps.products.models import Product
+from apps.products.repositories.product_repository import DjangoProductRepository
+
+
+def exit_line(product, quantity=1):
+    return {"product_id": product.pk, "movement_type": StockMovement.EXIT, "quantity": quantity}
+
+
+class TestWriteBehindBuffer(TestCase):
+    def setUp(self):
+        self.monitor = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=3)
+        self.mouse = Product.objects.create(name="Mouse", sku="MOU-001", unit_price="10.00", stock_quantity=10)
+        service = InventoryService(DjangoProductRepository(), StockSubject())
+        self.buffer = WriteBehindBuffer(service, max_lines=100, background=False)
+
+    def test_flushes_lines_as_one_batch(self):
+        futures = [self.buffer.submit(**exit_line(self.mouse)) for _ in range(4)]
+        self.assertFalse(StockMovement.objects.exists())
+        # savepoint, UPDATE, SELECT, INSERT, 3 de agregados diarios, release
+        with self.assertNumQueries(8):
+            self.assertEqual(self.buffer.flush(), 4)
+        self.mouse.refresh_from_db()
+        self.assertEqual(self.mouse.stock_quantity, 6)
+        self.assertTrue(all(f.result().pk for f in futures))
+
+    def test_rejects_only_overdrawing_exits(self):
+        ok = [self.buffer.submit(**exit_line(self.monitor)) for _ in range(3)]
+        over = self.buffer.submit(**exit_line(self.monitor))
+        other = self.buffer.submit(**exit_line(self.mouse, 2))
+        self.buffer.flush()
+        self.assertTrue(all(f.result().pk for f in ok + [other]))
+        with self.assertRaises(InsufficientStockError):
+            over.result()
+        self.assertEqual(self.buffer.rejected, 1)
+        self.monitor.refresh_from_db()
+        self.mouse.refresh_from_db()
+        self.assertEqual((self.monitor.stock_quantity, self.mouse.stock_quantity), (0, 8))
+
+    def test_unknown_product_fails_only_its_line(self):
+        missing = self.buffer.submit(product_id=999999, movement_type=StockMovement.ENTRY, quantity=1)
+        ok = self.buffer.submit(**exit_line(self.mouse))
+        self.buffer.flush()
+        with self.assertRaises(Product.DoesNotExist):
+            missing.result()
+        self.assertTrue(ok.result().pk)
+
+    def test_flushes_when_size_limit_is_reached(self):
+        buffer = WriteBehindBuffer(
+            InventoryService(DjangoProductRepository(), StockSubject()), max_lines=2, background=False
+        )
+        buffer.submit(**exit_line(self.mouse))
+        self.assertEqual(StockMovement.objects.count(), 0)
+        buffer.submit(**exit_line(self.mouse))
+        self.assertEqual(StockMovement.objects.count(), 2)
+
+
+class TestWriteBehindBackgroundFlush(TransactionTestCase):
+    def test_close_flushes_pending_lines(self):
+        mouse = Product.objects.create(name="Mouse", sku="MOU-001", unit_price="10.00", stock_quantity=10)
+        buffer = WriteBehindBuffer(
+            InventoryService(DjangoProductRepository(), StockSubject()), window=0.01, max_lines=1000
+        )
+        futures = [buffer.submit(**exit_line(mouse)) for _ in range(5)]
+        buffer.close()
+        self.assertTrue(all(f.done() for f in futures))
+        mouse.refresh_from_db()
+        self.assertEqual(mouse.stock_quantity, 5)
+        with self.assertRaises(RuntimeError):
+            buffer.submit(**exit_line(mouse))
@@ -1,11 +1,14 @@
 from django.urls import path
 
-from .views import MovementListView, movement_create_view
+from .views import MovementListView, movement_create_view, movement_scan_view, observer_metrics_view, sync_changes_view
 
 app_name = "inventory"
 
 urlpatterns = [
     path("movements/", MovementListView.as_view(), name="movements"),
     path("movements/new/", movement_create_view, name="movement_create"),
+    path("movements/scan/", movement_scan_view, name="movement_scan"),
+    path("sync/changes/", sync_changes_view, name="sync_changes"),
+    path("observers/metrics/", observer_metrics_view, name="observer_metrics"),
 ]
 
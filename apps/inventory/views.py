@@ -1,16 +1,27 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_GET, require_POST
 from django.views.generic import ListView, TemplateView
 
 from apps.inventory.forms import get_stock_movement_form
 from apps.inventory.models import StockMovement
-from apps.inventory.observers.base import StockSubject
-from apps.inventory.observers.stock_alert_observer import LowStockAlertObserver
-from apps.inventory.services.inventory_service import InventoryService, InsufficientStockError
+from apps.inventory.observers.dispatch import get_dispatcher
+from apps.inventory.pagination import keyset_page
+from apps.inventory.services import movement_rollups, sharded_counter, sync_feed
+from apps.inventory.services.inventory_service import (
+    InsufficientStockError,
+    InventoryService,
+    normalize_idempotency_key,
+)
+from apps.inventory.services.write_behind import get_write_behind_buffer
 from apps.products.services.product_service import ProductService
 from config.data_source import get_product_repository
 from config.mock_data import create_mock_movement, get_mock_movements
@@ -21,7 +32,7 @@ class MovementListView(ListView):
     model = StockMovement
     template_name = "inventory/movement_list.html"
     context_object_name = "movements"
-    paginate_by = 20
+    page_size = 20
 
     def get_queryset(self):
         if getattr(settings, "USE_MOCK_DATA", False):
@@ -36,6 +47,20 @@ class MovementListView(ListView):
             qs = qs.filter(movement_type=mov_type)
         return qs
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        mov_type = self.request.GET.get("type")
+        page = keyset_page(
+            [self.object_list], self.request.GET, self.page_size, extra_params=[("type", mov_type)] if mov_type else ()
+        )
+        ctx.update({"movements": page, "page_obj": page})
+        return ctx
+
+
+def _idempotency_key(request):
+    """Clave del cliente (cabecera Idempotency-Key o campo oculto del formulario)."""
+    return normalize_idempotency_key(request.headers.get("Idempotency-Key") or request.POST.get("idempotency_key"))
+
 
 @login_required
 def movement_create_view(request):
@@ -43,6 +68,14 @@ def movement_create_view(request):
     initial_product = request.GET.get("product")
     form = get_stock_movement_form(request.POST or None)
 
+    if request.method == "POST" and not getattr(settings, "USE_MOCK_DATA", False):
+        # Reintento de un POST ya aplicado: se responde como el original sin
+        # revalidar el formulario (el stock ya cambió) ni reaplicar nada.
+        idempotency_key = _idempotency_key(request)
+        if InventoryService(get_product_repository()).find_by_idempotency_key(idempotency_key):
+            messages.success(request, "Movimiento registrado correctamente.")
+            return redirect("inventory:movements")
+
     if request.method == "POST" and form.is_valid():
         if getattr(settings, "USE_MOCK_DATA", False):
             try:
@@ -60,9 +93,7 @@ def movement_create_view(request):
                 return redirect("inventory:movements")
         else:
             repo = get_product_repository()
-            subject = StockSubject()
-            subject.attach(LowStockAlertObserver())
-            service = InventoryService(repo, subject)
+            service = InventoryService(repo)
             product_id = form.cleaned_data["product"]
             if hasattr(product_id, "id"):
                 product_id = product_id.id
@@ -73,6 +104,7 @@ def movement_create_view(request):
                     quantity=form.cleaned_data["quantity"],
                     reason=form.cleaned_data.get("reason") or "",
                     user=request.user,
+                    idempotency_key=idempotency_key,
                 )
             except InsufficientStockError as exc:
                 form.add_error(None, str(exc))
@@ -83,27 +115,113 @@ def movement_create_view(request):
     return render(request, "inventory/movement_form.html", {"form": form, "initial_product": initial_product})
 
 
+SCAN_TIMEOUT_SECONDS = 5
+
+
+@login_required
+@require_POST
+def movement_scan_view(request):
+    """
+    Registro rápido desde escáner: sku, movement_type (por defecto EXIT) y
+    quantity (por defecto 1). Con INVENTORY_WRITE_BEHIND_ENABLED la lectura se
+    agrupa con las de otros escáneres y se registra en lote.
+    """
+    sku = (request.POST.get("sku") or "").strip()
+    movement_type = (request.POST.get("movement_type") or StockMovement.EXIT).upper()
+    try:
+        quantity = int(request.POST.get("quantity") or 1)
+    except ValueError:
+        quantity = 0
+    if movement_type not in (StockMovement.ENTRY, StockMovement.EXIT) or quantity < 1:
+        return JsonResponse({"error": "Movimiento no válido."}, status=400)
+
+    repo = get_product_repository()
+    try:
+        product = repo.get_by_sku(sku)
+    except ObjectDoesNotExist:
+        product = None
+    if product is None:
+        return JsonResponse({"error": f"SKU no encontrado: {sku}"}, status=404)
+
+    line = {
+        "product_id": product.id,
+        "movement_type": movement_type,
+        "quantity": quantity,
+        "reason": request.POST.get("reason") or "",
+        "user": request.user,
+    }
+    try:
+        if getattr(settings, "USE_MOCK_DATA", False):
+            try:
+                movement = create_mock_movement(**line)
+            except ValueError as exc:
+                raise InsufficientStockError(str(exc))
+        elif get_write_behind_buffer() is not None:
+            movement = get_write_behind_buffer().submit(**line).result(timeout=SCAN_TIMEOUT_SECONDS)
+        else:
+            movement = InventoryService(repo).register_movement(**line)
+    except InsufficientStockError as exc:
+        return JsonResponse({"error": str(exc)}, status=409)
+    except FutureTimeoutError:
+        # La lectura sigue en el buffer y se registrará con el próximo lote.
+        return JsonResponse(
+            {"status": "pending", "sku": sku, "movement_type": movement_type, "quantity": quantity}, status=202
+        )
+    except ObjectDoesNotExist:
+        # El producto se desactivó o eliminó antes de vaciarse el lote.
+        return JsonResponse({"error": f"SKU no encontrado: {sku}"}, status=404)
+    return JsonResponse({"id": movement.pk, "sku": sku, "movement_type": movement_type, "quantity": quantity}, status=201)
+
+
+@login_required
+@require_GET
+def sync_changes_view(request):
+    """
+    Cambios de productos y movimientos desde ?token= (sin token: sincronización
+    inicial). Devuelve next_token; repetir mientras has_more sea true.
+    """
+    try:
+        limit = int(request.GET.get("limit") or sync_feed.DEFAULT_LIMIT)
+    except ValueError:
+        return JsonResponse({"error": "limit no válido."}, status=400)
+    try:
+        changes = sync_feed.changes_since(request.GET.get("token") or None, limit=limit)
+    except sync_feed.InvalidSyncToken as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(changes)
+
+
+@login_required
+def observer_metrics_view(request):
+    """Métricas del despachador de observadores (profundidad de cola, latencia)."""
+    metrics = getattr(get_dispatcher(), "metrics", None)
+    return JsonResponse({
+        "mode": getattr(settings, "INVENTORY_OBSERVER_DISPATCH", "sync"),
+        "metrics": metrics.snapshot() if metrics else None,
+    })
+
+
 @method_decorator(login_required, name="dispatch")
 class DashboardView(TemplateView):
     template_name = "dashboard/index.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        repo = get_product_repository()
-        product_service = ProductService(repo)
-        low_stock_products = product_service.get_low_stock_products()
-
         if getattr(settings, "USE_MOCK_DATA", False):
             from config.mock_data import MOCK_PRODUCTS, MOCK_CATEGORIES
+            low_stock_products = list(ProductService(get_product_repository()).get_low_stock_products())
+            for p in low_stock_products:
+                p.current_stock = p.stock_quantity
             recent_movements = get_mock_movements()[:10]
             total_products = sum(1 for p in MOCK_PRODUCTS if p.is_active)
             total_movements = len(get_mock_movements())
             total_categories = len(MOCK_CATEGORIES)
         else:
+            low_stock_products = sharded_counter.low_stock_products()
             recent_movements = StockMovement.objects.select_related("product").all()[:10]
             from apps.products.models import Product, Category
             total_products = Product.objects.filter(is_active=True).count()
-            total_movements = StockMovement.objects.count()
+            total_movements = movement_rollups.total_movements()
             total_categories = Category.objects.count()
 
         context.update({
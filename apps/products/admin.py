@@ -35,3 +35,9 @@ class ProductAdmin(admin.ModelAdmin):
     list_editable = ("is_active",)
     raw_id_fields = ("category", "supplier")
     ordering = ("name",)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Las particiones se gestionan con el comando stock_shards.
+        if obj is not None and obj.stock_shards:
+            return ("stock_quantity", "stock_shards")
+        return ("stock_shards",)
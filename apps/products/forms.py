@@ -60,6 +60,9 @@ class ProductForm(forms.ModelForm):
             )
         self.fields["supplier"].queryset = supplier_qs
         self.fields["supplier"].required = False
+        if inst and inst.pk and inst.stock_shards:
+            self.fields["stock_quantity"].disabled = True
+            self.fields["stock_quantity"].help_text = "Stock particionado: se modifica con movimientos."
 
 
 class ProductFormMock(forms.Form):
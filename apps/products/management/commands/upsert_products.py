@@ -0,0 +1,43 @@
+"""
+Crea o actualiza productos del catálogo por SKU desde un fichero CSV o JSONL.
+
+Uso:
+    python manage.py upsert_products catalogo.csv --chunk-size 5000
+    python manage.py upsert_products catalogo.jsonl --dry-run
+
+Ver apps.products.services.catalog_upsert para el formato de las filas.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.products.services.catalog_upsert import CatalogUpserter
+from config.file_readers import read_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert masivo de productos por SKU desde CSV o JSONL (streaming)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--dry-run", action="store_true", help="Muestra el diff sin escribir nada.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        upserter = CatalogUpserter(
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+            on_diff=self.stdout.write if options["dry_run"] else None,
+        )
+        with open(path, newline="", encoding="utf-8") as stream:
+            report = upserter.run(read_rows(stream, path, options["format"]))
+
+        for row_number, message in report.errors:
+            self.stderr.write(f"fila {row_number}: {message}")
+        prefix = "[dry-run] " if options["dry_run"] else ""
+        self.stdout.write(
+            f"{prefix}filas={report.rows} creados={report.inserted} actualizados={report.updated} "
+            f"sin_cambios={report.unchanged} no_válidas={report.invalid} "
+            f"categorías_nuevas={report.categories_created} proveedores_nuevos={report.suppliers_created} "
+            f"| {report.elapsed:.2f}s"
+        )
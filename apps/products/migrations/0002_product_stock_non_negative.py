@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_supplier_is_active'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.CheckConstraint(check=models.Q(('stock_quantity__gte', 0)), name='product_stock_quantity_non_negative'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_stock_shards'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('stock_quantity__lte', models.F('minimum_stock'))), fields=['stock_quantity', 'name'], name='product_active_low_stock_idx'),
+        ),
+    ]
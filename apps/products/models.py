@@ -47,13 +47,42 @@ class Product(models.Model):
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     stock_quantity = models.PositiveIntegerField(default=0)
     minimum_stock = models.PositiveIntegerField(default=5)
+    # > 0: el stock vivo está repartido en N filas de inventory.StockCounterShard
+    # y stock_quantity guarda el último total consolidado.
+    stock_shards = models.PositiveSmallIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(stock_quantity__gte=0),
+                name="product_stock_quantity_non_negative",
+            ),
+        ]
+        indexes = [
+            # Índice parcial: solo los productos activos bajo mínimo (panel e informe de stock bajo).
+            models.Index(
+                fields=["stock_quantity", "name"],
+                name="product_active_low_stock_idx",
+                condition=models.Q(is_active=True, stock_quantity__lte=models.F("minimum_stock")),
+            ),
+            # Keyset del feed de sincronización: productos cambiados desde (updated_at, id).
+            models.Index(fields=["updated_at", "id"], name="product_updated_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.sku} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        if self.stock_shards and not self._state.adding and kwargs.get("update_fields") is None:
+            # Producto particionado: el stock lo escriben las particiones y fold();
+            # un guardado completo (formulario, admin) no debe pisarlo.
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in ("stock_quantity", "stock_shards")
+            ]
+        super().save(*args, **kwargs)
+
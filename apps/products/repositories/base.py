@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Iterable
+from typing import Dict, Iterable, Optional
 
 from apps.products.models import Product
 
@@ -29,3 +29,31 @@ class AbstractProductRepository(ABC):
     def delete(self, product: Product) -> None:
         ...
 
+    def get_by_ids(self, product_ids: Iterable[int]) -> Dict[int, Product]:
+        """Devuelve {id: producto}; lanza Product.DoesNotExist si falta alguno."""
+        return {product_id: self.get_by_id(product_id) for product_id in product_ids}
+
+    def get_stock_for_update(self, product_id: int) -> int:
+        """Stock actual, bloqueando la fila hasta el fin de la transacción si el backend lo permite."""
+        return self.get_by_id(product_id).stock_quantity
+
+    def apply_stock_change(
+        self,
+        product_id: int,
+        *,
+        delta: int = 0,
+        absolute: Optional[int] = None,
+        required: int = 0,
+    ) -> bool:
+        """
+        Aplica stock = (absolute si se indica, si no stock actual) + delta,
+        solo si el stock actual es >= required. Devuelve False si no se aplicó.
+        """
+        product = self.get_by_id(product_id)
+        if product.stock_quantity < required:
+            return False
+        base = product.stock_quantity if absolute is None else absolute
+        product.stock_quantity = base + delta
+        self.save(product)
+        return True
+
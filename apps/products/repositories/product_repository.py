@@ -1,6 +1,7 @@
-from typing import Iterable
+from typing import Dict, Iterable, Optional
 
-from django.db.models import F
+from django.db.models import F, Value
+from django.utils import timezone
 
 from apps.products.models import Product
 from .base import AbstractProductRepository
@@ -22,11 +23,47 @@ class DjangoProductRepository(AbstractProductRepository):
             stock_quantity__lte=F("minimum_stock"),
         )
 
+    def get_by_ids(self, product_ids: Iterable[int]) -> Dict[int, Product]:
+        product_ids = set(product_ids)
+        products = Product.objects.filter(is_active=True).in_bulk(product_ids)
+        missing = product_ids - products.keys()
+        if missing:
+            raise Product.DoesNotExist(f"Productos no encontrados o inactivos: {sorted(missing)}")
+        return products
+
+    def get_stock_for_update(self, product_id: int) -> int:
+        return (
+            Product.objects.select_for_update()
+            .values_list("stock_quantity", flat=True)
+            .get(pk=product_id, is_active=True)
+        )
+
+    def apply_stock_change(
+        self,
+        product_id: int,
+        *,
+        delta: int = 0,
+        absolute: Optional[int] = None,
+        required: int = 0,
+    ) -> bool:
+        # UPDATE condicional: la comprobación y la escritura son una sola
+        # sentencia, así que dos salidas concurrentes no pueden pisarse.
+        # Los productos con contador particionado se gestionan en inventory.
+        base = F("stock_quantity") if absolute is None else Value(absolute)
+        updated = Product.objects.filter(
+            pk=product_id,
+            is_active=True,
+            stock_shards=0,
+            stock_quantity__gte=required,
+        ).update(stock_quantity=base + delta, updated_at=timezone.now())
+        return updated == 1
+
     def save(self, product: Product) -> Product:
         product.save()
         return product
 
     def delete(self, product: Product) -> None:
         product.is_active = False
-        product.save(update_fields=["is_active"])
+        # updated_at también: el feed de sincronización detecta la baja por esa fecha.
+        product.save(update_fields=["is_active", "updated_at"])
 
@@ -0,0 +1,192 @@
+"""
+Upsert masivo del catálogo de productos, con clave Product.sku.
+
+Columnas / claves: sku, name, category, supplier, unit_price, minimum_stock,
+is_active y stock_quantity (esta última solo se usa al crear). Las columnas
+ausentes no se tocan. category y supplier son nombres; si no existen se crean.
+
+Las filas se procesan en bloques: se leen los productos existentes del bloque
+con una consulta, se calcula qué columnas cambian en cada fila y se escribe
+con bulk_create(update_conflicts=True), agrupando las filas por conjunto de
+columnas cambiadas para que cada UPDATE toque solo esas columnas. Las filas
+sin cambios no se escriben. En modo dry_run solo se calcula el diff.
+"""
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from apps.products.models import Category, Product, Supplier
+
+UPDATABLE_FIELDS = ("name", "category_id", "supplier_id", "unit_price", "minimum_stock", "is_active")
+ROW_FIELDS = ("sku", "stock_quantity", "stock_shards", *UPDATABLE_FIELDS)
+TRUE_VALUES = {"1", "true", "t", "yes", "y", "si", "sí"}
+MAX_REPORTED_ERRORS = 50
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+class UpsertReport:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.invalid = 0
+        self.categories_created = 0
+        self.suppliers_created = 0
+        self.elapsed = 0.0
+        self.errors: List[Tuple[int, str]] = []
+
+    def add_error(self, row_number: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+
+class CatalogUpserter:
+    def __init__(
+        self,
+        *,
+        chunk_size: int = 2000,
+        dry_run: bool = False,
+        on_diff: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._chunk_size = chunk_size
+        self._dry_run = dry_run
+        self._on_diff = on_diff or (lambda line: None)
+        self._categories: Dict[str, Optional[int]] = {}
+        self._suppliers: Dict[str, Optional[int]] = {}
+
+    def run(self, rows: Iterable[dict]) -> UpsertReport:
+        report = UpsertReport()
+        start = time.perf_counter()
+        self._categories = {name: pk for pk, name in Category.objects.values_list("pk", "name")}
+        self._suppliers = {}
+        for pk, name in Supplier.objects.order_by("-pk").values_list("pk", "name"):
+            self._suppliers[name] = pk  # con nombres repetidos gana el más antiguo
+        chunk: Dict[str, Tuple[int, dict]] = {}
+        for row_number, row in enumerate(rows, start=1):
+            report.rows += 1
+            values, error = self._parse(row)
+            if error:
+                report.add_error(row_number, error)
+                continue
+            chunk[values["sku"]] = (row_number, values)  # un SKU repetido: gana la última fila
+            if len(chunk) >= self._chunk_size:
+                self._process(chunk, report)
+                chunk = {}
+        if chunk:
+            self._process(chunk, report)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _parse(self, row: dict):
+        if "__error__" in row:
+            return None, row["__error__"]
+        sku = str(row.get("sku") or "").strip()
+        if not sku or len(sku) > 50:
+            return None, f"SKU no válido: {sku!r}"
+        values = {"sku": sku}
+        if "name" in row:
+            name = str(row["name"] or "").strip()
+            if not name:
+                return None, "Nombre vacío"
+            values["name"] = name[:200]
+        if "unit_price" in row:
+            try:
+                values["unit_price"] = Decimal(str(row["unit_price"]).strip()).quantize(Decimal("0.01"))
+            except InvalidOperation:
+                return None, f"Precio no válido: {row['unit_price']!r}"
+        for field in ("minimum_stock", "stock_quantity"):
+            if field in row and row[field] not in (None, ""):
+                try:
+                    values[field] = int(row[field])
+                except (TypeError, ValueError):
+                    return None, f"{field} no válido: {row[field]!r}"
+                if values[field] < 0:
+                    return None, f"{field} no válido: {values[field]}"
+        if "is_active" in row and row["is_active"] not in (None, ""):
+            values["is_active"] = _to_bool(row["is_active"])
+        for column in ("category", "supplier"):
+            if column in row:
+                values[column] = str(row[column] or "").strip() or None
+        return values, None
+
+    def _process(self, chunk: Dict[str, Tuple[int, dict]], report: UpsertReport) -> None:
+        with transaction.atomic():
+            self._resolve_names(chunk.values(), report)
+            existing = {
+                row["sku"]: row
+                for row in Product.objects.filter(sku__in=list(chunk)).values(*ROW_FIELDS)
+            }
+            inserts: List[Product] = []
+            updates: Dict[frozenset, List[Product]] = {}
+            for sku, (row_number, values) in chunk.items():
+                values = self._with_ids(values)
+                current = existing.get(sku)
+                if current is None:
+                    if "name" not in values or "unit_price" not in values:
+                        report.add_error(row_number, f"{sku}: name y unit_price son obligatorios para crear")
+                        continue
+                    inserts.append(Product(**values))
+                    self._on_diff(f"+ {sku}")
+                    continue
+                changed = {
+                    field: value
+                    for field, value in values.items()
+                    if field in UPDATABLE_FIELDS and current[field] != value
+                }
+                if not changed:
+                    report.unchanged += 1
+                    continue
+                for field, value in changed.items():
+                    self._on_diff(f"~ {sku} {field}: {current[field]!r} -> {value!r}")
+                # Sin pk: el INSERT choca solo con sku y pasa a UPDATE de las columnas cambiadas.
+                updates.setdefault(frozenset(changed), []).append(Product(**{**current, **changed}))
+
+            report.inserted += len(inserts)
+            report.updated += sum(len(products) for products in updates.values())
+            if self._dry_run:
+                return
+            if inserts:
+                Product.objects.bulk_create(inserts)
+            for fields, products in updates.items():
+                Product.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=["sku"],
+                    update_fields=sorted(fields) + ["updated_at"],
+                )
+
+    def _resolve_names(self, entries, report: UpsertReport) -> None:
+        for column, cache, model, counter in (
+            ("category", self._categories, Category, "categories_created"),
+            ("supplier", self._suppliers, Supplier, "suppliers_created"),
+        ):
+            missing = {values[column] for _, values in entries if values.get(column) and values[column] not in cache}
+            if not missing:
+                continue
+            setattr(report, counter, getattr(report, counter) + len(missing))
+            if self._dry_run:
+                cache.update({name: None for name in missing})
+                for name in sorted(missing):
+                    self._on_diff(f"+ {model._meta.verbose_name} {name!r}")
+                continue
+            model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+            cache.update(dict(model.objects.filter(name__in=missing).order_by("-pk").values_list("name", "pk")))
+
+    def _with_ids(self, values: dict) -> dict:
+        values = dict(values)
+        if "category" in values:
+            name = values.pop("category")
+            values["category_id"] = self._categories.get(name) if name else None
+        if "supplier" in values:
+            name = values.pop("supplier")
+            values["supplier_id"] = self._suppliers.get(name) if name else None
+        return values
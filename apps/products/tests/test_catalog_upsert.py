@@ -0,0 +1,83 @@
+"""
+Tests for the streaming catalog upsert keyed on SKU.
+"""
+import io
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.products.models import Category, Product, Supplier
+from apps.products.services.catalog_upsert import CatalogUpserter
+from config.file_readers import read_csv, read_jsonl
+
+
+class TestCatalogUpserter(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Periféricos")
+        self.monitor = Product.objects.create(
+            name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=10, category=self.category
+        )
+        self.mouse = Product.objects.create(name="Mouse", sku="MOU-001", unit_price="10.00", stock_quantity=4)
+
+    def test_inserts_updates_and_skips_unchanged_rows(self):
+        data = io.StringIO(
+            "sku,name,unit_price,category,stock_quantity\n"
+            "MON-001,Monitor,100.00,Periféricos,99\n"
+            "MOU-001,Mouse óptico,12.50,Periféricos,99\n"
+            "KEY-001,Teclado,25,Teclados,7\n"
+        )
+        report = CatalogUpserter(chunk_size=2).run(read_csv(data))
+        self.assertEqual((report.inserted, report.updated, report.unchanged, report.invalid), (1, 1, 1, 0))
+        self.assertEqual(report.categories_created, 1)
+
+        self.mouse.refresh_from_db()
+        self.assertEqual(self.mouse.name, "Mouse óptico")
+        self.assertEqual(self.mouse.unit_price, Decimal("12.50"))
+        self.assertEqual(self.mouse.category, self.category)
+        self.assertEqual(self.mouse.stock_quantity, 4)  # el stock solo se fija al crear
+        keyboard = Product.objects.get(sku="KEY-001")
+        self.assertEqual((keyboard.stock_quantity, keyboard.category.name), (7, "Teclados"))
+
+    def test_update_touches_only_changed_columns(self):
+        Product.objects.filter(pk=self.monitor.pk).update(stock_quantity=3)
+        data = io.StringIO('{"sku": "MON-001", "minimum_stock": 8, "supplier": "Acme"}\n')
+        report = CatalogUpserter().run(read_jsonl(data))
+        self.assertEqual(report.updated, 1)
+        self.monitor.refresh_from_db()
+        self.assertEqual((self.monitor.minimum_stock, self.monitor.stock_quantity), (8, 3))
+        self.assertEqual(self.monitor.supplier, Supplier.objects.get(name="Acme"))
+        self.assertEqual(self.monitor.name, "Monitor")
+
+    def test_dry_run_reports_diff_without_writing(self):
+        diff = []
+        data = io.StringIO(
+            "sku,name,unit_price,supplier\n"
+            "MON-001,Monitor 27,100.00,\n"
+            "NEW-001,Nuevo,1,Acme\n"
+        )
+        report = CatalogUpserter(dry_run=True, on_diff=diff.append).run(read_csv(data))
+        self.assertEqual((report.inserted, report.updated), (1, 1))
+        self.assertIn("~ MON-001 name: 'Monitor' -> 'Monitor 27'", diff)
+        self.assertIn("+ NEW-001", diff)
+        self.assertFalse(Product.objects.filter(sku="NEW-001").exists())
+        self.assertFalse(Supplier.objects.exists())
+        self.monitor.refresh_from_db()
+        self.assertEqual(self.monitor.name, "Monitor")
+
+    def test_invalid_rows_are_reported(self):
+        data = io.StringIO(
+            "sku,name,unit_price\n"
+            ",Sin SKU,1\n"
+            "BAD-001,Precio,abc\n"
+        )
+        report = CatalogUpserter().run(read_csv(data))
+        self.assertEqual((report.rows, report.invalid), (2, 2))
+        missing = CatalogUpserter().run(read_jsonl(io.StringIO('{"sku": "NEW-002"}\n')))
+        self.assertEqual(missing.invalid, 1)
+        self.assertFalse(Product.objects.filter(sku__in=["BAD-001", "NEW-002"]).exists())
+
+    def test_non_object_jsonl_lines_are_invalid_rows(self):
+        data = io.StringIO('[1, 2]\n5\n{"sku": "NEW-003", "name": "Hub", "unit_price": "9.90"}\n')
+        report = CatalogUpserter().run(read_jsonl(data))
+        self.assertEqual((report.rows, report.invalid, report.inserted), (3, 2, 1))
+        self.assertEqual([row for row, _ in report.errors], [1, 2])
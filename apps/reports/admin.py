@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import ReportJob
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "requested_by", "created_at", "rows_written", "rows_total", "gzip")
+    list_filter = ("kind", "status")
+    readonly_fields = ("params_hash", "started_at", "finished_at", "rows_total", "rows_written", "file", "error")
+    raw_id_fields = ("requested_by",)
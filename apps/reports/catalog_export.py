@@ -0,0 +1,95 @@
+"""
+Exportación del catálogo completo con el stock actual, para sistemas externos.
+
+Columnas: las mismas claves que acepta upsert_products (sku, name, category,
+supplier, unit_price, stock_quantity, minimum_stock, is_active), en NDJSON
+(un objeto JSON por línea) o CSV, opcionalmente con gzip. Las filas salen del
+cursor en orden de id y se envían por bloques, igual que los informes CSV.
+
+El ETag resume el estado del catálogo sin leerlo entero: número de productos
+y último Product.updated_at, más el stock vivo de los productos con contador
+particionado (sus escrituras no tocan Product) y los nombres de categorías y
+proveedores. Con If-None-Match igual la vista responde 304 sin consultar las
+filas. El ETag se calcula antes que las filas: si el catálogo cambia entre
+medias, la siguiente petición no coincidirá y se descargará de nuevo.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, Iterator, Sequence
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from apps.inventory.services.sharded_counter import ShardedStockCounter
+from apps.products.models import Category, Product, Supplier
+from apps.reports.csv_export import CHUNK_BYTES, ITERATOR_CHUNK
+
+FORMATS = ("ndjson", "csv")
+CATALOG_FIELDS = (
+    "sku", "name", "category", "supplier", "unit_price", "stock_quantity", "minimum_stock", "is_active",
+)
+_QUERY_FIELDS = (
+    "pk", "sku", "name", "category__name", "supplier__name", "unit_price",
+    "stock_quantity", "stock_shards", "minimum_stock", "is_active",
+)
+
+
+def _sharded_totals() -> Dict[int, int]:
+    sharded = Product.objects.filter(stock_shards__gt=0).values_list("pk", flat=True)
+    return ShardedStockCounter().totals(sharded)
+
+
+def _mock_rows() -> Iterator[list]:
+    from config.mock_data import MOCK_CATEGORIES, MOCK_SUPPLIERS, get_mock_products
+
+    categories = {c.id: c.name for c in MOCK_CATEGORIES}
+    suppliers = {s.id: s.name for s in MOCK_SUPPLIERS}
+    for p in sorted(get_mock_products(active_only=False), key=lambda p: p.id):
+        yield [
+            p.sku, p.name, categories.get(p.category_id), suppliers.get(p.supplier_id),
+            str(p.unit_price), p.stock_quantity, p.minimum_stock, p.is_active,
+        ]
+
+
+def catalog_rows() -> Iterator[list]:
+    """Filas en el orden de CATALOG_FIELDS; el precio va como texto para no perder decimales."""
+    if getattr(settings, "USE_MOCK_DATA", False):
+        yield from _mock_rows()
+        return
+    live = _sharded_totals()
+    rows = Product.objects.order_by("pk").values_list(*_QUERY_FIELDS)
+    for pk, sku, name, category, supplier, price, stock, shards, minimum, active in rows.iterator(
+        chunk_size=ITERATOR_CHUNK
+    ):
+        if shards:
+            stock = live.get(pk, stock)
+        yield [sku, name, category, supplier, str(price), stock, minimum, active]
+
+
+def catalog_etag() -> str:
+    if getattr(settings, "USE_MOCK_DATA", False):
+        state = list(_mock_rows())
+    else:
+        summary = Product.objects.aggregate(count=Count("pk"), updated=Max("updated_at"))
+        state = [
+            summary["count"],
+            summary["updated"],
+            sorted(_sharded_totals().items()),
+            list(Category.objects.order_by("pk").values_list("pk", "name")),
+            list(Supplier.objects.order_by("pk").values_list("pk", "name")),
+        ]
+    payload = json.dumps(state, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def ndjson_chunks(keys: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    buffer, size = [], 0
+    for row in rows:
+        line = dumps(dict(zip(keys, row))) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    yield "".join(buffer).encode("utf-8")
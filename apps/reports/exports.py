@@ -0,0 +1,98 @@
+"""
+Filas de las exportaciones CSV de informes.
+
+Las usan las vistas (respuesta en streaming) y el procesador de trabajos en
+segundo plano (apps.reports.jobs), así que ambas salidas son idénticas.
+"""
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+from apps.inventory.models import StockMovement
+from apps.inventory.services import movement_archive, sharded_counter
+from apps.reports.csv_export import ITERATOR_CHUNK
+from apps.reports.filters import MovementFilters
+
+MOVEMENT_CSV_HEADER = ["ID", "Producto", "Tipo", "Cantidad", "Saldo", "Motivo", "Usuario", "Fecha"]
+MOVEMENT_CSV_FIELDS = (
+    "id",
+    "product__sku",
+    "movement_type",
+    "quantity",
+    "balance_after",
+    "reason",
+    "performed_by__username",
+    "created_at",
+)
+LOW_STOCK_CSV_HEADER = ["SKU", "Nombre", "Stock", "Stock mínimo", "Déficit"]
+
+
+def movement_csv_row(id, sku, movement_type, quantity, balance_after, reason, username, created_at):
+    return [
+        id,
+        sku,
+        movement_type,
+        quantity,
+        "" if balance_after is None else balance_after,
+        reason or "",
+        username or "",
+        created_at.isoformat(),
+    ]
+
+
+def movement_object_row(m):
+    return movement_csv_row(
+        m.id, m.product.sku, m.movement_type, m.quantity, m.balance_after, m.reason,
+        m.performed_by.username if m.performed_by else None, m.created_at,
+    )
+
+
+def mock_movements(filters: MovementFilters) -> list:
+    from config.mock_data import get_mock_movements
+
+    return [m for m in get_mock_movements() if filters.matches(m)]
+
+
+def movement_rows(filters: MovementFilters) -> Iterator[list]:
+    if getattr(settings, "USE_MOCK_DATA", False):
+        for m in mock_movements(filters):
+            yield movement_object_row(m)
+        return
+    live = filters.apply(StockMovement.objects.all()).values_list(*MOVEMENT_CSV_FIELDS)
+    for row in live.iterator(chunk_size=ITERATOR_CHUNK):
+        yield movement_csv_row(*row)
+    if movement_archive.needs_archive(filters.start):
+        for m in movement_archive.read_archived(
+            start=filters.start, end=filters.end, product_id=filters.product_id, movement_type=filters.movement_type
+        ):
+            yield movement_object_row(m)
+
+
+def movement_count(filters: MovementFilters) -> Optional[int]:
+    """Filas vivas del informe (sin los meses archivados); para el progreso de los trabajos."""
+    if getattr(settings, "USE_MOCK_DATA", False):
+        return len(mock_movements(filters))
+    return filters.apply(StockMovement.objects.all()).count()
+
+
+def low_stock_products():
+    if getattr(settings, "USE_MOCK_DATA", False):
+        from config.mock_data import get_mock_low_stock_products
+
+        products = list(get_mock_low_stock_products())
+        for p in products:
+            p.current_stock = p.stock_quantity
+            p.stock_deficit = max(0, p.minimum_stock - p.stock_quantity)
+        return products
+    return sharded_counter.low_stock_products()
+
+
+def low_stock_rows(products=None) -> Iterator[list]:
+    products = low_stock_products() if products is None else products
+    if isinstance(products, list):
+        for p in products:
+            yield [p.sku, p.name, p.current_stock, p.minimum_stock, p.stock_deficit]
+        return
+    fields = ("sku", "name", "current_stock", "minimum_stock", "stock_deficit")
+    for row in products.values_list(*fields).iterator(chunk_size=ITERATOR_CHUNK):
+        yield list(row)
@@ -0,0 +1,115 @@
+"""
+Filtros del informe de movimientos.
+
+Las fechas se convierten en un rango semiabierto [start, end) de datetimes con
+zona horaria: la consulta compara created_at directamente y puede usar sus
+índices, mientras que created_at__date envuelve la columna en una conversión
+y obliga a recorrer la tabla.
+
+date_from / date_to aceptan AAAA-MM-DD o AAAA-MM-DDTHH:MM[:SS]. Una fecha sin
+hora en date_to incluye el día completo; con hora es el límite exclusivo.
+range (today, last_7_days, month_to_date) sustituye a ambas.
+"""
+from datetime import datetime, time, timedelta
+from typing import Optional
+from urllib.parse import urlencode
+
+from django.utils import timezone
+
+PRESETS = {
+    "today": "Hoy",
+    "last_7_days": "Últimos 7 días",
+    "month_to_date": "Mes en curso",
+}
+
+PARAMS = ("movement_type", "product", "date_from", "date_to", "range")
+
+
+def _start_of(day) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_bound(value, *, upper: bool = False) -> Optional[datetime]:
+    """Límite del rango a partir de una fecha o fecha y hora; None si no es válido."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if len(value) == 10 and upper:
+        parsed += timedelta(days=1)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def preset_range(preset: str):
+    today = timezone.localdate()
+    tomorrow = _start_of(today + timedelta(days=1))
+    if preset == "today":
+        return _start_of(today), tomorrow
+    if preset == "last_7_days":
+        return _start_of(today - timedelta(days=6)), tomorrow
+    if preset == "month_to_date":
+        return _start_of(today.replace(day=1)), tomorrow
+    return None, None
+
+
+class MovementFilters:
+    __slots__ = ("start", "end", "movement_type", "product_id", "preset")
+
+    def __init__(self, start=None, end=None, movement_type=None, product_id=None, preset=None) -> None:
+        self.start = start
+        self.end = end
+        self.movement_type = movement_type
+        self.product_id = product_id
+        self.preset = preset
+
+    @classmethod
+    def from_params(cls, params) -> "MovementFilters":
+        preset = params.get("range") if params.get("range") in PRESETS else None
+        if preset:
+            start, end = preset_range(preset)
+        else:
+            start = parse_bound(params.get("date_from"))
+            end = parse_bound(params.get("date_to"), upper=True)
+        try:
+            product_id = int(params.get("product") or "")
+        except ValueError:
+            product_id = None
+        return cls(start, end, params.get("movement_type") or None, product_id, preset)
+
+    def apply(self, movements):
+        if self.movement_type:
+            movements = movements.filter(movement_type=self.movement_type)
+        if self.product_id is not None:
+            movements = movements.filter(product_id=self.product_id)
+        if self.start:
+            movements = movements.filter(created_at__gte=self.start)
+        if self.end:
+            movements = movements.filter(created_at__lt=self.end)
+        return movements
+
+    def matches(self, movement) -> bool:
+        """Mismo criterio que apply() para listas en memoria (datos de prueba)."""
+        created_at = movement.created_at
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+        if self.movement_type and movement.movement_type != self.movement_type:
+            return False
+        if self.product_id is not None and getattr(movement.product, "id", movement.product_id) != self.product_id:
+            return False
+        if self.start and created_at < self.start:
+            return False
+        return not (self.end and created_at >= self.end)
+
+
+def filter_params(params) -> list:
+    """Pares (clave, valor) de filtro de la petición, para enlaces de paginación y exportación."""
+    return [(key, params[key]) for key in PARAMS if params.get(key)]
+
+
+def filter_querystring(params) -> str:
+    return urlencode(filter_params(params))
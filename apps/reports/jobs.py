@@ -0,0 +1,195 @@
+"""
+Cola de informes en segundo plano respaldada por la BD (ReportJob).
+
+submit() encola una exportación o devuelve el trabajo idéntico que ya está en
+cola o generándose (restricción única parcial sobre params_hash). El proceso
+run_report_jobs reclama trabajos con un UPDATE condicional, de modo que dos
+procesos no toman el mismo, y escribe el CSV (o .csv.gz) por bloques en
+MEDIA_ROOT/reports/, actualizando rows_written y updated_at (latido) cada
+PROGRESS_EVERY filas o HEARTBEAT_SECONDS segundos.
+
+Cada reclamo lleva su claim_token. Los latidos y el cierre solo se aplican si
+el token sigue vigente: un proceso al que requeue_stale() quitó el trabajo lo
+detecta en el siguiente latido y abandona sin tocarlo. El fichero (temporal y
+final) lleva el token en el nombre, así que un proceso antiguo no puede
+sobrescribir el de otro reclamo.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.reports.csv_export import csv_chunks, gzip_chunks
+from apps.reports.exports import (
+    LOW_STOCK_CSV_HEADER,
+    MOVEMENT_CSV_HEADER,
+    low_stock_products,
+    low_stock_rows,
+    movement_count,
+    movement_rows,
+)
+from apps.reports.filters import PARAMS, MovementFilters
+from apps.reports.models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_EVERY = 10000
+HEARTBEAT_SECONDS = 30
+ACTIVE = (ReportJob.PENDING, ReportJob.RUNNING)
+
+
+class ClaimLost(Exception):
+    """El trabajo se devolvió a la cola o lo tiene otro proceso."""
+
+
+def job_params(kind: str, params) -> dict:
+    """Parámetros relevantes del informe, sin vacíos (la base del hash de duplicados)."""
+    if kind != ReportJob.MOVEMENTS:
+        return {}
+    return {key: params[key] for key in PARAMS if params.get(key)}
+
+
+def params_hash(kind: str, params: dict, gzip: bool) -> str:
+    payload = json.dumps([kind, params, gzip], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def submit(kind: str, params, *, gzip: bool = False, user=None) -> Tuple[ReportJob, bool]:
+    """Devuelve (trabajo, creado). Si hay uno idéntico en cola o en curso se reutiliza."""
+    params = job_params(kind, params)
+    digest = params_hash(kind, params, gzip)
+    for _ in range(3):
+        existing = ReportJob.objects.filter(params_hash=digest, status__in=ACTIVE).first()
+        if existing:
+            return existing, False
+        try:
+            with transaction.atomic():
+                job = ReportJob.objects.create(
+                    kind=kind, params=params, gzip=gzip, params_hash=digest, requested_by=user
+                )
+            return job, True
+        except IntegrityError:
+            # Otra petición idéntica lo creó entre la búsqueda y el INSERT.
+            continue
+    raise RuntimeError("No se pudo encolar el informe.")
+
+
+def claim_next() -> Optional[ReportJob]:
+    """Reclama el trabajo pendiente más antiguo (o None si no hay)."""
+    candidates = ReportJob.objects.filter(status=ReportJob.PENDING).order_by("created_at", "id")
+    for job_id in candidates.values_list("id", flat=True)[:10]:
+        claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.PENDING).update(
+            status=ReportJob.RUNNING, claim_token=uuid.uuid4().hex, started_at=timezone.now(), updated_at=timezone.now()
+        )
+        if claimed:
+            return ReportJob.objects.get(pk=job_id)
+    return None
+
+
+def requeue_stale(minutes: Optional[int] = None) -> int:
+    """Devuelve a la cola los trabajos RUNNING sin latido reciente (proceso caído o colgado)."""
+    minutes = settings.REPORT_JOB_STALE_MINUTES if minutes is None else minutes
+    limit = timezone.now() - timedelta(minutes=minutes)
+    return ReportJob.objects.filter(status=ReportJob.RUNNING, updated_at__lt=limit).update(
+        status=ReportJob.PENDING, claim_token="", rows_written=0, updated_at=timezone.now()
+    )
+
+
+def purge_expired(days: Optional[int] = None) -> int:
+    """Borra los trabajos terminados (y sus ficheros) con más de days días."""
+    days = settings.REPORT_JOB_RETENTION_DAYS if days is None else days
+    expired = ReportJob.objects.filter(
+        status__in=(ReportJob.DONE, ReportJob.FAILED), finished_at__lt=timezone.now() - timedelta(days=days)
+    )
+    count = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
+
+def _source(job: ReportJob):
+    if job.kind == ReportJob.MOVEMENTS:
+        filters = MovementFilters.from_params(job.params)
+        return MOVEMENT_CSV_HEADER, movement_rows(filters), movement_count(filters)
+    products = low_stock_products()
+    total = len(products) if isinstance(products, list) else products.count()
+    return LOW_STOCK_CSV_HEADER, low_stock_rows(products), total
+
+
+def _owned(job: ReportJob):
+    return ReportJob.objects.filter(pk=job.pk, status=ReportJob.RUNNING, claim_token=job.claim_token)
+
+
+def heartbeat(job: ReportJob, **fields) -> None:
+    """Marca el trabajo como vivo (y guarda fields); ClaimLost si ya no es de este proceso."""
+    if not _owned(job).update(updated_at=timezone.now(), **fields):
+        raise ClaimLost(f"El informe #{job.pk} ya no pertenece a este proceso.")
+
+
+def _tracked(job: ReportJob, rows) -> Iterator:
+    written = 0
+    beat = time.monotonic()
+    for row in rows:
+        yield row
+        written += 1
+        if written % PROGRESS_EVERY == 0 or time.monotonic() - beat >= HEARTBEAT_SECONDS:
+            heartbeat(job, rows_written=written)
+            beat = time.monotonic()
+    job.rows_written = written
+
+
+def run(job: ReportJob) -> ReportJob:
+    """
+    Genera el fichero del trabajo (ya reclamado). Un error deja el trabajo en
+    FAILED; si se pierde el reclamo se abandona sin modificarlo.
+    """
+    stamp = timezone.localdate()
+    name = f"reports/{stamp:%Y/%m}/{job.kind}-{job.pk}-{job.claim_token[:12]}.csv" + (".gz" if job.gzip else "")
+    target = Path(settings.MEDIA_ROOT) / name
+    tmp = target.with_name(target.name + ".tmp")
+    try:
+        header, rows, total = _source(job)
+        heartbeat(job, rows_total=total)
+        job.rows_total = total
+        target.parent.mkdir(parents=True, exist_ok=True)
+        chunks = csv_chunks(header, _tracked(job, rows))
+        if job.gzip:
+            chunks = gzip_chunks(chunks)
+        with open(tmp, "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+        os.replace(tmp, target)
+    except ClaimLost:
+        logger.warning("Informe #%s devuelto a la cola durante la generación; se abandona", job.pk)
+        tmp.unlink(missing_ok=True)
+        job.refresh_from_db()
+        return job
+    except Exception as exc:
+        logger.exception("Error generando el informe #%s", job.pk)
+        tmp.unlink(missing_ok=True)
+        job.status, job.error = ReportJob.FAILED, str(exc) or exc.__class__.__name__
+    else:
+        job.status, job.file.name = ReportJob.DONE, name
+    job.finished_at = timezone.now()
+    closed = _owned(job).update(
+        status=job.status, error=job.error, file=job.file.name, rows_total=job.rows_total,
+        rows_written=job.rows_written, finished_at=job.finished_at, updated_at=job.finished_at,
+    )
+    if not closed:
+        # Otro proceso reclamó el trabajo justo al terminar: su resultado prevalece.
+        logger.warning("Informe #%s reclamado por otro proceso; se descarta este resultado", job.pk)
+        target.unlink(missing_ok=True)
+        job.refresh_from_db()
+    return job
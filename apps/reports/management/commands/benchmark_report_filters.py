@@ -0,0 +1,114 @@
+"""
+Filtro por fechas del informe de movimientos: created_at__date (conversión de
+la columna) frente al rango semiabierto de MovementFilters.
+
+Uso:
+    python manage.py benchmark_report_filters --rows 1000000 --days 365 --window 7
+
+Muestra el plan (EXPLAIN) y el tiempo de la primera página y del COUNT de una
+ventana de --window días. Crea productos temporales con prefijo DATEBENCH- y
+los elimina (con sus movimientos) al terminar.
+"""
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement
+from apps.products.models import Product
+from apps.reports.filters import MovementFilters
+
+SKU_PREFIX = "DATEBENCH-"
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = "Benchmark: filtro created_at__date vs. rango de datetimes en el informe de movimientos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--window", type=int, default=7, help="Días del rango consultado.")
+        parser.add_argument("--products", type=int, default=50)
+        parser.add_argument("--rounds", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self._cleanup()
+        try:
+            self._populate(options)
+            day_to = timezone.localdate() - timedelta(days=options["days"] // 2)
+            day_from = day_to - timedelta(days=options["window"] - 1)
+            base = StockMovement.objects.select_related("product", "performed_by")
+            variants = {
+                "__date": base.filter(created_at__date__gte=day_from, created_at__date__lte=day_to),
+                "rango": MovementFilters.from_params(
+                    {"date_from": day_from.isoformat(), "date_to": day_to.isoformat()}
+                ).apply(base),
+            }
+            results = {}
+            for label, queryset in variants.items():
+                self.stdout.write(f"--- {label}")
+                self.stdout.write(queryset[:20].explain())
+                results[label] = self._time(queryset, options["rounds"])
+                page, count, rows = results[label]
+                self.stdout.write(f"{label:>7}: página={page * 1000:.1f}ms count={count * 1000:.1f}ms filas={rows}")
+            old, new = results["__date"], results["rango"]
+            self.stdout.write(f"mejora: página x{old[0] / new[0]:.1f} | count x{old[1] / new[1]:.1f}")
+        finally:
+            self._cleanup()
+
+    @staticmethod
+    def _cleanup():
+        # Por bloques de id: el borrado en cascada de un millón de filas de una vez
+        # supera el límite de parámetros de SQLite.
+        movements = StockMovement.objects.filter(product__sku__startswith=SKU_PREFIX)
+        bounds = movements.aggregate(first=Min("id"), last=Max("id"))
+        if bounds["first"] is not None:
+            for start in range(bounds["first"], bounds["last"] + 1, BATCH_SIZE):
+                movements.filter(id__gte=start, id__lt=start + BATCH_SIZE).delete()
+        Product.objects.filter(sku__startswith=SKU_PREFIX).delete()
+
+    def _populate(self, options):
+        Product.objects.bulk_create(
+            [
+                Product(name=f"Date bench {i}", sku=f"{SKU_PREFIX}{i:04d}", unit_price=Decimal("1.00"))
+                for i in range(options["products"])
+            ]
+        )
+        product_ids = list(Product.objects.filter(sku__startswith=SKU_PREFIX).values_list("pk", flat=True))
+        rng = random.Random(42)
+        now = timezone.now()
+        span = options["days"] * 86400
+        start = time.perf_counter()
+        for offset in range(0, options["rows"], BATCH_SIZE):
+            StockMovement.objects.bulk_create(
+                [
+                    StockMovement(
+                        product_id=rng.choice(product_ids),
+                        movement_type=rng.choice((StockMovement.ENTRY, StockMovement.EXIT)),
+                        quantity=1,
+                        created_at=now - timedelta(seconds=rng.randrange(span)),
+                    )
+                    for _ in range(min(BATCH_SIZE, options["rows"] - offset))
+                ]
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.stdout.write(f"{options['rows']} movimientos creados en {time.perf_counter() - start:.1f}s")
+
+    @staticmethod
+    def _time(queryset, rounds):
+        page = count = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            list(queryset[:20])
+            page = min(page, time.perf_counter() - started)
+            started = time.perf_counter()
+            rows = queryset.count()
+            count = min(count, time.perf_counter() - started)
+        return page, count, rows
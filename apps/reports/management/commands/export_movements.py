@@ -0,0 +1,53 @@
+"""
+Vuelca los movimientos filtrados a un fichero CSV (o .csv.gz), repartiendo la
+lectura y el formateo entre varios procesos por rangos de id.
+
+Uso:
+    python manage.py export_movements auditoria.csv --workers 8
+    python manage.py export_movements auditoria.csv.gz --date-from 2024-01-01 --date-to 2024-12-31
+
+Las filas salen ordenadas por id. Ver apps.reports.parallel_export.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reports.filters import PRESETS, MovementFilters
+from apps.reports.parallel_export import export_movements
+
+
+class Command(BaseCommand):
+    help = "Exporta movimientos a CSV usando varios procesos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Ruta del fichero; con extensión .gz se comprime.")
+        parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo (por rangos de id).")
+        parser.add_argument("--gzip", action="store_true", help="Comprime aunque la ruta no termine en .gz.")
+        parser.add_argument("--date-from", default=None)
+        parser.add_argument("--date-to", default=None)
+        parser.add_argument("--range", choices=list(PRESETS), default=None)
+        parser.add_argument("--movement-type", default=None)
+        parser.add_argument("--product", type=int, default=None, help="Id de producto.")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers debe ser al menos 1.")
+        params = {
+            "date_from": options["date_from"],
+            "date_to": options["date_to"],
+            "range": options["range"],
+            "movement_type": options["movement_type"],
+            "product": options["product"],
+        }
+        filters = MovementFilters.from_params(params)
+        for key in ("date_from", "date_to"):
+            if params[key] and (filters.start if key == "date_from" else filters.end) is None and not filters.preset:
+                raise CommandError(f"Fecha no válida en --{key.replace('_', '-')}: {params[key]}")
+
+        output = options["output"]
+        report = export_movements(
+            filters, output, workers=options["workers"], gzip=options["gzip"] or output.endswith(".gz")
+        )
+        rate = report.rows / report.elapsed if report.elapsed else 0
+        self.stdout.write(
+            f"{output}: filas={report.rows} partes={report.parts} bytes={report.bytes} "
+            f"| {report.elapsed:.2f}s ({rate:.0f} filas/s)"
+        )
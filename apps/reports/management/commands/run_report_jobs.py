@@ -0,0 +1,49 @@
+"""
+Procesa los informes en segundo plano (ReportJob).
+
+Uso:
+    python manage.py run_report_jobs                 # bucle continuo
+    python manage.py run_report_jobs --once          # vacía la cola y termina (cron)
+
+Se pueden lanzar varios procesos: cada trabajo lo reclama uno solo. Ver
+apps.reports.jobs.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.reports import jobs
+
+
+class Command(BaseCommand):
+    help = "Genera los informes encolados desde la web."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Termina cuando no quedan trabajos pendientes.")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Segundos entre consultas a la cola.")
+        parser.add_argument("--max-jobs", type=int, default=None)
+
+    def handle(self, *args, **options):
+        processed = 0
+        while options["max_jobs"] is None or processed < options["max_jobs"]:
+            close_old_connections()
+            requeued = jobs.requeue_stale()
+            if requeued:
+                self.stderr.write(f"{requeued} trabajos sin progreso devueltos a la cola")
+            job = jobs.claim_next()
+            if job is None:
+                purged = jobs.purge_expired()
+                if purged:
+                    self.stdout.write(f"{purged} informes caducados eliminados")
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+            started = time.perf_counter()
+            job = jobs.run(job)
+            processed += 1
+            self.stdout.write(
+                f"#{job.pk} {job.kind} {job.status} filas={job.rows_written} "
+                f"{job.file.name or job.error} | {time.perf_counter() - started:.2f}s"
+            )
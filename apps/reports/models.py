@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.db import models
+
+
+class ReportJob(models.Model):
+    """Exportación generada en segundo plano por run_report_jobs; el fichero queda en MEDIA_ROOT."""
+
+    MOVEMENTS = "movements"
+    LOW_STOCK = "low_stock"
+
+    KIND_CHOICES = [
+        (MOVEMENTS, "Movimientos"),
+        (LOW_STOCK, "Stock bajo"),
+    ]
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (PENDING, "En cola"),
+        (RUNNING, "Generando"),
+        (DONE, "Listo"),
+        (FAILED, "Error"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    gzip = models.BooleanField(default=False)
+    # sha256 de (kind, params, gzip): dos peticiones idénticas en curso comparten trabajo.
+    params_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Token del reclamo vigente: solo ese proceso puede avanzar o cerrar el trabajo.
+    claim_token = models.CharField(max_length=32, blank=True, default="")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="report_jobs",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="reports/", blank=True)
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["params_hash"],
+                condition=models.Q(status__in=["PENDING", "RUNNING"]),
+                name="report_job_active_params_unique",
+            ),
+        ]
+        indexes = [models.Index(fields=["status", "created_at"], name="report_job_status_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        """Porcentaje completado, o None si no se conoce el total."""
+        if self.status == self.DONE:
+            return 100
+        if not self.rows_total:
+            return None
+        return min(99, self.rows_written * 100 // self.rows_total)
@@ -0,0 +1,114 @@
+"""
+Tests for background report jobs.
+"""
+import gzip
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement
+from apps.products.models import Product
+from apps.reports import jobs
+from apps.reports.models import ReportJob
+
+User = get_user_model()
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestReportJobs(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        self.product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=1)
+        StockMovement.objects.bulk_create(
+            [StockMovement(product=self.product, movement_type=StockMovement.ENTRY, quantity=i + 1) for i in range(5)]
+        )
+
+    def test_identical_active_requests_share_one_job(self):
+        first, created = jobs.submit(ReportJob.MOVEMENTS, {"movement_type": "ENTRY", "page": "3"})
+        again, created_again = jobs.submit(ReportJob.MOVEMENTS, {"movement_type": "ENTRY", "product": ""})
+        other, created_other = jobs.submit(ReportJob.MOVEMENTS, {"movement_type": "EXIT"})
+        self.assertEqual((created, created_again, created_other), (True, False, True))
+        self.assertEqual(again.pk, first.pk)
+        self.assertNotEqual(other.pk, first.pk)
+
+        jobs.run(jobs.claim_next())
+        rerun, created = jobs.submit(ReportJob.MOVEMENTS, {"movement_type": "ENTRY"})
+        self.assertTrue(created)  # el anterior ya terminó: se genera de nuevo
+        self.assertNotEqual(rerun.pk, first.pk)
+
+    def test_worker_writes_file_and_tracks_rows(self):
+        job, _ = jobs.submit(ReportJob.MOVEMENTS, {}, gzip=True)
+        claimed = jobs.claim_next()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(jobs.claim_next())
+
+        job = jobs.run(claimed)
+        self.assertEqual((job.status, job.rows_total, job.rows_written, job.progress), (ReportJob.DONE, 5, 5, 100))
+        self.assertTrue(job.file.name.endswith(f"movements-{job.pk}-{claimed.claim_token[:12]}.csv.gz"))
+        with job.file.open("rb") as f:
+            lines = gzip.decompress(f.read()).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job, _ = jobs.submit(ReportJob.LOW_STOCK, {})
+        jobs.claim_next()
+        ReportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(minutes=15), 1)
+        self.assertEqual(jobs.claim_next().pk, job.pk)
+
+    def test_stale_worker_cannot_finish_a_requeued_job(self):
+        job, _ = jobs.submit(ReportJob.MOVEMENTS, {})
+        stale = jobs.claim_next()
+        ReportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        jobs.requeue_stale(minutes=15)
+        owner = jobs.claim_next()
+        self.assertNotEqual(owner.claim_token, stale.claim_token)
+
+        with self.assertLogs("apps.reports.jobs", level="WARNING"):
+            abandoned = jobs.run(stale)
+        self.assertEqual((abandoned.status, abandoned.file.name), (ReportJob.RUNNING, ""))
+        done = jobs.run(owner)
+        self.assertEqual(done.status, ReportJob.DONE)
+        self.assertEqual(sorted(p.name for p in Path(settings.MEDIA_ROOT).rglob("*.csv*")), [Path(done.file.name).name])
+
+    def test_heartbeat_refreshes_running_jobs(self):
+        job, _ = jobs.submit(ReportJob.LOW_STOCK, {})
+        claimed = jobs.claim_next()
+        ReportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        jobs.heartbeat(claimed)
+        self.assertEqual(jobs.requeue_stale(minutes=15), 0)
+
+    def test_submit_poll_and_download(self):
+        response = self.client.post(
+            reverse("reports:report_job_create"), {"kind": "movements", "movement_type": "ENTRY"}
+        )
+        job = ReportJob.objects.get()
+        self.assertRedirects(response, reverse("reports:report_job_detail", args=[job.pk]))
+        status = self.client.get(reverse("reports:report_job_status", args=[job.pk])).json()
+        self.assertEqual((status["status"], status["download_url"]), ("PENDING", None))
+
+        out = StringIO()
+        call_command("run_report_jobs", "--once", stdout=out)
+        self.assertIn(f"#{job.pk} movements DONE filas=5", out.getvalue())
+
+        status = self.client.get(reverse("reports:report_job_status", args=[job.pk])).json()
+        self.assertEqual(status["progress"], 100)
+        download = self.client.get(status["download_url"])
+        content = b"".join(download.streaming_content).decode()
+        self.assertEqual(content.splitlines()[0], "ID,Producto,Tipo,Cantidad,Saldo,Motivo,Usuario,Fecha")
+        self.assertEqual(len(content.splitlines()), 6)
@@ -0,0 +1,82 @@
+"""
+Tests for the partitioned movement export.
+"""
+import csv
+import gzip
+import io
+import shutil
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement
+from apps.inventory.services import movement_archive
+from apps.products.models import Product
+from apps.reports.exports import MOVEMENT_CSV_HEADER, movement_rows
+from apps.reports.filters import MovementFilters
+from apps.reports.parallel_export import export_movements, id_ranges
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestParallelExport(TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.monitor = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00")
+        self.mouse = Product.objects.create(name="Mouse", sku="MOU-001", unit_price="10.00")
+        StockMovement.objects.bulk_create(
+            [
+                StockMovement(
+                    product=self.monitor if i % 3 else self.mouse,
+                    movement_type=StockMovement.EXIT if i % 2 else StockMovement.ENTRY,
+                    quantity=i + 1,
+                    reason=f"Lote, {i}",
+                )
+                for i in range(23)
+            ]
+        )
+
+    def expected(self, filters):
+        rows = sorted(movement_rows(filters), key=lambda row: row[0])
+        return [["" if v is None else str(v) for v in row] for row in rows]
+
+    def test_ranges_cover_the_filtered_ids(self):
+        ranges = id_ranges(MovementFilters(), 4)
+        ids = StockMovement.objects.order_by("id").values_list("id", flat=True)
+        self.assertEqual(ranges[0][0], ids.first())
+        self.assertEqual(ranges[-1][1], ids.last() + 1)
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+        self.assertEqual(id_ranges(MovementFilters(movement_type="ADJUSTMENT"), 4), [])
+
+    def test_parts_concatenate_into_one_csv(self):
+        filters = MovementFilters(movement_type=StockMovement.EXIT)
+        report = export_movements(filters, self.dir / "out.csv")
+        self.assertGreater(report.parts, 1)
+        with open(self.dir / "out.csv", newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], MOVEMENT_CSV_HEADER)
+        self.assertEqual(rows[1:], self.expected(filters))
+        self.assertEqual(report.rows, len(rows) - 1)
+        self.assertEqual(list(self.dir.iterdir()), [self.dir / "out.csv"])  # sin partes temporales
+
+    def test_gzip_members_decode_as_one_stream(self):
+        call_command("export_movements", str(self.dir / "out.csv.gz"), stdout=io.StringIO())
+        text = gzip.decompress((self.dir / "out.csv.gz").read_bytes()).decode("utf-8")
+        rows = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(rows[1:], self.expected(MovementFilters()))
+
+    def test_archived_months_lead_the_export(self):
+        old = timezone.make_aware(datetime(2024, 1, 10, 12))
+        StockMovement.objects.filter(pk__in=StockMovement.objects.order_by("id").values("id")[:4]).update(created_at=old)
+        with override_settings(INVENTORY_ARCHIVE_DIR=str(self.dir / "archive")):
+            movement_archive.archive_before(date(2024, 2, 1))
+            report = export_movements(MovementFilters(start=old), self.dir / "out.csv")
+        with open(self.dir / "out.csv", newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))[1:]
+        self.assertEqual(report.rows, 23)
+        self.assertEqual(len(rows), 23)
+        self.assertEqual([int(row[0]) for row in rows], sorted(int(row[0]) for row in rows))
@@ -0,0 +1,205 @@
+"""
+Integration tests for the report views.
+"""
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.inventory.models import StockMovement
+from apps.products.models import Product
+
+User = get_user_model()
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestStockAsOfReport(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=8)
+        Product.objects.update(created_at=timezone.now() - timedelta(days=30))
+        StockMovement.objects.create(
+            product=product, movement_type=StockMovement.EXIT, quantity=2, created_at=timezone.now()
+        )
+        self.url = reverse("reports:stock_as_of_report")
+
+    def test_report_and_csv_export(self):
+        yesterday = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = self.client.get(self.url, {"date": yesterday})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["products"][0].stock_as_of, 10)
+
+        export = self.client.get(self.url, {"date": yesterday, "export": "csv"})
+        self.assertEqual(export["Content-Type"], "text/csv")
+        self.assertIn("MON-001,Monitor,10,100.00,1000.00,8", export.content.decode())
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestMovementVolumeReport(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        self.url = reverse("reports:movement_volume_report")
+
+    def test_reads_daily_rollups(self):
+        from apps.inventory.observers.base import StockSubject
+        from apps.inventory.services.inventory_service import InventoryService
+        from apps.products.repositories.product_repository import DjangoProductRepository
+
+        product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=8)
+        InventoryService(DjangoProductRepository(), StockSubject()).register_movements(
+            [
+                {"product_id": product.pk, "movement_type": "ENTRY", "quantity": 5},
+                {"product_id": product.pk, "movement_type": "EXIT", "quantity": 3},
+            ]
+        )
+        StockMovement.objects.all().delete()  # el informe no toca los movimientos
+        response = self.client.get(self.url)
+        row = response.context["rows"][0]
+        self.assertEqual((row["movements"], row["entries"], row["exits"]), (2, 5, 3))
+
+        export = self.client.get(self.url, {"group": "month", "export": "csv"})
+        self.assertIn("MON-001,Monitor,2,5,3,0", export.content.decode())
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestMovementReportDateRanges(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=8)
+        tz = timezone.get_current_timezone()
+        for hour, day in ((23, 1), (0, 2), (10, 2), (0, 3)):
+            StockMovement.objects.create(
+                product=product,
+                movement_type=StockMovement.ENTRY,
+                quantity=hour + 1,
+                created_at=datetime(2025, 3, day, hour, 30, tzinfo=tz),
+            )
+        self.today = StockMovement.objects.create(product=product, movement_type=StockMovement.EXIT, quantity=1)
+        self.url = reverse("reports:movement_report")
+
+    def quantities(self, **params):
+        response = self.client.get(self.url, params)
+        return sorted(m.quantity for m in response.context["movements"])
+
+    def test_date_to_includes_the_whole_day(self):
+        self.assertEqual(self.quantities(date_from="2025-03-02", date_to="2025-03-02"), [1, 11])
+
+    def test_datetime_bounds_are_half_open(self):
+        self.assertEqual(self.quantities(date_from="2025-03-01T23:30", date_to="2025-03-02T10:30"), [1, 24])
+
+    def test_preset_overrides_dates(self):
+        response = self.client.get(self.url, {"range": "today", "date_from": "2025-03-01"})
+        self.assertEqual([m.pk for m in response.context["movements"]], [self.today.pk])
+        self.assertEqual(response.context["filter_query"], "date_from=2025-03-01&range=today")
+
+    def test_query_compares_created_at_directly(self):
+        from apps.reports.filters import MovementFilters
+
+        filters = MovementFilters.from_params({"date_from": "2025-03-02", "date_to": "2025-03-02"})
+        sql = str(filters.apply(StockMovement.objects.all()).query)
+        self.assertNotIn("django_datetime_cast_date", sql)
+        self.assertIn('"inventory_stockmovement"."created_at" >=', sql)
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestStreamingExports(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        self.product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.00", stock_quantity=1)
+        self.url = reverse("reports:movement_report")
+
+    def create_movements(self, count):
+        StockMovement.objects.bulk_create(
+            [
+                StockMovement(product=self.product, movement_type=StockMovement.ENTRY, quantity=1, reason=f"Lote {i}")
+                for i in range(count)
+            ],
+            batch_size=2000,
+        )
+
+    def export_peak(self, count):
+        import tracemalloc
+
+        StockMovement.objects.all().delete()
+        self.create_movements(count)
+        response = self.client.get(self.url, {"export": "csv"})
+        tracemalloc.start()
+        rows = sum(chunk.count(b"\n") for chunk in response.streaming_content)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertEqual(rows, count + 1)
+        return peak
+
+    def test_peak_memory_does_not_grow_with_rows(self):
+        # Ambos tamaños superan un bloque del cursor (ITERATOR_CHUNK filas).
+        small = self.export_peak(6000)
+        large = self.export_peak(24000)
+        self.assertLess(large, small * 1.2, f"pico {small} -> {large} bytes")
+
+    def test_gzip_export(self):
+        import gzip
+
+        self.create_movements(3)
+        response = self.client.get(self.url, {"export": "csv", "gzip": "1"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn('.csv.gz"', response["Content-Disposition"])
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(lines[0], "ID,Producto,Tipo,Cantidad,Saldo,Motivo,Usuario,Fecha")
+        self.assertEqual(len(lines), 4)
+
+    def test_low_stock_export_streams(self):
+        response = self.client.get(reverse("reports:low_stock_report"), {"export": "csv"})
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("MON-001,Monitor,1,5,4", content)
+
+
+@override_settings(USE_MOCK_DATA=False)
+class TestCatalogExport(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="admin", password="secret123")
+        self.client.login(username="admin", password="secret123")
+        self.product = Product.objects.create(name="Monitor", sku="MON-001", unit_price="100.50", stock_quantity=7)
+        Product.objects.create(name="Cable", sku="CAB-001", unit_price="2.00", is_active=False)
+        self.url = reverse("reports:catalog_export")
+
+    def test_ndjson_lists_every_product(self):
+        import json
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            json.loads(lines[0]),
+            {
+                "sku": "MON-001", "name": "Monitor", "category": None, "supplier": None,
+                "unit_price": "100.50", "stock_quantity": 7, "minimum_stock": 5, "is_active": True,
+            },
+        )
+        self.assertEqual(json.loads(lines[1])["is_active"], False)
+
+    def test_csv_gzip_uses_upsert_columns(self):
+        import gzip
+
+        response = self.client.get(self.url, {"format": "csv", "gzip": "1"})
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(lines[0], "sku,name,category,supplier,unit_price,stock_quantity,minimum_stock,is_active")
+        self.assertEqual(len(lines), 3)
+
+    def test_unchanged_catalog_returns_304(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(6):  # sesión, usuario y el resumen del ETag; no se leen las filas
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get(self.url, {"format": "csv"})["ETag"], etag)
+
+        self.product.stock_quantity = 3
+        self.product.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
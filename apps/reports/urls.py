@@ -1,11 +1,28 @@
 from django.urls import path
 
-from .views import low_stock_report_view, movement_report_view
+from .views import (
+    catalog_export_view,
+    low_stock_report_view,
+    movement_report_view,
+    movement_volume_report_view,
+    report_job_create_view,
+    report_job_detail_view,
+    report_job_download_view,
+    report_job_status_view,
+    stock_as_of_report_view,
+)
 
 app_name = "reports"
 
 urlpatterns = [
     path("movements/", movement_report_view, name="movement_report"),
+    path("movements/volume/", movement_volume_report_view, name="movement_volume_report"),
     path("low-stock/", low_stock_report_view, name="low_stock_report"),
+    path("catalog/", catalog_export_view, name="catalog_export"),
+    path("stock-as-of/", stock_as_of_report_view, name="stock_as_of_report"),
+    path("jobs/", report_job_create_view, name="report_job_create"),
+    path("jobs/<int:pk>/", report_job_detail_view, name="report_job_detail"),
+    path("jobs/<int:pk>/status/", report_job_status_view, name="report_job_status"),
+    path("jobs/<int:pk>/download/", report_job_download_view, name="report_job_download"),
 ]
 
@@ -1,15 +1,34 @@
 import csv
-from datetime import datetime
+from datetime import date, datetime, time
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import F
-from django.http import HttpResponse
-from django.shortcuts import render
+from django.contrib import messages
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.utils import timezone
 
 from apps.inventory.models import StockMovement
+from apps.inventory.pagination import MergedSource, keyset_page
+from apps.inventory.services import movement_archive, movement_rollups
+from apps.inventory.services.stock_snapshots import stock_as_of
 from apps.products.models import Product
+from apps.reports import catalog_export
+from apps.reports.csv_export import csv_chunks, streaming_csv_response, streaming_file_response, wants_gzip
+from apps.reports.exports import (
+    LOW_STOCK_CSV_HEADER,
+    MOVEMENT_CSV_HEADER,
+    low_stock_products,
+    low_stock_rows,
+    mock_movements,
+    movement_rows,
+)
+from apps.reports import jobs
+from apps.reports.filters import PRESETS, MovementFilters, filter_params, filter_querystring
+from apps.reports.models import ReportJob
 
 PAGE_SIZE = 20
 
@@ -37,80 +56,36 @@ def _parse_date(value):
         return None
 
 
-def _get_movements_queryset(request):
+def _get_movements_queryset(request, filters=None):
+    filters = filters or MovementFilters.from_params(request.GET)
     if getattr(settings, "USE_MOCK_DATA", False):
-        from config.mock_data import get_mock_movements
-
-        movements = get_mock_movements()
-        movement_type = request.GET.get("movement_type")
-        product_id = request.GET.get("product")
-        date_from = _parse_date(request.GET.get("date_from"))
-        date_to = _parse_date(request.GET.get("date_to"))
-        if movement_type:
-            movements = [m for m in movements if m.movement_type == movement_type]
-        if product_id:
-            pid = _safe_int(product_id)
-            if pid is not None:
-                movements = [m for m in movements if getattr(m.product, "id", m.product_id) == pid]
-        if date_from:
-            movements = [m for m in movements if m.created_at.date() >= date_from]
-        if date_to:
-            movements = [m for m in movements if m.created_at.date() <= date_to]
-        return movements
-    movements = StockMovement.objects.select_related("product", "performed_by")
-    movement_type = request.GET.get("movement_type")
-    product_id = request.GET.get("product")
-    date_from = _parse_date(request.GET.get("date_from"))
-    date_to = _parse_date(request.GET.get("date_to"))
-    if movement_type:
-        movements = movements.filter(movement_type=movement_type)
-    pid = _safe_int(product_id)
-    if pid is not None:
-        movements = movements.filter(product_id=pid)
-    if date_from:
-        movements = movements.filter(created_at__date__gte=date_from)
-    if date_to:
-        movements = movements.filter(created_at__date__lte=date_to)
-    return movements
+        return mock_movements(filters)
+    return filters.apply(StockMovement.objects.select_related("product", "performed_by"))
 
 
 @login_required
 def movement_report_view(request):
-    movements = _get_movements_queryset(request)
-
+    filters = MovementFilters.from_params(request.GET)
     if request.GET.get("export") == "csv":
-        response = HttpResponse(content_type="text/csv")
-        filename = f"movements_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-        writer = csv.writer(response)
-        writer.writerow(
-            [
-                "ID",
-                "Producto",
-                "Tipo",
-                "Cantidad",
-                "Motivo",
-                "Usuario",
-                "Fecha",
-            ]
+        return streaming_csv_response(
+            "movements", MOVEMENT_CSV_HEADER, movement_rows(filters), gzip=wants_gzip(request)
         )
-        for m in movements:
-            writer.writerow(
-                [
-                    m.id,
-                    m.product.sku,
-                    m.movement_type,
-                    m.quantity,
-                    m.reason or "",
-                    m.performed_by.username if m.performed_by else "",
-                    m.created_at.isoformat(),
-                ]
-            )
-        return response
 
-    paginator = Paginator(movements, PAGE_SIZE)
-    page_obj = paginator.get_page(_safe_page_number(request.GET.get("page")))
+    sources = [_get_movements_queryset(request, filters)]
+    if not getattr(settings, "USE_MOCK_DATA", False) and movement_archive.needs_archive(filters.start):
+        # El rango llega a meses archivados. Los movimientos vivos anteriores al
+        # fin del archivo (importados tarde) se intercalan con lo archivado por
+        # (created_at, id); los posteriores van primero, como una sola secuencia.
+        until = timezone.make_aware(datetime.combine(movement_archive.archived_until(), time.min))
+        live = sources.pop()
+        archived = movement_archive.read_archived(
+            start=filters.start,
+            end=filters.end,
+            product_id=filters.product_id,
+            movement_type=filters.movement_type,
+        )
+        sources = [live.filter(created_at__gte=until), MergedSource(live.filter(created_at__lt=until), archived)]
+    page_obj = keyset_page(sources, request.GET, PAGE_SIZE, extra_params=filter_params(request.GET))
 
     if getattr(settings, "USE_MOCK_DATA", False):
         from config.mock_data import get_mock_products
@@ -125,61 +100,264 @@ def movement_report_view(request):
             "movements": page_obj,
             "page_obj": page_obj,
             "products": products,
+            "presets": PRESETS,
+            "filter_query": filter_querystring(request.GET),
         },
     )
 
 
 @login_required
 def low_stock_report_view(request):
+    products = low_stock_products()
+    if request.GET.get("export") == "csv":
+        return streaming_csv_response(
+            "low_stock",
+            LOW_STOCK_CSV_HEADER,
+            low_stock_rows(products),
+            gzip=wants_gzip(request),
+        )
+
+    paginator = Paginator(products, PAGE_SIZE)
+    page_obj = paginator.get_page(_safe_page_number(request.GET.get("page")))
+
+    return render(
+        request,
+        "reports/low_stock_report.html",
+        {
+            "products": page_obj,
+            "page_obj": page_obj,
+        },
+    )
+
+
+def _catalog_format(request):
+    value = request.GET.get("format")
+    return value if value in catalog_export.FORMATS else "ndjson"
+
+
+def _catalog_etag(request):
+    return f"{catalog_export.catalog_etag()}-{_catalog_format(request)}" + ("-gz" if wants_gzip(request) else "")
+
+
+@login_required
+@require_GET
+@condition(etag_func=_catalog_etag)
+def catalog_export_view(request):
+    """Catálogo completo con stock actual (NDJSON o CSV); responde 304 si no ha cambiado."""
+    rows = catalog_export.catalog_rows()
+    fmt = _catalog_format(request)
+    if fmt == "csv":
+        chunks, content_type = csv_chunks(catalog_export.CATALOG_FIELDS, rows), "text/csv"
+    else:
+        chunks, content_type = catalog_export.ndjson_chunks(catalog_export.CATALOG_FIELDS, rows), "application/x-ndjson"
+    filename = f"catalog_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    response = streaming_file_response(filename, chunks, content_type, gzip=wants_gzip(request))
+    # Los clientes revalidan siempre con If-None-Match.
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _mock_stock_as_of(at):
+    """Modo demo: stock actual menos el efecto de los movimientos posteriores a at."""
+    from config.mock_data import get_mock_movements, get_mock_products
+
+    stock = {p.id: p.stock_quantity for p in get_mock_products()}
+    for m in get_mock_movements():
+        if m.created_at <= at or m.product_id not in stock or stock[m.product_id] is None:
+            continue
+        if m.movement_type == StockMovement.ENTRY:
+            stock[m.product_id] -= m.quantity
+        elif m.movement_type == StockMovement.EXIT:
+            stock[m.product_id] += m.quantity
+        else:
+            stock[m.product_id] = None
+    # Los datos demo no son coherentes con su historial: un negativo se muestra como desconocido.
+    return {pid: None if qty is not None and qty < 0 else qty for pid, qty in stock.items()}
+
+
+@login_required
+def stock_as_of_report_view(request):
+    as_of = _parse_date(request.GET.get("date")) or date.today()
+    at = datetime.combine(as_of, time.max)
+
     if getattr(settings, "USE_MOCK_DATA", False):
-        from config.mock_data import get_mock_low_stock_products
+        from config.mock_data import get_mock_products
 
-        products = list(get_mock_low_stock_products())
-        for p in products:
-            p.stock_deficit = max(0, p.minimum_stock - p.stock_quantity)
+        stock = _mock_stock_as_of(at)
+        products = [p for p in get_mock_products() if p.id in stock]
     else:
-        products = (
-            Product.objects.filter(is_active=True, stock_quantity__lte=F("minimum_stock"))
-            .annotate(stock_deficit=F("minimum_stock") - F("stock_quantity"))
-            .order_by("stock_quantity", "name")
-        )
+        stock = stock_as_of(timezone.make_aware(at))
+        products = Product.objects.filter(pk__in=list(stock)).order_by("name")
+    rows = []
+    for p in products:
+        quantity = stock.get(p.id)
+        p.stock_as_of = quantity
+        p.value_as_of = None if quantity is None else quantity * p.unit_price
+        rows.append(p)
+
     if request.GET.get("export") == "csv":
         response = HttpResponse(content_type="text/csv")
-        filename = f"low_stock_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        filename = f"stock_as_of_{as_of:%Y%m%d}.csv"
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
         writer = csv.writer(response)
-        writer.writerow(
-            [
-                "SKU",
-                "Nombre",
-                "Stock",
-                "Stock mínimo",
-                "Déficit",
-            ]
-        )
-        for p in products:
-            deficit = getattr(p, "stock_deficit", max(0, p.minimum_stock - p.stock_quantity))
+        writer.writerow(["SKU", "Nombre", "Stock a la fecha", "Precio unitario", "Valor", "Stock actual"])
+        for p in rows:
             writer.writerow(
                 [
                     p.sku,
                     p.name,
+                    "" if p.stock_as_of is None else p.stock_as_of,
+                    p.unit_price,
+                    "" if p.value_as_of is None else p.value_as_of,
                     p.stock_quantity,
-                    p.minimum_stock,
-                    deficit,
                 ]
             )
         return response
 
-    paginator = Paginator(products, PAGE_SIZE)
+    paginator = Paginator(rows, PAGE_SIZE)
     page_obj = paginator.get_page(_safe_page_number(request.GET.get("page")))
 
     return render(
         request,
-        "reports/low_stock_report.html",
+        "reports/stock_as_of_report.html",
         {
             "products": page_obj,
             "page_obj": page_obj,
+            "as_of": as_of,
         },
     )
 
+
+def _mock_volume(group, date_from, date_to, product_id, movement_type):
+    """Modo demo: mismos agregados que movement_rollups, calculados sobre los movimientos mock."""
+    from config.mock_data import get_mock_movements, get_mock_product_by_id
+
+    fields = {
+        StockMovement.ENTRY: "entries",
+        StockMovement.EXIT: "exits",
+        StockMovement.ADJUSTMENT: "adjustments",
+    }
+    rows = {}
+    for m in get_mock_movements():
+        day = m.created_at.date()
+        if (date_from and day < date_from) or (date_to and day > date_to):
+            continue
+        if product_id is not None and m.product_id != product_id:
+            continue
+        if movement_type and m.movement_type != movement_type:
+            continue
+        if group == "month":
+            product = get_mock_product_by_id(m.product_id)
+            key = (day.replace(day=1), product.sku)
+            base = {"month": key[0], "product_id": m.product_id, "product__sku": product.sku, "product__name": product.name}
+        else:
+            key = (day,)
+            base = {"day": day}
+        row = rows.setdefault(key, dict(base, movements=0, entries=0, exits=0, adjustments=0))
+        row["movements"] += 1
+        row[fields[m.movement_type]] += m.quantity
+    return [rows[key] for key in sorted(rows)]
+
+
+@login_required
+def movement_volume_report_view(request):
+    """Volumen de movimientos por día o por producto y mes, leído de los agregados diarios."""
+    group = "month" if request.GET.get("group") == "month" else "day"
+    filters = {
+        "date_from": _parse_date(request.GET.get("date_from")),
+        "date_to": _parse_date(request.GET.get("date_to")),
+        "product_id": _safe_int(request.GET.get("product")),
+        "movement_type": request.GET.get("movement_type") or None,
+    }
+    if getattr(settings, "USE_MOCK_DATA", False):
+        from config.mock_data import get_mock_products
+
+        rows = _mock_volume(group, **filters)
+        products = get_mock_products(active_only=True)
+    else:
+        if group == "month":
+            rows = movement_rollups.monthly_volume_by_product(**filters)
+        else:
+            rows = movement_rollups.daily_volume(**filters)
+        products = Product.objects.filter(is_active=True)
+
+    if request.GET.get("export") == "csv":
+        response = HttpResponse(content_type="text/csv")
+        filename = f"movement_volume_{group}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+        writer = csv.writer(response)
+        if group == "month":
+            writer.writerow(["Mes", "SKU", "Producto", "Movimientos", "Entradas", "Salidas", "Ajustes"])
+            for r in rows:
+                writer.writerow(
+                    [r["month"].strftime("%Y-%m"), r["product__sku"], r["product__name"], r["movements"], r["entries"], r["exits"], r["adjustments"]]
+                )
+        else:
+            writer.writerow(["Día", "Movimientos", "Entradas", "Salidas", "Ajustes"])
+            for r in rows:
+                writer.writerow([r["day"].isoformat(), r["movements"], r["entries"], r["exits"], r["adjustments"]])
+        return response
+
+    paginator = Paginator(rows, PAGE_SIZE)
+    page_obj = paginator.get_page(_safe_page_number(request.GET.get("page")))
+
+    return render(
+        request,
+        "reports/movement_volume_report.html",
+        {
+            "rows": page_obj,
+            "page_obj": page_obj,
+            "group": group,
+            "products": products,
+        },
+    )
+
+
+@login_required
+@require_POST
+def report_job_create_view(request):
+    kind = request.POST.get("kind")
+    if kind not in dict(ReportJob.KIND_CHOICES):
+        raise Http404("Informe desconocido.")
+    job, created = jobs.submit(kind, request.POST, gzip=request.POST.get("gzip") == "1", user=request.user)
+    if created:
+        messages.success(request, f"Informe #{job.pk} en cola; se generará en segundo plano.")
+    else:
+        messages.info(request, f"Ya había un informe idéntico en curso (#{job.pk}); se reutiliza.")
+    return redirect("reports:report_job_detail", pk=job.pk)
+
+
+def _job_status(job):
+    return {
+        "id": job.pk,
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "progress": job.progress,
+        "rows_written": job.rows_written,
+        "rows_total": job.rows_total,
+        "error": job.error,
+        "download_url": reverse("reports:report_job_download", args=[job.pk]) if job.status == job.DONE else None,
+    }
+
+
+@login_required
+def report_job_detail_view(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+    return render(request, "reports/report_job_detail.html", {"job": job, "job_status": _job_status(job)})
+
+
+@login_required
+def report_job_status_view(request, pk):
+    return JsonResponse(_job_status(get_object_or_404(ReportJob, pk=pk)))
+
+
+@login_required
+def report_job_download_view(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk, status=ReportJob.DONE)
+    try:
+        handle = job.file.open("rb")
+    except FileNotFoundError:
+        raise Http404("El fichero del informe ya no existe.")
+    return FileResponse(handle, as_attachment=True, filename=job.file.name.rsplit("/", 1)[-1])
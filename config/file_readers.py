@@ -0,0 +1,35 @@
+"""
+Lectores en streaming de ficheros de carga masiva (CSV y JSONL).
+Devuelven un dict por fila sin cargar el fichero en memoria; las filas
+ilegibles llegan como {"__error__": mensaje} para que cada importador las
+cuente como inválidas (movimientos, conteos cíclicos, catálogo).
+"""
+import csv
+import json
+from typing import Iterator
+
+
+def read_csv(stream) -> Iterator[dict]:
+    yield from csv.DictReader(stream)
+
+
+def read_jsonl(stream) -> Iterator[dict]:
+    """Las líneas que no son un objeto JSON válido se devuelven como {"__error__": ...}."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield {"__error__": "JSON no válido"}
+                continue
+            if isinstance(row, dict):
+                yield row
+            else:
+                yield {"__error__": f"Fila no válida: se esperaba un objeto y no {type(row).__name__}"}
+
+
+def read_rows(stream, path: str, fmt: str = None) -> Iterator[dict]:
+    """Elige el lector por formato explícito o por extensión (.jsonl/.ndjson -> JSONL)."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    return read_jsonl(stream) if fmt == "jsonl" else read_csv(stream)
@@ -51,6 +51,8 @@ def _mk_movement(mid, product_id, movement_type, quantity, reason, performed_by_
         reason=reason or "",
         performed_by=_mk_user(performed_by_username),
         created_at=datetime.fromisoformat(created_at_str),
+        signed_delta=None,
+        balance_after=None,
     )
 
 
@@ -236,6 +238,7 @@ def create_mock_movement(*, product_id, movement_type, quantity, reason, user):
             f"La salida excede el stock disponible. Stock actual: {product.stock_quantity}."
         )
 
+    before = product.stock_quantity
     if movement_type == StockMovement.ENTRY:
         product.stock_quantity += quantity
     elif movement_type == StockMovement.EXIT:
@@ -253,6 +256,8 @@ def create_mock_movement(*, product_id, movement_type, quantity, reason, user):
         reason=reason or "",
         performed_by=_mk_user(username),
         created_at=datetime.now(),
+        signed_delta=product.stock_quantity - before,
+        balance_after=product.stock_quantity,
     )
     movement.product = product
 
@@ -60,6 +60,54 @@ ASGI_APPLICATION = "config.asgi.application"
 # Se usa SQLite solo para auth/sessions; el resto es mock.
 USE_MOCK_DATA = config("USE_MOCK_DATA", default=True, cast=bool)
 
+# Entrega de notificaciones de stock a los observadores:
+# "sync" (dentro de la transacción del movimiento) u "on_commit" (tras el
+# commit, desde un pool acotado de hilos fuera de la petición).
+INVENTORY_OBSERVER_DISPATCH = config("INVENTORY_OBSERVER_DISPATCH", default="on_commit")
+INVENTORY_OBSERVER_WORKERS = config("INVENTORY_OBSERVER_WORKERS", default=2, cast=int)
+INVENTORY_OBSERVER_MAX_PENDING = config("INVENTORY_OBSERVER_MAX_PENDING", default=1000, cast=int)
+
+# Observadores de stock (rutas a clases StockObserver); se instancian una vez al arrancar.
+INVENTORY_STOCK_OBSERVERS = [
+    "apps.inventory.observers.stock_alert_observer.LowStockAlertObserver",
+]
+
+# Alertas de stock bajo: solo al cruzar el mínimo, agrupadas en un resumen por
+# ventana (0 = entrega inmediata). Sinks en apps.inventory.alerts.sinks.
+INVENTORY_LOW_STOCK_ALERTS = {
+    "WINDOW_SECONDS": config("INVENTORY_ALERT_WINDOW_SECONDS", default=0, cast=float),
+    "SINKS": [
+        {"BACKEND": "apps.inventory.alerts.sinks.LoggingAlertSink"},
+    ],
+}
+
+# Outbox transaccional de eventos de stock y su relay (relay_stock_events). Los
+# eventos publicados se borran tras RETENTION_DAYS.
+INVENTORY_OUTBOX_ENABLED = config("INVENTORY_OUTBOX_ENABLED", default=False, cast=bool)
+INVENTORY_OUTBOX_ENDPOINT = config("INVENTORY_OUTBOX_ENDPOINT", default="")
+INVENTORY_OUTBOX_RETENTION_DAYS = config("INVENTORY_OUTBOX_RETENTION_DAYS", default=7, cast=int)
+
+# Archivo en frío de movimientos (archive_movements): los meses completos más
+# antiguos que RETENTION_DAYS pasan a ficheros JSONL comprimidos en ARCHIVE_DIR.
+INVENTORY_ARCHIVE_DIR = config("INVENTORY_ARCHIVE_DIR", default=str(BASE_DIR / "archive" / "movements"))
+INVENTORY_ARCHIVE_RETENTION_DAYS = config("INVENTORY_ARCHIVE_RETENTION_DAYS", default=365, cast=int)
+
+# Informes en segundo plano (run_report_jobs): un trabajo RUNNING sin progreso
+# durante STALE_MINUTES vuelve a la cola; los ficheros se borran tras RETENTION_DAYS.
+REPORT_JOB_STALE_MINUTES = config("REPORT_JOB_STALE_MINUTES", default=15, cast=int)
+REPORT_JOB_RETENTION_DAYS = config("REPORT_JOB_RETENTION_DAYS", default=7, cast=int)
+
+# Feed de sincronización incremental (inventory/sync/changes/): solo se entregan
+# cambios con más de LAG_SECONDS, para no adelantar la marca de agua a
+# transacciones aún sin confirmar.
+INVENTORY_SYNC_LAG_SECONDS = config("INVENTORY_SYNC_LAG_SECONDS", default=5, cast=int)
+
+# Escritura diferida para escáneres (movements/scan/): las líneas se agrupan
+# hasta WINDOW_MS milisegundos o MAX_LINES líneas y se registran en un lote.
+INVENTORY_WRITE_BEHIND_ENABLED = config("INVENTORY_WRITE_BEHIND_ENABLED", default=False, cast=bool)
+INVENTORY_WRITE_BEHIND_WINDOW_MS = config("INVENTORY_WRITE_BEHIND_WINDOW_MS", default=50, cast=int)
+INVENTORY_WRITE_BEHIND_MAX_LINES = config("INVENTORY_WRITE_BEHIND_MAX_LINES", default=500, cast=int)
+
 # BD solo para Django (auth, sessions, admin). Con USE_MOCK_DATA el negocio usa mock_data.
 DATABASES = {
     "default": {
@@ -92,6 +140,10 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Ficheros generados (informes en segundo plano); se descargan a través de la vista, no de MEDIA_URL.
+MEDIA_URL = "media/"
+MEDIA_ROOT = config("MEDIA_ROOT", default=str(BASE_DIR / "media"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 LOGIN_URL = "accounts:login"